@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+멀티 쿼리 검색: 쿼리별 순차 검색 vs 배치 검색(batched_search) 지연 시간 비교
+
+순차 방식은 확장된 질문마다 embed_query + index.search 를 따로 부르고,
+배치 방식은 embed_documents 한 번, index.search 한 번으로 처리한 뒤 RRF 로 합친다.
+fan-out(쿼리 수)을 늘려 가며 /v 경로의 질문 쪽 지연 시간이 어떻게 달라지는지 본다.
+
+- db/faiss 와 ko-sbert 임베딩 모델(HuggingFace 캐시)이 필요하다
+
+사용법:
+    python benchmarks/bench_batched_search.py --fanout 1,3,6 --repeat 20
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from src.vector_store import batched_search, load_store
+
+QUERIES = [
+    "엔비디아 주가 어때?",
+    "NVIDIA 주가와 변동폭",
+    "NVDA 종목 정보",
+    "엔비디아 GPU AI 칩 수요 뉴스",
+    "미국 기술주 지수 하락 상승",
+    "반도체 업종 실적 전망",
+]
+
+
+def sequentialSearch(store, queries, k):
+    seen = set()
+    docs = []
+    for query in queries:
+        for doc in store.similarity_search(query, k=k):
+            if doc.page_content not in seen:
+                seen.add(doc.page_content)
+                docs.append(doc)
+    return docs
+
+
+def measure(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        docs = fn()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1000, len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="순차 vs 배치 멀티 쿼리 검색 지연 시간 비교")
+    parser.add_argument("--index", default="./db/faiss")
+    parser.add_argument("--k", type=int, default=4, help="쿼리당 검색 문서 수")
+    parser.add_argument("--fanout", default="1,3,6", help="비교할 쿼리 수 목록")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    store = load_store(args.index)
+    # 모델/인덱스 워밍업
+    store.similarity_search(QUERIES[0], k=1)
+    print(f"=== 벡터 {store.index.ntotal}개, k={args.k}, 반복 {args.repeat}회 (중앙값) ===")
+    print(f"{'fanout':>6s} {'seq_ms':>8s} {'batch_ms':>9s} {'speedup':>8s} {'seq_docs':>8s} {'batch_docs':>10s}")
+    for fanout in (int(x) for x in args.fanout.split(",")):
+        queries = (QUERIES * (fanout // len(QUERIES) + 1))[:fanout]
+        seq_ms, seq_docs = measure(lambda: sequentialSearch(store, queries, args.k), args.repeat)
+        batch_ms, batch_docs = measure(lambda: batched_search(store, queries, k=args.k), args.repeat)
+        print(f"{fanout:6d} {seq_ms:8.1f} {batch_ms:9.1f} {seq_ms / batch_ms:7.2f}x {seq_docs:8d} {batch_docs:10d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+/chat/ 핸들러 처리량 벤치마크 (단일 워커 기준)
+
+기존 방식(스레드 + 0.1초 간격 queue 폴링)과 asyncio 방식(wait_for + 백그라운드 콜백)을
+같은 가짜 핸들러로 비교한다. LLM, 카카오 콜백 호출은 모두 지연만 흉내 낸다.
+
+사용법:
+    python benchmarks/bench_chat_throughput.py --requests 200 --concurrency 50 --latency 0.3
+"""
+import os
+import sys
+import json
+import time
+import queue as q
+import argparse
+import asyncio
+import threading
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 변경 전 방식과 같은 조건으로 비교하고 작은 모델 API 도 부르지 않도록 빠른 답변은 끈다 (server.main 을 읽기 전에 설정)
+os.environ["SPECULATIVE_POLICY"] = ""
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+import server.main as server_main
+
+
+def make_request(i):
+    return {
+        "userRequest": {
+            "utterance": f"벤치마크 질문 {i}",
+            "callbackUrl": "http://callback.invalid/",
+            "user": {"id": f"bench-{i}"},
+        }
+    }
+
+
+def fake_ai_response(latency):
+    def handler(request, *args):
+        time.sleep(latency)
+        response = server_main.textResponseFormat("ok")
+        # 기존 방식은 queue 로 응답을 전달받는다
+        if args and isinstance(args[0], q.Queue):
+            args[0].put(response)
+        return response
+    return handler
+
+
+def legacy_main_chat(kakaorequest, handler):
+    # 변경 전 mainChat: 요청마다 스레드를 만들고 이벤트 루프 위에서 queue 를 폴링
+    start_time = time.time()
+    response_queue = q.Queue()
+    threading.Thread(target=handler, args=(kakaorequest, response_queue)).start()
+    response_data = None
+    while (time.time() - start_time) < 3.5:
+        if not response_queue.empty():
+            response_data = response_queue.get()
+            break
+        time.sleep(0.1)
+    if response_data is None:
+        threading.Thread(target=response_queue.get).start()
+    return Response(content=json.dumps({"version": "2.0", "useCallback": "true", "data": {}}),
+                    media_type='application/json')
+
+
+def build_legacy_app(handler):
+    app = FastAPI()
+
+    @app.post("/chat/")
+    async def chat(request: Request):
+        kakaorequest = await request.json()
+        return legacy_main_chat(kakaorequest, handler)
+
+    return app
+
+
+async def run_load(app, total, concurrency):
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                r = await client.post("/chat/", json=make_request(i), headers={"host": "bench"})
+                r.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat/ 처리량 벤치마크")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.3, help="가짜 핸들러 처리 시간(초)")
+    args = parser.parse_args()
+
+    handler = fake_ai_response(args.latency)
+    server_main.AI_Response = handler
+    server_main.callback_dispatcher.enqueue = lambda url, payload: True
+
+    print(f"=== /chat/ 벤치마크: {args.requests}건, 동시 {args.concurrency}, 핸들러 {args.latency}s ===")
+    before = asyncio.run(run_load(build_legacy_app(handler), args.requests, args.concurrency))
+    print("변경 전 (스레드 + queue 폴링):", before)
+    after = asyncio.run(run_load(server_main.app, args.requests, args.concurrency))
+    print("변경 후 (asyncio wait_for):     ", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+벡터 검색 vs 하이브리드(BM25 + 종목 사전 + 벡터, RRF) 검색 비교
+
+db/faiss 의 시장 데이터 행마다 티커 질문("NVDA 변동폭")과 종목 이름 질문("NVIDIA 종가")을 만들고,
+그 종목의 가장 최근 행이 상위 k 안에 들어오는 비율(hit@k)과 질문당 지연 시간을 잰다.
+종목 사전 조회(임베딩 없이 바로 답하는 경로)와 BM25 검색만의 지연 시간도 같이 보고한다.
+
+- 벡터/하이브리드 비교에는 ko-sbert 임베딩 모델(HuggingFace 캐시)이 필요하다
+- --lexical-only 면 임베딩 모델 없이 어휘 색인만 잰다
+
+사용법:
+    python benchmarks/bench_hybrid_search.py --k 4
+    python benchmarks/bench_hybrid_search.py --lexical-only
+"""
+import os
+import sys
+import time
+import argparse
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.vector_store import batched_search, load_store
+from src.vector_store.lexical import MARKET_ROW, LexicalIndex, lexical_index
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def marketQueries(store):
+    """(질문, 정답 본문) 목록. 정답은 그 종목의 가장 최근 행"""
+    latest = {}
+    for position, chunk_id in enumerate(store.index_to_docstore_id.values()):
+        text = store.docstore.search(chunk_id).page_content
+        for ticker, name in MARKET_ROW.findall(text):
+            latest[ticker] = (name, text)
+    queries = []
+    for ticker, (name, text) in latest.items():
+        queries.append((f"{ticker} 변동폭", text))
+        queries.append((f"{name} 종가", text))
+    return queries
+
+
+def timeLexical(index: LexicalIndex, queries, k, repeat=200):
+    lookup_us, bm25_us, hits = [], [], 0
+    for question, _ in queries:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            found = index.lookup(question)
+        lookup_us.append((time.perf_counter() - started) / repeat * 1e6)
+        hits += found is not None
+        started = time.perf_counter()
+        for _ in range(repeat):
+            index.search(question, k)
+        bm25_us.append((time.perf_counter() - started) / repeat * 1e6)
+    return lookup_us, bm25_us, hits
+
+
+def run(store, queries, k, hybrid):
+    latencies, hits = [], 0
+    for question, answer in queries:
+        started = time.perf_counter()
+        docs = batched_search(store, [question], k=k, limit=k, hybrid=hybrid)
+        latencies.append(time.perf_counter() - started)
+        hits += any(d.page_content == answer for d in docs)
+    return hits / len(queries), percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 검색과 하이브리드 검색의 종목 질문 hit@k/지연 시간 비교")
+    parser.add_argument("--index", default="./db/faiss")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--lexical-only", action="store_true", help="임베딩 모델 없이 어휘 색인만 측정")
+    args = parser.parse_args()
+
+    # 어휘 색인은 본문만 쓰므로 차원만 맞는 가짜 임베딩으로 연다
+    store = load_store(args.index, DeterministicFakeEmbedding(size=1) if args.lexical_only else None)
+    queries = marketQueries(store)
+    started = time.perf_counter()
+    index = lexical_index(store)
+    build_ms = (time.perf_counter() - started) * 1000
+    stats = index.stats()
+    print(f"=== 청크 {stats['documents']}개, 단어 {stats['terms']}개, 티커 {stats['symbols']}개, "
+          f"질문 {len(queries)}개, k={args.k} (색인 생성 {build_ms:.0f} ms) ===")
+
+    lookup_us, bm25_us, hits = timeLexical(index, queries, args.k)
+    print(f"종목 사전 조회: p50 {percentile(lookup_us, 50):.1f} us, p95 {percentile(lookup_us, 95):.1f} us, "
+          f"임베딩 없이 답한 질문 {hits}/{len(queries)}")
+    print(f"BM25 검색:      p50 {percentile(bm25_us, 50):.1f} us, p95 {percentile(bm25_us, 95):.1f} us")
+    if args.lexical_only:
+        return
+
+    print(f"\n{'mode':7s} {'hit@k':>6s} {'p50_ms':>7s} {'p95_ms':>7s}")
+    for mode, hybrid in (('vector', False), ('hybrid', True)):
+        hit_rate, p50, p95 = run(store, queries, args.k, hybrid)
+        print(f"{mode:7s} {hit_rate:6.2f} {p50:7.2f} {p95:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
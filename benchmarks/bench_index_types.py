@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+FAISS 인덱스 종류별 recall@k / 검색 지연 시간 / 구축 시간 / 벡터당 바이트 비교 (flat 전수 검색 기준)
+
+db/faiss 의 벡터를 그대로 꺼내 쓰므로 임베딩 모델은 필요 없다.
+몇 달치 뉴스/시장 스냅샷이 쌓인 상황을 흉내 내려면 --scale 로 벡터에 작은 잡음을 더한 복사본을 늘린다.
+질문 벡터는 코퍼스에서 뽑은 벡터에 잡음을 더해 만든다 (자기 자신이 항상 1위가 되지 않도록).
+압축 인덱스(sq8/pq/opq)는 재정렬 없이, 그리고 원본 벡터(mmap)로 상위 후보를 재정렬한 결과를 같이 잰다.
+bytes/vec 는 메모리에 올라가는 인덱스의 벡터당 크기이다 (재정렬용 원본 벡터는 디스크의 vectors.npy).
+
+사용법:
+    python benchmarks/bench_index_types.py --k 4 --queries 200
+    python benchmarks/bench_index_types.py --scale 30 --ef 16,64,128 --nprobe 1,4,16
+    python benchmarks/bench_index_types.py --scale 30 --pq-m 48,96 --rerank 4,10
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+import faiss
+
+from src.vector_store.index_builder import build_index, configure_search, default_nlist, describe_index, index_vectors
+from src.vector_store.search import rerank
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def loadCorpus(path, scale, noise, rng):
+    base = index_vectors(faiss.read_index(os.path.join(path, 'index.faiss'))).astype(np.float32)
+    copies = [base] + [normalize(base + rng.normal(0, noise, base.shape)) for _ in range(scale - 1)]
+    return np.ascontiguousarray(np.vstack(copies), dtype=np.float32)
+
+
+def measure(search, queries, k, corpus, kth_distances):
+    """search(질문 1개 행렬, k) -> 위치 행렬"""
+    latencies = []
+    hits = 0
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        positions = search(query.reshape(1, -1), k)[0]
+        latencies.append(time.perf_counter() - started)
+        positions = positions[positions >= 0]
+        # 같은 내용의 청크가 여러 개라 거리가 같은 경우가 많으므로, 정답 k 번째 거리 이내면 맞은 것으로 센다
+        distances = ((corpus[positions] - query) ** 2).sum(axis=1)
+        hits += int(np.sum(distances <= kth_distances[i] + 1e-4))
+    latencies.sort()
+    return {
+        'recall': hits / (len(queries) * k),
+        'p50_us': latencies[len(latencies) // 2] * 1e6,
+        'p95_us': latencies[int(len(latencies) * 0.95)] * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 recall/지연 시간/구축 시간 비교")
+    parser.add_argument("--index", default="./db/faiss")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=1, help="코퍼스를 몇 배로 늘릴지 (잡음을 더한 복사본)")
+    parser.add_argument("--noise", type=float, default=0.02, help="복사본/질문 벡터에 더할 잡음 표준편차")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef", default="16,32,64,128", help="비교할 HNSW efSearch 값들")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 클러스터 수 (0 이면 자동)")
+    parser.add_argument("--nprobe", default="1,4,8,16", help="비교할 IVF nprobe 값들")
+    parser.add_argument("--pq-m", default="48,96", help="비교할 PQ 부분 벡터 수들 (벡터당 바이트)")
+    parser.add_argument("--rerank", default="4", help="압축 인덱스 재정렬 후보 배수들 (k * 배수 개 후보)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = loadCorpus(args.index, args.scale, args.noise, rng)
+    picks = rng.choice(len(corpus), size=min(args.queries, len(corpus)), replace=False)
+    queries = normalize(corpus[picks] + rng.normal(0, args.noise, (len(picks), corpus.shape[1]))).astype(np.float32)
+    faiss.omp_set_num_threads(1)
+
+    def plain(index):
+        return lambda query, k: index.search(query, k)[1]
+
+    def reranked(index, exact, factor):
+        return lambda query, k: rerank(exact, query, index.search(query, k * factor)[1], k)
+
+    started = time.perf_counter()
+    flat = build_index(corpus, 'flat')
+    flat_build = time.perf_counter() - started
+    truth_distances, _ = flat.search(queries, args.k)
+    truth = truth_distances[:, -1]
+
+    rows = []
+
+    def add(index_type, params, build_seconds, index, search):
+        r = measure(search, queries, args.k, corpus, truth)
+        rows.append((index_type, params, build_seconds, describe_index(index)['bytes_per_vector'], r))
+
+    add('flat', '-', flat_build, flat, plain(flat))
+
+    started = time.perf_counter()
+    hnsw = build_index(corpus, 'hnsw', hnsw_m=args.hnsw_m)
+    hnsw_build = time.perf_counter() - started
+    for ef in (int(x) for x in args.ef.split(",")):
+        configure_search(hnsw, ef_search=ef)
+        add('hnsw', f"M={args.hnsw_m},ef={ef}", hnsw_build, hnsw, plain(hnsw))
+
+    started = time.perf_counter()
+    ivf = build_index(corpus, 'ivf', nlist=args.nlist)
+    ivf_build = time.perf_counter() - started
+    for nprobe in (int(x) for x in args.nprobe.split(",")):
+        configure_search(ivf, nprobe=nprobe)
+        add('ivf', f"nlist={ivf.nlist},nprobe={ivf.nprobe}", ivf_build, ivf, plain(ivf))
+
+    # 재정렬용 원본 벡터는 서버처럼 디스크에 두고 mmap 으로 읽는다
+    with tempfile.TemporaryDirectory() as tmp:
+        np.save(os.path.join(tmp, 'vectors.npy'), corpus)
+        exact = np.load(os.path.join(tmp, 'vectors.npy'), mmap_mode='r')
+        factors = [int(x) for x in args.rerank.split(",")]
+        compressed = [('sq8', None)] + [(t, int(m)) for t in ('pq', 'opq') for m in args.pq_m.split(",")]
+        for index_type, pq_m in compressed:
+            started = time.perf_counter()
+            index = build_index(corpus, index_type, pq_m=pq_m or 48)
+            build_seconds = time.perf_counter() - started
+            params = f"m={pq_m}" if pq_m else "int8"
+            add(index_type, params, build_seconds, index, plain(index))
+            for factor in factors:
+                add(index_type, f"{params},rerank x{factor}", build_seconds, index, reranked(index, exact, factor))
+        del exact
+
+    print(f"=== 벡터 {len(corpus)}개 (dim {corpus.shape[1]}, x{args.scale}), 질문 {len(queries)}개, k={args.k}, "
+          f"단일 스레드, 자동 nlist={default_nlist(len(corpus))} ===")
+    print(f"{'type':5s} {'params':24s} {'build_s':>8s} {'bytes/vec':>9s} {'recall@k':>9s} {'p50_us':>8s} {'p95_us':>8s}")
+    for index_type, params, build_seconds, nbytes, r in rows:
+        print(f"{index_type:5s} {params:24s} {build_seconds:8.3f} {nbytes:9d} {r['recall']:9.3f} "
+              f"{r['p50_us']:8.1f} {r['p95_us']:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+LLM 게이트웨이 연결 재사용 벤치마크
+
+로컬 스텁 서버를 상대로 "호출마다 ChatGroq 생성"(변경 전)과
+"llm_gateway 공유 클라이언트"(변경 후)의 호출 시간과 TCP 연결 수를 비교한다.
+
+사용법:
+    python benchmarks/bench_llm_gateway.py --calls 200 --threads 8
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_groq import ChatGroq
+from server.components.llmGateway import LLMGateway, StubLLMServer, DEFAULT_MODEL
+
+
+def run(label, stub, call, calls, threads):
+    connections_before, requests_before = stub.connections, stub.requests
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(calls)))
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {calls / elapsed:.1f} calls/s, 평균 {elapsed / calls * 1000:.2f} ms, "
+          f"새 연결 {stub.connections - connections_before}개 / 요청 {stub.requests - requests_before}개")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 게이트웨이 벤치마크")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", default="0.005", help="스텁 응답 지연 분포")
+    args = parser.parse_args()
+
+    stub = StubLLMServer(latency=args.latency).start()
+
+    def fresh_client(i):
+        # 변경 전: 호출마다 새 ChatGroq (새 HTTP 클라이언트, 새 연결)
+        llm = ChatGroq(model=DEFAULT_MODEL, groq_api_base=stub.url, api_key="stub")
+        return llm.invoke(f"질문 {i}").content
+
+    gateway = LLMGateway(backend="stub", concurrency=str(args.threads))
+    os.environ["LLM_STUB_URL"] = stub.url
+
+    def shared_client(i):
+        return gateway.get_llm().invoke(f"질문 {i}").content
+
+    print(f"=== LLM 호출 {args.calls}회, 스레드 {args.threads}개, 지연 {args.latency} ===")
+    run("변경 전 (호출마다 ChatGroq 생성)", stub, fresh_client, args.calls, args.threads)
+    run("변경 후 (llm_gateway 공유)     ", stub, shared_client, args.calls, args.threads)
+
+    gateway.close()
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
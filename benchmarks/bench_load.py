@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+카카오 /chat/ 흐름 오프라인 부하 테스트
+
+Groq, 카카오, 인터넷 없이 /chat/ 처리량과 꼬리 지연을 측정한다.
+- 서버: uvicorn 으로 server.main:app 을 별도 프로세스로 실행 (LLM_BACKEND=stub, SEARCH_BACKEND=stub)
+- LLM: 이 프로세스에서 띄운 StubLLMServer (지연 분포 설정 가능)
+- 콜백: 이 프로세스에서 띄운 로컬 HTTP 싱크가 callbackUrl 요청을 받는다
+
+/v 와 '오늘의 뉴스' 는 로컬 db/faiss 와 HuggingFace 캐시에 있는 ko-sbert 모델을 사용한다.
+
+사용법:
+    python benchmarks/bench_load.py --requests 300 --concurrency 30 \\
+        --latency lognormal:-0.5,0.6 --mix card=4,v=2,s=1,ask=3,news=2
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import asyncio
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import httpx
+
+from server.components.llmGateway import StubLLMServer
+
+# 명령 종류별 발화 샘플
+UTTERANCES = {
+    'card': ['Dashboard', 'Fear & Greed', '주요 종목', '상관관계'],
+    'v': ['/v 엔비디아 주가 어때?', '/v 오늘 나스닥 변동폭 알려줘', '/v 10 Year Treasury 수익률은?'],
+    's': ['/s 연준 금리 결정', '/s 테슬라 실적 발표'],
+    'ask': ['오늘 시장 어때?', '나스닥 왜 떨어졌어?', '금리 인하가 주식에 미치는 영향은?', '환율이 오르면 어떻게 돼?'],
+    'news': ['오늘의 뉴스'],
+}
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def summarize(values):
+    return {f"p{p}": round(percentile(values, p) * 1000, 1) if values else None for p in (50, 95, 99)}
+
+
+class CallbackSink:
+    """callbackUrl 로 들어오는 최종 응답을 받아 도착 시각을 기록하는 로컬 서버"""
+
+    def __init__(self):
+        sink = self
+        self.arrivals = {}
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with sink._lock:
+                    sink.arrivals[self.path.rsplit("/", 1)[-1]] = time.perf_counter()
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+
+def parseMix(spec):
+    weights = {}
+    for item in spec.split(","):
+        kind, _, weight = item.partition("=")
+        if kind.strip() not in UTTERANCES:
+            raise ValueError(f"알 수 없는 명령 종류: {kind}")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def readServerMetrics(text):
+    values = {}
+    for line in text.splitlines():
+        if line.startswith(("process_threads ", "process_resident_memory_bytes ")):
+            name, value = line.split()
+            values[name] = float(value)
+    return values
+
+
+def startServer(port, stub_url, env_overrides):
+    env = dict(os.environ)
+    env.update({
+        "LLM_BACKEND": "stub",
+        "LLM_STUB_URL": stub_url,
+        "SEARCH_BACKEND": "stub",
+        "HF_HUB_OFFLINE": "1",
+    })
+    env.update(env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("서버가 시작되지 않았습니다")
+
+
+async def replay(base_url, sink, plan, concurrency, callback_wait):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+    peaks = {}
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        async def sampleMetrics(stop):
+            while not stop.is_set():
+                try:
+                    values = readServerMetrics((await client.get("/metrics")).text)
+                    for k, v in values.items():
+                        peaks[k] = max(peaks.get(k, 0), v)
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.5)
+
+        async def one(i, kind, utterance):
+            body = {
+                "userRequest": {
+                    "utterance": utterance,
+                    "callbackUrl": f"{sink.url}/callback/{i}",
+                    "user": {"id": f"load-{i % 50}"},
+                },
+            }
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    r = await client.post("/chat/", json=body)
+                    data = r.json()
+                    elapsed = time.perf_counter() - started
+                except (httpx.HTTPError, ValueError):
+                    results.append({'kind': kind, 'outcome': 'error', 'latency': time.perf_counter() - started})
+                    return
+            if data.get("template", {}).get("quickReplies"):
+                outcome = 'overload'
+            elif data.get("data", {}).get("text", "").startswith("생각하고 있는 중"):
+                outcome = 'callback'
+            elif data.get("data", {}).get("text"):
+                # 마감 전에 작은 모델의 빠른 답변을 먼저 돌려준 경우
+                outcome = 'fast'
+            else:
+                outcome = 'sync'
+            results.append({'id': str(i), 'kind': kind, 'outcome': outcome, 'latency': elapsed, 'started': started})
+
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sampleMetrics(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, kind, utterance) for i, (kind, utterance) in enumerate(plan)))
+        elapsed = time.perf_counter() - started
+
+        # 늦게 도착하는 콜백을 기다린다
+        expected = {r['id'] for r in results if r['outcome'] in ('sync', 'fast', 'callback')}
+        wait_until = time.perf_counter() + callback_wait
+        while time.perf_counter() < wait_until and not expected <= set(sink.arrivals):
+            await asyncio.sleep(0.2)
+        stop.set()
+        await sampler
+    return results, elapsed, peaks
+
+
+def report(results, elapsed, peaks, sink):
+    print(f"\n=== 결과: {len(results)}건, {elapsed:.1f}초, {len(results) / elapsed:.1f} req/s ===")
+    latencies = [r['latency'] for r in results]
+    outcomes = {}
+    for r in results:
+        outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+    print("HTTP 응답 지연(ms):", summarize(latencies))
+    print("3.5초 안에 완성된 응답 비율:", f"{outcomes.get('sync', 0) / len(results) * 100:.1f}%", outcomes)
+    print("3.5초 안에 빠른 답변이라도 보낸 비율:", f"{(outcomes.get('sync', 0) + outcomes.get('fast', 0)) / len(results) * 100:.1f}%")
+
+    print("\n명령별 최종 응답(콜백 도착) 지연(ms):")
+    for kind in UTTERANCES:
+        done = [sink.arrivals[r['id']] - r['started'] for r in results
+                if r['kind'] == kind and r.get('id') in sink.arrivals]
+        total = sum(1 for r in results if r['kind'] == kind)
+        if total:
+            print(f"  {kind:5s} {len(done):4d}/{total:<4d}", summarize(done))
+
+    if peaks:
+        print(f"\n서버 최대 스레드 수: {int(peaks.get('process_threads', 0))}, "
+              f"최대 RSS: {peaks.get('process_resident_memory_bytes', 0) / 1024 / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat/ 오프라인 부하 테스트")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--mix", default="card=4,v=2,s=1,ask=3,news=2", help="명령 종류별 비중")
+    parser.add_argument("--latency", default="lognormal:-0.5,0.6", help="스텁 LLM 지연 분포 (parseLatency 형식)")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="스텁 LLM 토큰 간 지연(초)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="이미 실행 중인 서버 주소 (지정하면 서버를 띄우지 않음)")
+    parser.add_argument("--callback-wait", type=float, default=60.0, help="콜백을 기다릴 최대 시간(초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], help="서버에 넘길 환경변수 (KEY=VALUE)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = parseMix(args.mix)
+    kinds = rng.choices(list(weights), weights=list(weights.values()), k=args.requests)
+    plan = [(kind, rng.choice(UTTERANCES[kind])) for kind in kinds]
+
+    stub = StubLLMServer(latency=args.latency, token_delay=args.token_delay, seed=args.seed).start()
+    sink = CallbackSink()
+    server = None
+    base_url = args.url
+    if base_url is None:
+        overrides = dict(item.split("=", 1) for item in args.env)
+        server = startServer(args.port, stub.url, overrides)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    print(f"=== /chat/ 부하 테스트: {args.requests}건, 동시 {args.concurrency}, 구성 {weights}, LLM 지연 {args.latency} ===")
+    try:
+        results, elapsed, peaks = asyncio.run(replay(base_url, sink, plan, args.concurrency, args.callback_wait))
+        report(results, elapsed, peaks, sink)
+        print(f"스텁 LLM: 요청 {stub.requests}건, 연결 {stub.connections}개")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
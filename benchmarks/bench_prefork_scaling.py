@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+워커 수에 따른 처리량/메모리 비교: server.prefork vs uvicorn --workers
+
+워커 수마다 서버를 새로 띄워서
+- 시작 시간 (프로세스 시작 ~ 첫 응답)
+- 일정 시간 동안의 /chat/ 처리량과 p95 지연
+- 프로세스 트리 전체의 RSS 합과 PSS 합 (PSS 는 공유 페이지를 나눠 센 실제 사용량)
+을 측정한다. LLM 은 StubLLMServer, 콜백은 로컬 싱크를 사용하므로 외부 연결이 필요 없다.
+
+사용법:
+    python benchmarks/bench_prefork_scaling.py --workers 1,2,4 --duration 15 --concurrency 32
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import asyncio
+import subprocess
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from server.components.llmGateway import StubLLMServer
+from server.components.metrics import processStats
+from bench_load import CallbackSink, UTTERANCES, parseMix, percentile
+
+
+def processTree(pid):
+    """pid 와 모든 자손 프로세스 pid 목록"""
+    pids = [pid]
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                pids.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def treeMemory(pid):
+    rss = pss = 0
+    for p in processTree(pid):
+        stats = processStats(p)
+        rss += stats['rss_bytes'] or 0
+        pss += stats['pss_bytes'] or 0
+    return rss, pss
+
+
+def startServer(mode, workers, port, stub_url):
+    env = dict(os.environ, LLM_BACKEND="stub", LLM_STUB_URL=stub_url, SEARCH_BACKEND="stub",
+               HF_HUB_OFFLINE="1", TOKENIZERS_PARALLELISM="false")
+    if mode == "prefork":
+        cmd = [sys.executable, "-m", "server.prefork", "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "server.main:app", "--workers", str(workers), "--port", str(port), "--log-level", "warning"]
+    started = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while time.perf_counter() - started < 180:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                break
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    else:
+        process.kill()
+        raise RuntimeError(f"{mode} 서버가 시작되지 않았습니다")
+    # 모든 워커가 뜰 때까지 잠깐 더 기다린다 (첫 응답은 한 워커만 준비돼도 온다)
+    time.sleep(2)
+    return process, time.perf_counter() - started
+
+
+async def drive(base_url, sink, weights, duration, concurrency, seed):
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def user(u):
+            nonlocal errors
+            i = 0
+            while time.perf_counter() < deadline:
+                kind = rng.choices(list(weights), weights=list(weights.values()))[0]
+                body = {"userRequest": {"utterance": rng.choice(UTTERANCES[kind]),
+                                        "callbackUrl": f"{sink.url}/callback/{u}-{i}",
+                                        "user": {"id": f"bench-{u}"}}}
+                started = time.perf_counter()
+                try:
+                    r = await client.post("/chat/", json=body)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+                i += 1
+
+        await asyncio.gather(*(user(u) for u in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pre-fork 워커 수 확장 벤치마크")
+    parser.add_argument("--workers", default="1,2,4", help="측정할 워커 수 목록")
+    parser.add_argument("--modes", default="prefork,uvicorn", help="prefork, uvicorn 중 측정할 실행 방식")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", default="card=6,ask=2,news=1")
+    parser.add_argument("--latency", default="uniform:0.05,0.3", help="스텁 LLM 지연 분포")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    stub = StubLLMServer(latency=args.latency).start()
+    sink = CallbackSink()
+    weights = parseMix(args.mix)
+    rows = []
+    try:
+        for mode in args.modes.split(","):
+            for workers in [int(w) for w in args.workers.split(",")]:
+                process, startup = startServer(mode, workers, args.port, stub.url)
+                try:
+                    latencies, errors = asyncio.run(drive(f"http://127.0.0.1:{args.port}", sink, weights,
+                                                          args.duration, args.concurrency, workers))
+                    rss, pss = treeMemory(process.pid)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+                rows.append((mode, workers, startup, len(latencies) / args.duration,
+                             (percentile(latencies, 95) or 0) * 1000, errors, rss, pss))
+                print(f"{mode:8s} workers={workers}: {rows[-1][3]:.1f} req/s")
+    finally:
+        stub.stop()
+
+    print(f"\n=== /chat/ 처리량 ({args.duration:.0f}초, 동시 {args.concurrency}, 구성 {args.mix}) ===")
+    print(f"{'mode':8s} {'workers':>7s} {'startup_s':>9s} {'req/s':>8s} {'p95_ms':>8s} {'errors':>6s} {'RSS_MB':>8s} {'PSS_MB':>8s}")
+    for mode, workers, startup, rps, p95, errors, rss, pss in rows:
+        print(f"{mode:8s} {workers:7d} {startup:9.2f} {rps:8.1f} {p95:8.1f} {errors:6d} "
+              f"{rss / 1024 / 1024:8.1f} {pss / 1024 / 1024:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
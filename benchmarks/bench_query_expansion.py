@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+질문 확장 방식 비교: LLM 재작성(MultiQueryRetriever 방식) vs 로컬 확장 vs 확장 없음
+
+고정된 질문 목록에 대해 모드별로 질문 확장 + 검색 지연 시간과 재현율(recall)을 잰다.
+정답 문서 집합은 각 질문과 사람이 직접 쓴 바꿔 말하기 질문들의 상위 k 검색 결과 합집합이다
+(LLM 이 이상적으로 재작성했을 때 가져올 문서).
+
+- db/faiss 와 ko-sbert 임베딩 모델(HuggingFace 캐시)이 필요하다
+- LLM 은 LLM_BACKEND 설정을 따른다. groq 이면 실제 재작성 품질, stub 이면 지연 시간만 의미가 있다
+
+사용법:
+    python benchmarks/bench_query_expansion.py --k 4
+    LLM_BACKEND=stub LLM_STUB_LATENCY=lognormal:-0.7,0.5 python benchmarks/bench_query_expansion.py
+"""
+import os
+import sys
+import time
+import argparse
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+# 모드마다 빈 재작성 캐시에서 시작하도록 저장된 캐시는 읽지 않는다
+os.environ.pop("QUERY_REWRITE_CACHE", None)
+
+from server.components.llmGateway import llm_gateway
+from server.components.queryExpansion import QueryExpander
+from src.vector_store import load_store
+
+# (질문, 바꿔 말하기 질문들)
+QUERIES = [
+    ("엔비디아 주가 어때?", ["NVIDIA 주가와 변동폭", "NVDA 종목 정보", "엔비디아 GPU AI 칩 수요 뉴스"]),
+    ("나스닥 오늘 변동폭 알려줘", ["NASDAQ 지수 변동", "^IXIC 지수 가격", "미국 기술주 지수 하락 상승"]),
+    ("10년물 국채 금리 얼마야?", ["10 Year Treasury 수익률", "^TNX 금리", "미국 국채 수익률 변화"]),
+    ("연준 금리 결정 소식", ["Fed interest rate decision", "FOMC 기준금리 인하 동결", "연방준비제도 통화정책"]),
+    ("테슬라 관련 뉴스 있어?", ["Tesla 주가", "TSLA 종목 정보", "일론 머스크 전기차 회사 소식"]),
+    ("금값 올랐어?", ["Gold 가격 변동", "GC=F 금 선물", "안전자산 금 시세"]),
+    ("유가 동향", ["WTI Oil 가격", "CL=F 원유 선물", "국제 유가 변동"]),
+    ("애플 실적", ["Apple 주가", "AAPL 종목 정보", "아이폰 판매 실적 뉴스"]),
+    ("인플레이션 전망", ["CPI 물가 지표", "inflation 소비자물가", "물가 상승률 발표"]),
+    ("S&P 500 지수 어때", ["^GSPC 지수 가격", "미국 대형주 지수 변동", "S&P500 상승 하락"]),
+    ("마이크로소프트 주가", ["Microsoft 주가", "MSFT 종목 정보", "클라우드 애저 실적"]),
+    ("오늘 미국 증시 주요 뉴스", ["미국 주식시장 마감 시황", "뉴욕증시 주요 이슈", "Wall Street stocks today"]),
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def goldSet(store, question, paraphrases, k):
+    gold = set()
+    for q in [question] + paraphrases:
+        gold.update(d.page_content for d in store.similarity_search(q, k=k))
+    return gold
+
+
+def run(mode, store, llm, k, gold, passes):
+    expander = QueryExpander(mode=mode)
+    latencies, recalls, sizes = [], [], []
+    for p in range(passes):
+        for question, _ in QUERIES:
+            started = time.perf_counter()
+            docs = expander.retrieve(question, store, llm, k=k)
+            latencies.append(time.perf_counter() - started)
+            if p == 0:
+                found = {d.page_content for d in docs}
+                recalls.append(len(found & gold[question]) / len(gold[question]))
+                sizes.append(len(docs))
+    return {
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'recall': sum(recalls) / len(recalls),
+        'docs': sum(sizes) / len(sizes),
+        'llm_calls': expander.llm_calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="질문 확장 방식별 지연 시간/재현율 비교")
+    parser.add_argument("--index", default="./db/faiss")
+    parser.add_argument("--k", type=int, default=4, help="쿼리당 검색 문서 수")
+    parser.add_argument("--modes", default="llm,local,none")
+    parser.add_argument("--passes", type=int, default=2, help="같은 질문 목록 반복 횟수 (2회차부터 재작성 캐시 효과)")
+    args = parser.parse_args()
+
+    store = load_store(args.index)
+    llm = llm_gateway.get_llm()
+    gold = {q: goldSet(store, q, paraphrases, args.k) for q, paraphrases in QUERIES}
+    print(f"=== 질문 {len(QUERIES)}개, 벡터 {store.index.ntotal}개, k={args.k}, LLM backend={llm_gateway.backend} ===")
+
+    print(f"{'mode':6s} {'p50_ms':>8s} {'p95_ms':>8s} {'recall':>7s} {'docs':>6s} {'llm_calls':>9s}")
+    for mode in args.modes.split(","):
+        r = run(mode, store, llm, args.k, gold, args.passes)
+        print(f"{mode:6s} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['recall']:7.2f} {r['docs']:6.1f} {r['llm_calls']:9d}")
+    print("\n(p50/p95 는 모든 반복을 합친 값, recall/docs 는 첫 회차 기준. llm 모드 2회차부터는 재작성 캐시가 적중한다)")
+
+
+if __name__ == "__main__":
+    main()
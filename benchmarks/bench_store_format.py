@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+벡터 스토어 저장 형식별 로드 시간 / 메모리 비교 (pickle: index.pkl + 힙에 읽은 index.faiss, mmap: 메모리 매핑 + chunks.sqlite3)
+
+db/faiss 의 벡터와 본문을 --scale 배로 늘린 스토어를 두 형식으로 저장한 뒤,
+형식마다 --workers 개의 프로세스를 동시에 띄워 각자 스토어를 읽고 검색하게 한다 (pre-fork 워커 여러 개를 흉내).
+각 워커는 로드 시간, 질문 --queries 개 검색 후의 RssAnon(프로세스 전용 힙)/RssFile(파일 매핑)과
+Pss(공유 페이지를 나눠 가진 실제 몫)를 보고한다. 페이지 캐시는 비우지 않으므로 디스크가 아니라 캐시에서 읽는 경우의 값이다.
+임베딩 모델은 쓰지 않고 코퍼스 벡터에 잡음을 더한 질문 벡터로 검색한다.
+
+사용법:
+    python benchmarks/bench_store_format.py --scale 200 --workers 4
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def memoryMB():
+    """(RssAnon, RssFile, Pss) MB"""
+    status = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            status[key] = value
+    pss = 0
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                pss = int(line.split()[1])
+    return int(status['RssAnon'].split()[0]) / 1024, int(status['RssFile'].split()[0]) / 1024, pss / 1024
+
+
+def buildStores(source, scale, workdir):
+    from langchain_community.vectorstores import FAISS
+    from src.vector_store import load_store, save_store_atomic
+    from src.vector_store.index_builder import index_vectors
+
+    base = load_store(source, DeterministicFakeEmbedding(size=1))
+    vectors = index_vectors(base.index)
+    docs = [base.docstore.search(base.index_to_docstore_id[i]) for i in range(base.index.ntotal)]
+    rng = np.random.default_rng(0)
+    pairs, metadatas = [], []
+    for copy in range(scale):
+        noisy = vectors if copy == 0 else vectors + rng.normal(0, 0.02, vectors.shape).astype(np.float32)
+        for doc, vector in zip(docs, noisy):
+            pairs.append((f"{doc.page_content} ({copy})", vector.tolist()))
+            metadatas.append(doc.metadata)
+    store = FAISS.from_embeddings(pairs, DeterministicFakeEmbedding(size=vectors.shape[1]), metadatas=metadatas)
+    paths = {}
+    for store_format in ('pickle', 'mmap'):
+        paths[store_format] = os.path.join(workdir, store_format)
+        save_store_atomic(store, paths[store_format], store_format=store_format)
+    return paths, store.index.ntotal, vectors.shape[1]
+
+
+def child(path, dim, queries, k):
+    """워커 한 개: 로드, 검색, 부모 신호를 기다린 뒤 메모리 측정"""
+    before = memoryMB()
+    started = time.perf_counter()
+    from src.vector_store import load_store
+    from src.vector_store.search import fuse_ranked, search_vectors
+    import_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store = load_store(path, DeterministicFakeEmbedding(size=dim))
+    load_seconds = time.perf_counter() - started
+    after_load = memoryMB()
+
+    rng = np.random.default_rng(os.getpid())
+    picks = rng.choice(store.index.ntotal, size=queries)
+    vectors = store.index.reconstruct_batch(picks) + rng.normal(0, 0.02, (queries, dim)).astype(np.float32)
+    started = time.perf_counter()
+    for vector in vectors:
+        fuse_ranked(store, search_vectors(store, vector.reshape(1, -1), k))
+    search_ms = (time.perf_counter() - started) / queries * 1000
+    print(json.dumps({'ready': True}), flush=True)
+    sys.stdin.readline()
+    # 모든 워커가 검색을 마친 뒤에 재야 공유 페이지가 Pss 에 나눠 반영된다
+    rss_anon, rss_file, pss = memoryMB()
+    print(json.dumps({
+        'import_s': import_seconds, 'load_s': load_seconds, 'search_ms': search_ms,
+        'base_anon': before[0], 'load_anon': after_load[0] - before[0],
+        'rss_anon': rss_anon, 'rss_file': rss_file, 'pss': pss,
+    }), flush=True)
+
+
+def runWorkers(path, dim, workers, queries, k):
+    command = [sys.executable, os.path.abspath(__file__), '--child', path, '--dim', str(dim),
+               '--queries', str(queries), '--k', str(k)]
+    processes = [subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.stdout.readline()
+    results = []
+    for process in processes:
+        process.stdin.write('\n')
+        process.stdin.flush()
+    for process in processes:
+        results.append(json.loads(process.stdout.readline()))
+        process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 스토어 저장 형식별 로드 시간/메모리 비교")
+    parser.add_argument("--index", default="./db/faiss")
+    parser.add_argument("--scale", type=int, default=50, help="코퍼스를 몇 배로 늘릴지")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 띄울 워커 프로세스 수")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--dim", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.dim, args.queries, args.k)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths, ntotal, dim = buildStores(args.index, args.scale, workdir)
+        sizes = {fmt: sum(os.path.getsize(os.path.join(p, f)) for f in os.listdir(p)) / 1024 / 1024
+                 for fmt, p in paths.items()}
+        print(f"=== 벡터 {ntotal}개 (dim {dim}, x{args.scale}), 워커 {args.workers}개, 질문 {args.queries}개, k={args.k} ===")
+        print(f"{'format':7s} {'disk_MB':>8s} {'load_ms':>8s} {'search_ms':>9s} {'load_anon':>9s} "
+              f"{'rss_anon':>8s} {'rss_file':>8s} {'pss':>7s} {'pss_sum':>8s}")
+        for store_format, path in paths.items():
+            results = runWorkers(path, dim, args.workers, args.queries, args.k)
+
+            def mean(key):
+                return sum(r[key] for r in results) / len(results)
+
+            print(f"{store_format:7s} {sizes[store_format]:8.1f} {mean('load_s') * 1000:8.1f} {mean('search_ms'):9.2f} "
+                  f"{mean('load_anon'):9.1f} {mean('rss_anon'):8.1f} {mean('rss_file'):8.1f} {mean('pss'):7.1f} "
+                  f"{sum(r['pss'] for r in results):8.1f}")
+        print("load_anon: 로드로 늘어난 전용 메모리(MB), pss_sum: 워커 전체가 실제로 차지하는 메모리(MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+from collections import deque
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CallbackDispatcher:
+    """카카오 callbackUrl 로 최종 응답을 전달하는 전용 발송기
+
+    keep-alive 세션 하나를 여러 발송 스레드가 공유하고,
+    실패 시 지수 백오프(full jitter)로 재시도한다.
+    """
+
+    _STOP = object()
+
+    def __init__(self, senders: int = None, outbox_size: int = None,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0):
+        """
+        Args:
+            senders: 발송 스레드 수 (기본값: 환경변수 CALLBACK_SENDERS 또는 4)
+            outbox_size: 발송 대기열 크기 (기본값: 환경변수 CALLBACK_OUTBOX_SIZE 또는 256)
+            connect_timeout: 연결 타임아웃(초)
+            read_timeout: 응답 대기 타임아웃(초)
+            max_retries: 첫 시도 이후 재시도 횟수
+            backoff_base: 재시도 대기 시간의 기준값(초)
+            backoff_max: 재시도 대기 시간의 상한(초)
+        """
+        self.senders = senders or int(os.getenv("CALLBACK_SENDERS", "4"))
+        self.outbox_size = outbox_size or int(os.getenv("CALLBACK_OUTBOX_SIZE", "256"))
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.logger = logging.getLogger(__name__)
+
+        # 발송 스레드 수만큼 연결을 유지하는 세션 (재시도는 직접 처리)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.senders, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self._outbox = queue.Queue(maxsize=self.outbox_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        self._delivered = 0
+        self._failed = 0
+        self._dropped = 0
+        self._retries = 0
+        self._latencies = deque(maxlen=1000)
+
+    def start(self):
+        """발송 스레드 시작 (이미 시작된 경우 무시)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.senders):
+                t = threading.Thread(target=self._worker, name=f"callback-sender-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0):
+        """대기열에 남은 콜백을 처리한 뒤 발송 스레드 종료"""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._outbox.put(self._STOP)
+        for t in threads:
+            t.join(timeout)
+        self.session.close()
+
+    def enqueue(self, url: str, payload: Dict) -> bool:
+        """콜백 발송 예약. 대기열이 가득 찼으면 버리고 False 반환"""
+        self.start()
+        try:
+            self._outbox.put_nowait((url, payload, time.perf_counter()))
+            return True
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            self.logger.error(f"콜백 대기열 초과로 응답을 버렸습니다: {url}")
+            return False
+
+    def _worker(self):
+        while True:
+            item = self._outbox.get()
+            if item is self._STOP:
+                return
+            url, payload, enqueued_at = item
+            try:
+                ok = self._deliver(url, payload)
+            except Exception:
+                self.logger.exception("콜백 발송 중 예기치 못한 오류")
+                ok = False
+            with self._lock:
+                if ok:
+                    self._delivered += 1
+                    self._latencies.append(time.perf_counter() - enqueued_at)
+                else:
+                    self._failed += 1
+
+    def _deliver(self, url: str, payload: Dict) -> bool:
+        body = json.dumps(payload)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._lock:
+                    self._retries += 1
+                time.sleep(self._backoff(attempt))
+            try:
+                r = self.session.post(url, data=body, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.logger.warning(f"콜백 전송 실패 ({attempt + 1}회차): {e}")
+                continue
+
+            if r.ok:
+                self.logger.info(f"콜백 전송 완료: {r.status_code}")
+                return True
+            # 4xx 는 다시 보내도 결과가 같으므로 재시도하지 않는다 (429 제외)
+            if r.status_code < 500 and r.status_code != 429:
+                self.logger.error(f"콜백 거절됨: {r.status_code} {r.text[:200]}")
+                return False
+            self.logger.warning(f"콜백 응답 오류 ({attempt + 1}회차): {r.status_code}")
+        return False
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def stats(self) -> Dict:
+        """발송 결과와 지연 시간 통계"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'delivered': self._delivered,
+                'failed': self._failed,
+                'dropped': self._dropped,
+                'retries': self._retries,
+                'outbox_depth': self._outbox.qsize(),
+            }
+        stats['latency_p50_s'] = round(latencies[len(latencies) // 2], 4) if latencies else None
+        stats['latency_p95_s'] = round(latencies[int(len(latencies) * 0.95) - 1], 4) if latencies else None
+        return stats
@@ -0,0 +1,106 @@
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+# 프로젝트 루트 (/server/components 의 두 단계 위)
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+FEAR_GREED_CSV = PROJECT_ROOT / 'data' / 'raw' / 'fear_greed_index.csv'
+MARKET_DATA_DIR = PROJECT_ROOT / 'market_data'
+
+
+def fileSignature(path) -> Optional[Tuple[int, int, int]]:
+    """파일 변경 여부 판단용 (inode, mtime_ns, size). 파일이 없으면 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def readLastCsvValue(path, block_size: int = 1024) -> Optional[float]:
+    """
+    CSV 전체를 읽지 않고 마지막 데이터 행의 마지막 열 값만 읽기
+
+    뒤에서부터 숫자로 읽히는 행을 찾을 때까지 블록 단위로 읽는다 (병합 흔적 등 잘못된 행은 건너뜀).
+    숫자로 읽히는 행이 하나도 없으면 None
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        head = b''
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            lines = (f.read(end - start) + head).splitlines()
+            end = start
+            # 블록 경계에 걸친 첫 줄은 잘렸을 수 있으므로 앞 블록과 합쳐서 다시 본다
+            head = lines.pop(0) if end > 0 and lines else b''
+            for line in reversed(lines):
+                try:
+                    return float(line.decode('utf-8').rsplit(',', 1)[-1])
+                except ValueError:
+                    continue
+    return None
+
+
+def marketImagePath(name: str) -> Path:
+    """오늘 날짜의 market_data 이미지 경로"""
+    return MARKET_DATA_DIR / f"{name}_{time.strftime('%Y%m%d')}.png"
+
+
+class CardSnapshotCache:
+    """정적 카드 응답 스냅샷 캐시
+
+    응답을 만드는 데 쓰인 파일들의 (inode, mtime, size) 가 바뀔 때만 다시 만든다.
+    파일 확인(stat)도 check_interval 초에 한 번만 수행한다.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._entries: Dict[Hashable, dict] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def get(self, key: Hashable, paths: Callable[[], List], build: Callable[[], Dict]) -> Dict:
+        """
+        Args:
+            key: 캐시 키 (명령어, base_url 등)
+            paths: 응답이 의존하는 파일 경로 목록을 돌려주는 함수 (날짜가 바뀌면 경로도 바뀜)
+            build: 응답을 새로 만드는 함수
+
+        Returns:
+            Dict: 캐시된 응답. 공유 객체이므로 수정하지 말 것
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry['checked_at'] < self.check_interval:
+            # 여러 스레드가 동시에 적중해도 횟수를 잃지 않도록 잠금 안에서 센다
+            with self._lock:
+                self.hits += 1
+            return entry['payload']
+
+        current_paths = [str(p) for p in paths()]
+        signature = tuple(fileSignature(p) for p in current_paths)
+        if entry is not None and entry['paths'] == current_paths and entry['signature'] == signature:
+            entry['checked_at'] = now
+            with self._lock:
+                self.hits += 1
+            return entry['payload']
+
+        with self._lock:
+            payload = build()
+            self._entries[key] = {
+                'paths': current_paths,
+                'signature': signature,
+                'payload': payload,
+                'checked_at': now,
+            }
+            self.rebuilds += 1
+        return payload
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,88 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional
+
+from fastapi.staticfiles import StaticFiles
+
+from server.components.cardCache import MARKET_DATA_DIR, fileSignature, marketImagePath
+
+# 차트 생성 시 함께 만들어지는 축소 변형본 (src/data_processing/image_variants.py)
+VARIANT_DIR = MARKET_DATA_DIR / 'variants'
+VARIANT_MANIFEST = VARIANT_DIR / 'manifest.json'
+
+# 카드에 넣을 변형본 (카카오 이미지는 jpg/png 만 지원. 차트는 팔레트 PNG 가 가장 작다)
+CARD_IMAGE_FORMAT = os.getenv("CARD_IMAGE_FORMAT", "png")
+CARD_IMAGE_WIDTH = int(os.getenv("CARD_IMAGE_WIDTH", "1080"))
+
+# 내용 해시가 파일명에 들어간 변형본은 절대 바뀌지 않으므로 1년 동안 캐시
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 같은 이름으로 다시 저장될 수 있는 원본은 매번 ETag 로 확인
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+class CachedStaticFiles(StaticFiles):
+    """Cache-Control 헤더를 붙여서 내보내는 StaticFiles (ETag/304 처리는 StaticFiles 가 담당)"""
+
+    def __init__(self, *args, cache_control: str = REVALIDATE_CACHE_CONTROL, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = self.cache_control
+        return response
+
+
+class VariantManifest:
+    """manifest.json 을 파일이 바뀔 때만 다시 읽는 조회기"""
+
+    def __init__(self, path=VARIANT_MANIFEST, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries: Dict = {}
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = fileSignature(self.path)
+            if signature == self._signature:
+                return
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            self._signature = signature
+
+    def find(self, filename: str, fmt: str = CARD_IMAGE_FORMAT, width: int = CARD_IMAGE_WIDTH) -> Optional[str]:
+        """원하는 폭 이하 중 가장 큰 변형본 파일명. 변형본이 없으면 None"""
+        self._refresh()
+        entry = self._entries.get(filename)
+        if not entry:
+            return None
+        widths = sorted((int(w) for w, files in entry['variants'].items() if fmt in files), reverse=True)
+        if not widths:
+            return None
+        chosen = next((w for w in widths if w <= width), widths[-1])
+        return entry['variants'][str(chosen)][fmt]['file']
+
+
+variant_manifest = VariantManifest()
+
+
+def marketImageUrl(base_url: str, name: str) -> str:
+    """카드에 넣을 오늘 날짜 차트 주소. 변형본이 있으면 해시가 붙은 주소, 없으면 원본 주소"""
+    root = base_url.replace("chat/", "")
+    filename = marketImagePath(name).name
+    variant = variant_manifest.find(filename)
+    if variant:
+        return f"{root}data/images/variants/{variant}"
+    return f"{root}data/images/market_data/{filename}"
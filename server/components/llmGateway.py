@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import httpx
+from pydantic import PrivateAttr
+from langchain_groq import ChatGroq
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"  # llama-3.1-70b-versatile / llama-3.1-8b-instant
+
+
+def parseLatency(spec: str):
+    """지연 시간 분포 문자열을 샘플링 함수로 변환
+
+    "0.5" (고정), "uniform:0.2,1.5", "lognormal:mu,sigma", "exp:평균" 형식을 지원한다.
+    """
+    if not spec:
+        return lambda rng: 0.0
+    kind, _, params = spec.partition(":")
+    if not params:
+        value = float(kind)
+        return lambda rng: value
+    args = [float(x) for x in params.split(",")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(args[0], args[1])
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / args[0])
+    raise ValueError(f"지원하지 않는 지연 분포입니다: {spec}")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # keep-alive 를 지원해야 연결 재사용 여부를 측정할 수 있다
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stub.record_connection()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        stub = self.server.stub
+        time.sleep(stub.sample_latency())
+        model = body.get("model", "")
+        content = stub.answer(model, body.get("messages", []))
+        if body.get("stream"):
+            self._stream(model, content, stub.token_delay)
+            return
+        payload = json.dumps({
+            "id": "stub-" + hashlib.sha1(content.encode()).hexdigest()[:12],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": 0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, model, content, token_delay):
+        # OpenAI 호환 SSE 스트림을 chunked 인코딩으로 전송
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        tokens = [word + " " for word in content.split(" ")]
+        for i, token in enumerate(tokens):
+            last = i == len(tokens) - 1
+            chunk = {
+                "id": "stub-stream", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"role": "assistant", "content": token.rstrip() if last else token},
+                             "finish_reason": "stop" if last else None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            if token_delay and not last:
+                time.sleep(token_delay)
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+class StubLLMServer:
+    """Groq(OpenAI 호환) API 를 흉내 내는 로컬 스텁 서버
+
+    같은 입력에는 항상 같은 답을 돌려주므로 오프라인 부하 테스트에 사용한다.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: str = None,
+                 token_delay: float = None, seed: int = 0):
+        """
+        Args:
+            latency: 응답(스트리밍 시 첫 토큰)까지의 지연 분포 (기본값: 환경변수 LLM_STUB_LATENCY, parseLatency 형식)
+            token_delay: 스트리밍 시 토큰 사이 지연(초) (기본값: 환경변수 LLM_STUB_TOKEN_DELAY 또는 0)
+            seed: 지연 시간 샘플링 시드
+        """
+        self.token_delay = token_delay if token_delay is not None else float(os.getenv("LLM_STUB_TOKEN_DELAY", "0"))
+        self._sampler = parseLatency(latency if latency is not None else os.getenv("LLM_STUB_LATENCY", ""))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+        self.httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            self.requests += 1
+            return max(0.0, self._sampler(self._rng))
+
+    def answer(self, model: str, messages) -> str:
+        prompt = messages[-1].get("content", "") if messages else ""
+        digest = hashlib.sha1(f"{model}\n{prompt}".encode()).hexdigest()[:8]
+        return f"[stub {model} {digest}] {prompt[:80]}"
+
+
+class GatedChatGroq(ChatGroq):
+    """모델별 동시 호출 수 제한을 거쳐서 Groq 를 호출하는 ChatGroq"""
+
+    _gateway: Optional["LLMGateway"] = PrivateAttr(default=None)
+
+    def _generate(self, *args, **kwargs):
+        with self._gateway.slot(self.model_name):
+            return super()._generate(*args, **kwargs)
+
+    def _stream(self, *args, **kwargs):
+        # 끝까지 읽지 않고 닫혀도(GeneratorExit, SSE 클라이언트 연결 끊김) 그 자리에서 응답 스트림을 닫고 슬롯을 돌려준다
+        slot = self._gateway.slot(self.model_name)
+        slot.__enter__()
+        stream = super()._stream(*args, **kwargs)
+        try:
+            yield from stream
+        finally:
+            stream.close()
+            slot.__exit__(None, None, None)
+
+
+class LLMGateway:
+    """프로세스 전역 LLM 접근 지점
+
+    모든 핸들러가 같은 httpx 연결 풀과 모델별 ChatGroq 객체를 공유한다.
+    """
+
+    def __init__(self, backend: str = None, timeout: float = None,
+                 max_connections: int = None, concurrency: str = None):
+        """
+        Args:
+            backend: "groq" 또는 "stub" (기본값: 환경변수 LLM_BACKEND 또는 groq)
+            timeout: 요청 타임아웃(초) (기본값: 환경변수 LLM_TIMEOUT 또는 30)
+            max_connections: 연결 풀 크기 (기본값: 환경변수 LLM_MAX_CONNECTIONS 또는 20)
+            concurrency: 모델별 동시 호출 수. "8" 또는 "llama-3.1-8b-instant=8,기본=4" 처럼
+                모델별로 지정 (기본값: 환경변수 LLM_CONCURRENCY 또는 8)
+        """
+        self.backend = backend or os.getenv("LLM_BACKEND", "groq")
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "30"))
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+        self.logger = logging.getLogger(__name__)
+
+        self._default_limit, self._limits = self._parse_concurrency(concurrency or os.getenv("LLM_CONCURRENCY", "8"))
+        self._lock = threading.Lock()
+        self._llms: Dict[tuple, ChatGroq] = {}
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._calls: Dict[str, int] = {}
+        self._http_client = None
+        self._stub = None
+
+    @staticmethod
+    def _parse_concurrency(spec: str):
+        default, limits = 8, {}
+        for item in spec.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            if "=" in item:
+                model, value = item.split("=", 1)
+                limits[model.strip()] = int(value)
+            else:
+                default = int(item)
+        return default, limits
+
+    def _base_url(self) -> Optional[str]:
+        if self.backend != "stub":
+            return None
+        url = os.getenv("LLM_STUB_URL")
+        if url:
+            return url
+        # 외부 스텁 주소가 없으면 프로세스 안에서 스텁 서버를 띄운다
+        if self._stub is None:
+            self._stub = StubLLMServer().start()
+            self.logger.info(f"LLM 스텁 서버 시작: {self._stub.url}")
+        return self._stub.url
+
+    def get_llm(self, model: str = DEFAULT_MODEL, **kwargs) -> ChatGroq:
+        """모델(과 max_tokens 등 옵션)별로 하나씩만 만들어서 재사용하는 ChatGroq 반환"""
+        key = (model, tuple(sorted(kwargs.items())))
+        llm = self._llms.get(key)
+        if llm is not None:
+            return llm
+        with self._lock:
+            llm = self._llms.get(key)
+            if llm is None:
+                if self._http_client is None:
+                    self._http_client = httpx.Client(
+                        limits=httpx.Limits(max_connections=self.max_connections,
+                                            max_keepalive_connections=self.max_connections),
+                        timeout=self.timeout,
+                    )
+                # request_timeout / max_retries 도 kwargs 로 바꿀 수 있다 (빠른 답변용 모델 등)
+                options = dict(model=model, http_client=self._http_client, request_timeout=self.timeout, max_retries=2)
+                options.update(kwargs)
+                base_url = self._base_url()
+                if base_url:
+                    options.update(groq_api_base=base_url, api_key="stub")
+                llm = GatedChatGroq(**options)
+                llm._gateway = self
+                self._llms[key] = llm
+        return llm
+
+    @contextmanager
+    def slot(self, model: str):
+        """모델별 동시 호출 수 제한"""
+        with self._lock:
+            semaphore = self._semaphores.get(model)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._limits.get(model, self._default_limit))
+                self._semaphores[model] = semaphore
+        with semaphore:
+            with self._lock:
+                self._in_flight[model] = self._in_flight.get(model, 0) + 1
+                self._calls[model] = self._calls.get(model, 0) + 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight[model] -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = {
+                'backend': self.backend,
+                'clients': len(self._llms),
+                'in_flight': dict(self._in_flight),
+                'calls': dict(self._calls),
+            }
+        if self._stub is not None:
+            stats['stub_connections'] = self._stub.connections
+            stats['stub_requests'] = self._stub.requests
+        return stats
+
+    def close(self):
+        if self._http_client is not None:
+            self._http_client.close()
+        if self._stub is not None:
+            self._stub.stop()
+
+
+# 프로세스 전역 게이트웨이
+llm_gateway = LLMGateway()
@@ -0,0 +1,224 @@
+import os
+import time
+import math
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Tuple
+
+# 카카오 응답 제한(3.5초) 전후를 세밀하게 볼 수 있도록 잡은 기본 버킷
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _formatLabels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = []
+    for n, v in zip(names, values):
+        escaped = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{n}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _formatValue(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_formatLabels(self.labelnames, key)} {_formatValue(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [버킷별 개수..., 합계, 개수]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for i, bound in enumerate(self.buckets):
+                    cumulative += series[i]
+                    le = f'le="{_formatValue(bound)}"'
+                    lines.append(f"{self.name}_bucket{_formatLabels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_formatLabels(self.labelnames, key)} {_formatValue(series[-2])}")
+                lines.append(f"{self.name}_count{_formatLabels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """렌더링할 때마다 함수를 호출해 값을 읽는 게이지/카운터 (풀, 캐시 통계 등)"""
+
+    def __init__(self, name, help, fn: Callable, labelname: str = None, kind: str = "gauge"):
+        super().__init__(name, help, (labelname,) if labelname else ())
+        self.fn = fn
+        self.kind = kind
+
+    def render(self):
+        lines = self.header()
+        value = self.fn()
+        if isinstance(value, dict):
+            for label, v in sorted(value.items()):
+                if v is not None:
+                    lines.append(f"{self.name}{_formatLabels(self.labelnames, (label,))} {_formatValue(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_formatValue(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보내는 간단한 메트릭 저장소"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, fn, labelname=None, kind="gauge") -> CallbackMetric:
+        with self._lock:
+            # 같은 이름으로 다시 등록하면 최신 함수로 교체 (앱 재생성 시)
+            metric = CallbackMetric(name, help, fn, labelname, kind)
+            self._metrics[name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def processStats(pid="self") -> Dict[str, float]:
+    """프로세스의 스레드 수, RSS, PSS(공유 페이지를 나눠 센 크기), USS(이 프로세스만 쓰는 크기) (바이트)"""
+    stats = {'threads': threading.active_count(), 'rss_bytes': None, 'pss_bytes': None, 'uss_bytes': None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    stats['rss_bytes'] = int(line.split()[1]) * 1024
+                elif line.startswith("Threads:"):
+                    stats['threads'] = int(line.split()[1])
+    except OSError:
+        import resource
+        # macOS 는 바이트, Linux 는 KB 단위 (최대 RSS 로 대체)
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats['rss_bytes'] = maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+        return stats
+    # pre-fork 워커끼리 copy-on-write 로 공유하는 메모리를 보려면 PSS/USS 가 필요
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            private = 0
+            for line in f:
+                if line.startswith("Pss:"):
+                    stats['pss_bytes'] = int(line.split()[1]) * 1024
+                elif line.startswith(("Private_Clean:", "Private_Dirty:")):
+                    private += int(line.split()[1]) * 1024
+            stats['uss_bytes'] = private
+    except OSError:
+        pass
+    return stats
+
+
+# 프로세스 전역 메트릭
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_seconds", "Latency of each pipeline stage (embedding load, FAISS load, query rewrite, retrieval, generation ...)",
+    ["stage"])
+COMMAND_SECONDS = registry.histogram(
+    "chat_command_seconds", "End-to-end latency of each AI_Response command branch", ["command"])
+DEADLINE_TOTAL = registry.counter(
+    "chat_deadline_total", "Kakao /chat/ requests by outcome (sync = answered within the deadline, callback = delivered later)",
+    ["outcome"])
+
+registry.callback("process_threads", "Number of OS threads in this process", lambda: processStats()['threads'])
+registry.callback("process_resident_memory_bytes", "Resident set size of this process", lambda: processStats()['rss_bytes'])
+registry.callback("process_proportional_memory_bytes", "Proportional set size (shared pages divided among sharing processes)",
+                  lambda: processStats()['pss_bytes'])
+registry.callback("process_unique_memory_bytes", "Memory private to this process", lambda: processStats()['uss_bytes'])
+
+
+def stageTimer(stage: str):
+    """with stageTimer("retrieval"): ... 형태로 단계별 지연 시간 기록"""
+    return STAGE_SECONDS.time(stage=stage)
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import glob
+import fcntl
+import logging
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from server.components.cardCache import PROJECT_ROOT, fileSignature
+
+# '오늘의 뉴스' 요청에 사용하는 고정 질문
+NEWS_DIGEST_PROMPT = '주어진 뉴스 기사 중 경제에 관한 기사들을 10개 뽑아서 요약해줘.'
+DIGEST_DIR = PROJECT_ROOT / 'data' / 'digest'
+FAISS_INDEX_FILE = PROJECT_ROOT / 'db' / 'faiss' / 'index.faiss'
+# 날짜별 파티션 모드에서 파이프라인이 쓰기를 마칠 때마다 교체하는 파일
+FAISS_MANIFEST_FILE = PROJECT_ROOT / 'db' / 'faiss' / 'manifest.json'
+# 요약이 아직 한 번도 만들어지지 않았을 때 보내는 안내 (요약은 백그라운드에서 만든다)
+DIGEST_PREPARING_TEXT = "오늘의 뉴스 요약을 준비하고 있어요😘\n잠시 후 다시 '오늘의 뉴스'를 눌러 주세요!"
+# 여러 워커 프로세스가 동시에 요약을 만들지 않도록 잡는 잠금 파일
+BUILD_LOCK_FILE = '.build.lock'
+
+
+def indexVersion() -> Optional[str]:
+    """현재 뉴스 벡터 인덱스 버전 (manifest.json, 없으면 index.faiss 의 inode-mtime-size)"""
+    signature = fileSignature(FAISS_MANIFEST_FILE) or fileSignature(FAISS_INDEX_FILE)
+    return "-".join(str(x) for x in signature) if signature else None
+
+
+def _writeJsonAtomic(path, data: Dict):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def buildDigest(digest_dir=DIGEST_DIR) -> Dict:
+    """뉴스 인덱스로 오늘의 뉴스 요약을 만들고 버전이 붙은 파일로 저장"""
+    from server.components.summerize.retrivial_from_vector_space import getResponseBasedVectorSpace
+
+    os.makedirs(digest_dir, exist_ok=True)
+    index_version = indexVersion()
+    started = time.time()
+    # 오늘 파티션의 뉴스만 요약 (아직 오늘 데이터가 없으면 가장 최근 파티션)
+    text = getResponseBasedVectorSpace(NEWS_DIGEST_PROMPT, window=(date.today(), date.today()))
+
+    today = datetime.now().strftime('%Y%m%d')
+    existing = glob.glob(os.path.join(digest_dir, f"news_digest_{today}_v*.json"))
+    version = 1 + max([int(p.rsplit('_v', 1)[1].split('.')[0]) for p in existing] or [0])
+    digest = {
+        'date': today,
+        'version': version,
+        'created_at': datetime.now().isoformat(),
+        'build_seconds': round(time.time() - started, 2),
+        'index_version': index_version,
+        'prompt': NEWS_DIGEST_PROMPT,
+        'text': text,
+    }
+    path = os.path.join(digest_dir, f"news_digest_{today}_v{version}.json")
+    _writeJsonAtomic(path, digest)
+    # latest.json 은 항상 완성된 최신 버전만 가리킨다
+    _writeJsonAtomic(os.path.join(digest_dir, 'latest.json'), digest)
+    logging.getLogger(__name__).info(f"오늘의 뉴스 요약 저장 완료: {path}")
+    return digest
+
+
+class DigestStore:
+    """미리 만들어 둔 '오늘의 뉴스' 요약을 제공하고, 인덱스가 바뀌면 백그라운드에서 다시 만든다"""
+
+    def __init__(self, digest_dir=DIGEST_DIR, check_interval: float = 1.0):
+        self.digest_dir = digest_dir
+        self.latest_path = os.path.join(digest_dir, 'latest.json')
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._digest = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.served = 0
+        self.refreshes = 0
+
+    def latest(self, force: bool = False) -> Optional[Dict]:
+        """저장된 최신 요약 (파일이 바뀌었을 때만 다시 읽음)"""
+        now = time.monotonic()
+        if force or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            signature = fileSignature(self.latest_path)
+            if signature != self._signature:
+                try:
+                    with open(self.latest_path, encoding='utf-8') as f:
+                        self._digest = json.load(f)
+                except (OSError, ValueError):
+                    self._digest = None
+                self._signature = signature
+        return self._digest
+
+    def isStale(self, digest: Optional[Dict]) -> bool:
+        """요약이 없거나, 다른 날짜이거나, 이후에 인덱스가 다시 만들어졌는지"""
+        if digest is None:
+            return True
+        return digest.get('date') != datetime.now().strftime('%Y%m%d') or digest.get('index_version') != indexVersion()
+
+    def refreshInBackground(self) -> Optional[threading.Thread]:
+        """
+        이미 갱신 중이 아니면 백그라운드 스레드에서 요약을 다시 만든다 (시작한 스레드, 아니면 None)
+
+        프로세스 안에서는 플래그로, pre-fork 워커끼리는 digest_dir 의 잠금 파일로 한 번만 만든다.
+        """
+        with self._lock:
+            if self._refreshing:
+                return None
+            self._refreshing = True
+
+        def run():
+            try:
+                os.makedirs(self.digest_dir, exist_ok=True)
+                with open(os.path.join(self.digest_dir, BUILD_LOCK_FILE), 'w') as lock:
+                    try:
+                        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # 다른 워커가 만들고 있으면 그 결과(latest.json)를 읽는다
+                        return
+                    if not self.isStale(self.latest(force=True)):
+                        return
+                    buildDigest(self.digest_dir)
+                self.refreshes += 1
+                self._checked_at = 0.0
+            except Exception:
+                self.logger.exception("오늘의 뉴스 요약 갱신 실패")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        thread = threading.Thread(target=run, name="news-digest-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self) -> Optional[str]:
+        """
+        '오늘의 뉴스' 응답 텍스트. 저장된 요약이 있으면 바로 돌려준다
+
+        요약이 낡았으면 저장된 요약을 돌려주면서 백그라운드에서 다시 만들고,
+        한 번도 만들어지지 않았으면 요청 스레드에서 만들지 않고 None 을 돌려준다 (DIGEST_PREPARING_TEXT 로 안내).
+        """
+        digest = self.latest()
+        if self.isStale(digest):
+            self.refreshInBackground()
+        if digest is None:
+            return None
+        self.served += 1
+        return digest['text']
+
+
+if __name__ == "__main__":
+    # 프로젝트 루트에서 python -m server.components.newsDigest 로 실행 (일일 파이프라인은 server/scheduler/buildNewsDigest.py)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    os.chdir(PROJECT_ROOT)
+    result = buildDigest()
+    print(f"오늘의 뉴스 요약 v{result['version']} 생성 완료 ({result['build_seconds']}초)")
@@ -0,0 +1,163 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain.retrievers.multi_query import DEFAULT_QUERY_PROMPT, LineListOutputParser
+
+from server.components.metrics import stageTimer
+from src.vector_store import batched_search, embed_queries, lookup_symbols, normalize_text
+# 별칭 표는 어휘 검색의 종목 사전과 같이 쓴다
+from src.vector_store.lexical import ALIAS_GROUPS, HYBRID_SEARCH
+
+
+class QueryExpander:
+    """
+    검색 전 질문 확장
+
+    mode
+        llm   : MultiQueryRetriever 와 같은 프롬프트로 LLM 이 질문을 3개로 바꿔 쓴다 (결과는 캐시)
+        local : LLM 없이 캐시된 재작성 결과, 별칭 표, 임베딩 공간 이웃으로 확장
+        none  : 원래 질문 하나로만 검색
+    """
+
+    def __init__(self, mode: str = None, cache_size: int = 1024, max_alias_queries: int = 3,
+                 neighbor_docs: int = 3, neighbor_weight: float = 0.5, cache_path: str = None):
+        """
+        Args:
+            mode: llm / local / none (기본값: 환경변수 QUERY_EXPANSION 또는 llm)
+            cache_size: 질문별 LLM 재작성 결과를 보관할 개수
+            max_alias_queries: 별칭으로 만들 추가 질문 수
+            neighbor_docs: 임베딩 이웃 확장에 쓸 상위 문서 수 (0 이면 사용 안 함)
+            neighbor_weight: 이웃 문서 평균 벡터를 질문 벡터에 더할 비율
+            cache_path: 재작성 결과를 저장할 JSON 파일 (기본값: 환경변수 QUERY_REWRITE_CACHE, 없으면 메모리만 사용)
+        """
+        self.mode = (mode or os.getenv("QUERY_EXPANSION", "llm")).lower()
+        if self.mode not in ("llm", "local", "none"):
+            raise ValueError(f"알 수 없는 QUERY_EXPANSION 값: {self.mode}")
+        self.cache_size = cache_size
+        self.max_alias_queries = max_alias_queries
+        self.neighbor_docs = neighbor_docs
+        self.neighbor_weight = neighbor_weight
+
+        self._lock = threading.Lock()
+        self._rewrites: OrderedDict = OrderedDict()
+        self.cache_path = cache_path or os.getenv("QUERY_REWRITE_CACHE")
+        if self.cache_path:
+            try:
+                with open(self.cache_path, encoding='utf-8') as f:
+                    self._rewrites.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        self._aliases = [(group, [normalize_text(a) for a in group]) for group in ALIAS_GROUPS]
+        self.rewrite_hits = 0
+        self.llm_calls = 0
+        self.symbol_lookups = 0
+
+    def cachedRewrites(self, question: str) -> Optional[List[str]]:
+        key = normalize_text(question)
+        with self._lock:
+            queries = self._rewrites.get(key)
+            if queries is not None:
+                self._rewrites.move_to_end(key)
+                self.rewrite_hits += 1
+            return queries
+
+    def rememberRewrites(self, question: str, queries: List[str]):
+        with self._lock:
+            self._rewrites[normalize_text(question)] = list(queries)
+            while len(self._rewrites) > self.cache_size:
+                self._rewrites.popitem(last=False)
+            if self.cache_path:
+                # local 모드 워커나 재시작 후에도 LLM 재작성 결과를 쓸 수 있도록 저장
+                tmp_path = f"{self.cache_path}.tmp{os.getpid()}"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._rewrites, f, ensure_ascii=False)
+                os.replace(tmp_path, self.cache_path)
+
+    def llmRewrites(self, question: str, llm) -> List[str]:
+        """LLM 으로 질문 재작성 (같은 질문은 캐시된 결과 사용)"""
+        queries = self.cachedRewrites(question)
+        if queries is None:
+            self.llm_calls += 1
+            queries = (DEFAULT_QUERY_PROMPT | llm | LineListOutputParser()).invoke({"question": question})
+            self.rememberRewrites(question, queries)
+        return queries
+
+    def aliasQueries(self, question: str) -> List[str]:
+        """질문에 나온 종목/지표 이름을 다른 별칭(영문명, 티커)으로 바꾼 질문들"""
+        normalized = normalize_text(question)
+        queries = []
+        for group, lowered in self._aliases:
+            matched = next((i for i, alias in enumerate(lowered) if alias in normalized), None)
+            if matched is None:
+                continue
+            start = normalized.index(lowered[matched])
+            for i, alias in enumerate(group):
+                if i != matched:
+                    queries.append(normalized[:start] + alias + normalized[start + len(lowered[matched]):])
+            # 별칭을 모두 이어 붙인 질문 하나 (짧은 시장 데이터 문서와 잘 맞는다)
+            queries.append(" ".join(group))
+        return queries[:self.max_alias_queries]
+
+    def neighborVector(self, query_vector: np.ndarray, vector_store) -> Optional[np.ndarray]:
+        """질문 벡터에 가까운 문서들의 평균 벡터를 더한 확장 벡터 (임베딩 공간 이웃)"""
+        index = vector_store.index
+        if self.neighbor_docs <= 0 or index.ntotal == 0:
+            return None
+        _, positions = index.search(query_vector.reshape(1, -1), min(self.neighbor_docs, index.ntotal))
+        positions = [int(p) for p in positions[0] if p >= 0]
+        if not positions:
+            return None
+        centroid = np.mean([index.reconstruct(p) for p in positions], axis=0)
+        expanded = query_vector + self.neighbor_weight * centroid
+        norm = np.linalg.norm(expanded)
+        return (expanded / norm).astype(np.float32) if norm > 0 else None
+
+    def expand(self, question: str, llm=None) -> List[str]:
+        """검색할 질문 목록"""
+        if self.mode == "none":
+            return [question]
+        if self.mode == "llm":
+            return self.llmRewrites(question, llm)
+        # 예전에 LLM 이 바꿔 쓴 결과가 있으면 그대로 쓰고, 없으면 별칭으로 확장
+        cached = self.cachedRewrites(question)
+        return [question] + (cached if cached is not None else self.aliasQueries(question))
+
+    def retrieve(self, question: str, vector_store, llm=None, k: int = 4) -> List:
+        """
+        질문을 확장해서 검색한 문서들 (청크 중복 제거, RRF 순)
+
+        티커/종목 이름만 묻는 질문("NVDA 주가")은 질문 확장과 임베딩 없이 종목 사전에서 바로 찾는다.
+        """
+        if HYBRID_SEARCH:
+            with stageTimer("symbol_lookup"):
+                docs = lookup_symbols(vector_store, question, limit=k)
+            if docs:
+                self.symbol_lookups += 1
+                return docs
+        with stageTimer("query_rewrite"):
+            queries = self.expand(question, llm)
+        with stageTimer("retrieval"):
+            if self.mode != "local":
+                return batched_search(vector_store, queries, k=k)
+            # 원래 질문과 별칭 질문을 한 번에 임베딩하고, 원래 질문 벡터로 이웃 확장 벡터를 만든다
+            vectors = embed_queries(vector_store.embeddings, queries)
+            neighbor = self.neighborVector(vectors[0], vector_store)
+            if neighbor is not None:
+                vectors = np.vstack([vectors[:1], neighbor[None, :], vectors[1:]])
+            return batched_search(vector_store, queries, k=k, vectors=vectors)
+
+    def stats(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'cached_rewrites': len(self._rewrites),
+            'rewrite_hits': self.rewrite_hits,
+            'llm_calls': self.llm_calls,
+            'symbol_lookups': self.symbol_lookups,
+        }
+
+
+query_expander = QueryExpander()
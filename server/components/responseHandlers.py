@@ -1,4 +1,7 @@
-from server.components.summerize.retrivial_from_vector_space import getResponseBasedVectorSpace
+from server.components.summerize.retrivial_from_vector_space import getResponseBasedVectorSpace, streamResponseBasedVectorSpace
+from server.components.stateStore import ConversationStateStore
+from server.components.cardCache import CardSnapshotCache, FEAR_GREED_CSV, marketImagePath, readLastCsvValue
+from server.components.imageVariants import VARIANT_MANIFEST, marketImageUrl
 import time
 from langchain_community.document_loaders import WebBaseLoader
 from langchain.chains.summarize import load_summarize_chain
@@ -6,20 +9,34 @@ from langchain.prompts import PromptTemplate
 from langchain.text_splitter import CharacterTextSplitter
 import dotenv
 import os
-from langchain_groq import ChatGroq
+from langchain_core.output_parsers import StrOutputParser
+from server.components.llmGateway import llm_gateway
+from server.components.semanticCache import SemanticAnswerCache
+from server.components.newsDigest import DIGEST_PREPARING_TEXT, DigestStore, indexVersion
+from server.components.singleFlight import SingleFlight
+from src.vector_store import normalize_text
+from server.components.metrics import COMMAND_SECONDS, stageTimer
 from langchain.docstore.document import Document # 텍스트를 document 객체로 변환
 from fastapi import Request
-from langchain.chains import LLMChain
-import pandas as pd
 from datetime import date, datetime
 import json
 
 
 
-# 텍스트 파일 초기화
-def dbReset(filename):
-    with open(filename, 'w') as f:
-        f.write("")
+# 사용자별 마지막 답변 저장소 ('생각 다 끝났나요?' 후속 질문용)
+conversation_store = ConversationStateStore()
+
+# 비슷한 자유 질문에 대한 답변 캐시 (일일 데이터 갱신 시 만료)
+answer_cache = SemanticAnswerCache()
+
+# 미리 만들어 둔 '오늘의 뉴스' 요약 (뉴스 인덱스가 다시 만들어지면 백그라운드에서 갱신)
+news_digest = DigestStore()
+
+# 동시에 들어온 같은 요청은 한 번만 계산 (8시 푸시 직후 몰리는 Dashboard, 오늘의 뉴스 등)
+single_flight = SingleFlight()
+
+def getUserId(request):
+    return request["userRequest"].get("user", {}).get("id", "anonymous")
 
 
 # 메시지 응답 포맷
@@ -36,78 +53,169 @@ def imageResponseFormat(bot_response, prompt):
     return response
 
 
+# 서버 과부하 응답 포맷 (같은 발화로 다시 보내는 바로가기 버튼 포함)
+def overloadResponseFormat(utterance):
+    text = "지금 질문이 너무 많이 몰려서 답변을 드릴 수 없어요😢\n잠시 후 다시 시도해 주세요!"
+    response = {"version":"2.0", "template":{"outputs":[{"simpleText":{"text":text}}],
+                "quickReplies":[{"label":"다시 시도", "action":"message", "messageText":utterance}]}}
+    return response
+
+def errorResponseFormat(utterance):
+    text = "답변을 만드는 중 문제가 생겼어요😢\n잠시 후 다시 시도해 주세요!"
+    response = {"version":"2.0", "template":{"outputs":[{"simpleText":{"text":text}}],
+                "quickReplies":[{"label":"다시 시도", "action":"message", "messageText":utterance}]}}
+    return response
+
+
+# 발화 -> 명령 종류 (AI_Response 분기 순서와 동일하게 판별)
+def classifyCommand(utterance):
+    if '생각 다 끝났나요?' in utterance:
+        return "followup"
+    elif '상관관계' == utterance:
+        return "correlation"
+    elif '/v' in utterance:
+        return "v"
+    elif '오늘의 뉴스' == utterance:
+        return "news"
+    elif 'Fear & Greed' in utterance:
+        return "fear_greed"
+    elif 'Dashboard' == utterance:
+        return "dashboard"
+    elif '주요 종목' == utterance:
+        return "index"
+    elif '/s' in utterance:
+        return "s"
+    # 기본값을 LLAMA 답변으로 설정
+    return "ask"
+
+
+def recordStream(chunks, user_id, kind, prompt, on_complete=None):
+    # 스트림을 그대로 흘려보내면서 끝나면 전체 답변을 사용자별 저장소에 기록
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+    finally:
+        # 중간에 닫히면 안쪽 LLM 스트림도 바로 닫는다
+        if hasattr(chunks, "close"):
+            chunks.close()
+    bot_res = "".join(parts)
+    conversation_store.put(user_id, {"kind": kind, "text": bot_res, "prompt": prompt})
+    if on_complete is not None:
+        on_complete(bot_res)
+
+
+# 텍스트 답변 명령(/v, /s, 일반 질문)의 스트리밍 핸들러
+def streamAIResponse(request):
+    # 토큰 단위로 전달할 수 있는 명령이면 문자열 조각의 iterator, 아니면 None 을 반환한다
+    utterance = request["userRequest"]["utterance"]
+    user_id = getUserId(request)
+    kind = classifyCommand(utterance)
+
+    if kind == "v":
+        prompt = utterance.replace("/v", "")
+        return recordStream(streamResponseBasedVectorSpace(prompt), user_id, kind, prompt)
+
+    elif kind == "s":
+        prompt = utterance.replace("/s", "")
+        return recordStream(streamSearchResponse_LLAMA(prompt), user_id, kind, prompt)
+
+    # 일반 LLM 답변을 요청한 경우
+    #elif '/ask' in request["userRequest"]["utterance"]:
+    elif kind == "ask":
+        prompt = utterance#.replace("/ask", "")
+        # 비슷한 질문에 대한 답변이 캐시에 있으면 LLM 호출 생략
+        with stageTimer("semantic_cache_lookup"):
+            bot_res, question_vector = answer_cache.lookup(prompt)
+        if bot_res is not None:
+            return recordStream(iter([bot_res]), user_id, kind, prompt)
+        return recordStream(streamTextFromLLAMA(prompt), user_id, kind, prompt,
+                            on_complete=lambda text: answer_cache.store(prompt, text, question_vector))
+    return None
+
 
 # 메시지 응답 핸들러
-def AI_Response(request, response_queue, filename):
+def AI_Response(request):
+    # 완성된 응답(dict)을 반환한다. 돌려줄 응답이 없으면 None
     print(json.dumps(request, indent=2))
+    user_id = getUserId(request)
+    kind = classifyCommand(request["userRequest"]["utterance"])
+    # 명령 분기별 전체 처리 시간 기록
+    with COMMAND_SECONDS.time(command=kind):
+        key = flightKey(request, kind)
+        if key is None:
+            return _dispatch(request, kind, user_id)
+        response, shared = single_flight.do(key, _dispatch, request, kind, user_id, label=kind)
+        if shared:
+            shareUserState(request, kind, user_id, response)
+        return response
+
+def flightKey(request, kind):
+    # 정규화한 발화 + 데이터 버전 + 이미지 주소가 같으면 같은 응답이 나온다
+    if kind == "followup":
+        return None
+    version = indexVersion() if kind in ("v", "news") else date.today().isoformat()
+    return (kind, normalize_text(request["userRequest"]["utterance"]), version, request.get("base_url"))
+
+def shareUserState(request, kind, user_id, response):
+    # 다른 요청의 결과를 받아 간 사용자에게도 직접 실행했을 때와 같은 상태를 남긴다
+    if kind in ("v", "s", "ask", "news"):
+        if response is None:
+            return
+        state = {"kind": kind, "text": response["template"]["outputs"][0]["simpleText"]["text"]}
+        if state["text"] == DIGEST_PREPARING_TEXT:
+            conversation_store.clear(user_id)
+            return
+        if kind != "news":
+            state["prompt"] = request["userRequest"]["utterance"].replace(f"/{kind}", "")
+        conversation_store.put(user_id, state)
+    else:
+        conversation_store.clear(user_id)
+
+def _dispatch(request, kind, user_id):
+    response = None
+    # 텍스트 답변 명령은 스트리밍 핸들러의 결과를 모아서 한 번에 응답
+    chunks = streamAIResponse(request)
+    if chunks is not None:
+        response = textResponseFormat("".join(chunks))
+
     # 사용자가 버튼을 클릭하여 답변 완성 여부를 다시 봤을 시
-    if '생각 다 끝났나요?' in request["userRequest"]["utterance"]:
-        # 텍스트 파일 열기
-        with open(filename) as f:
-            last_update = f.read()
-        # 텍스트 파일 내 저장된 정보가 있을 경우
-        if len(last_update.split()) > 1:
-            kind, bot_res, prompt = last_update.split()[0], last_update.split()[1], last_update.split()[2]
-            response_queue.put(textResponseFormat(last_update))
-            dbReset(filename)
+    elif kind == "followup":
+        # 해당 사용자에게 저장된 정보가 있을 경우
+        last_update = conversation_store.pop(user_id)
+        if last_update:
+            response = textResponseFormat(last_update["text"])
 
     # 오늘의 정보 요청
 
-    elif '상관관계' == request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        prompt = request["userRequest"]["utterance"].replace("/get", "")
-        response_queue.put(getCorrelationMatrix(request))
-
-    elif '/v' in request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        prompt = request["userRequest"]["utterance"].replace("/v", "")
-        bot_res = getResponseBasedVectorSpace(prompt)
-        response_queue.put(textResponseFormat(bot_res))
-        save_log = str(bot_res)
-        with open(filename, 'w') as f:
-            f.write(save_log)
-
-    elif '오늘의 뉴스' == request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        bot_res = getResponseBasedVectorSpace('주어진 뉴스 기사 중 경제에 관한 기사들을 10개 뽑아서 요약해줘.')
-        response_queue.put(textResponseFormat(bot_res))
-        save_log = str(bot_res)
-        with open(filename, 'w') as f:
-            f.write(save_log)
-
-    elif 'Fear & Greed' in request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        response_queue.put(getFearandGreed(request))
-
-    elif 'Dashboard' == request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        response_queue.put(getDashboard(request))
-
-    elif '주요 종목' == request["userRequest"]["utterance"]: 
-        dbReset(filename)
-        response_queue.put(getIndex(request))
-    
-    elif '/s' in request["userRequest"]["utterance"]:
-        dbReset(filename)
-        prompt = request["userRequest"]["utterance"].replace("/s", "")
-        bot_res = getSearchResponse_LLAMA(prompt)
-        response_queue.put(textResponseFormat(bot_res))
-        save_log = str(bot_res)
-        with open(filename, 'w') as f:
-            f.write(save_log)
-    # 일반 LLM 답변을 요청한 경우
-    #elif '/ask' in request["userRequest"]["utterance"]:
-    # 기본값을 LLAMA 답변으로 설정
-    else:
-        #print(json.dumps(request, indent=2))
-        dbReset(filename)
-        prompt = request["userRequest"]["utterance"]#.replace("/ask", "")
-        bot_res = getTextFromLLAMA(prompt)#getTextFromLLAMA(prompt)
-        response_queue.put(textResponseFormat(bot_res))
-
-        save_log = "ask" + " " + str(bot_res) + " " + str(prompt)
-        with open(filename, 'w') as f:
-            f.write(save_log)
+    elif kind == "correlation":
+        conversation_store.clear(user_id)
+        response = getCorrelationMatrix(request)
+
+    elif kind == "news":
+        # 일일 파이프라인이 미리 만들어 둔 요약을 바로 사용
+        with stageTimer("news_digest"):
+            bot_res = news_digest.get()
+        if bot_res is None:
+            # 첫 요약은 백그라운드에서 만드는 중
+            response = textResponseFormat(DIGEST_PREPARING_TEXT)
+            conversation_store.clear(user_id)
+        else:
+            response = textResponseFormat(bot_res)
+            conversation_store.put(user_id, {"kind": "news", "text": str(bot_res)})
+
+    elif kind == "fear_greed":
+        conversation_store.clear(user_id)
+        response = getFearandGreed(request)
+
+    elif kind == "dashboard":
+        conversation_store.clear(user_id)
+        response = getDashboard(request)
+
+    elif kind == "index":
+        conversation_store.clear(user_id)
+        response = getIndex(request)
     # 아무 답변 요청이 없는 채팅일 경우
     # else:
     #     # 기본 response 값
@@ -124,15 +232,21 @@ def AI_Response(request, response_queue, filename):
     #                             ]
     #                         }
     #                         }
-    #     response_queue.put(textResponseFormat(defaultText))
+    #     response = textResponseFormat(defaultText)
+    return response
+
 
+ask_prompt = PromptTemplate(input_variables=['text'], template="You are an participatnt in 1:1 dialogue. Response about quesition. : {text}.")
+
+def streamTextFromLLAMA(prompt):
+    # ChatGroq 객체와 연결 풀은 llm_gateway 가 재사용한다
+    chain = ask_prompt | llm_gateway.get_llm() | StrOutputParser()
+    with stageTimer("ask_generation"):
+        yield from chain.stream({'text':prompt})
 
 def getTextFromLLAMA(prompt):
-    llm = ChatGroq(model="llama-3.1-8b-instant")#llama-3.1-70b-versatile / llama-3.1-8b-instant
-    combine_prompt = PromptTemplate(input_variables=['text'], template="You are an participatnt in 1:1 dialogue. Response about quesition. : {text}.")
-    chain = LLMChain(llm=llm, prompt=combine_prompt, verbose=True)
-    response = chain.invoke({'text':prompt})
-    return response['text']
+    # 스트리밍 결과를 모아서 한 번에 반환 (카카오 콜백용)
+    return "".join(streamTextFromLLAMA(prompt))
 
 
 
@@ -153,8 +267,8 @@ def getSummeryFromLLM(text):
     prompt = PromptTemplate(template=template, input_variables=['text'])
     combine_prompt = PromptTemplate(template=combine_template, input_variables=['text'])
 
-    # LLM 객체 생성
-    llm = ChatGroq(model="llama-3.1-8b-instant")#llama-3.1-70b-versatile")
+    # LLM 객체 (게이트웨이에서 공유)
+    llm = llm_gateway.get_llm()
     #llm = ChatOpenAI(temperature=0, model_name='gpt-3.5-turbo-16k')
 
     # 요약을 도와주는 load_summarize_chain
@@ -174,6 +288,9 @@ import re
 # performs DuckDuckGo search, urls are extracted and status checked
 # 
 def ddg_search(query):
+    # 오프라인 부하 테스트에서는 인터넷 검색 대신 고정된 결과 사용 (SEARCH_BACKEND=stub)
+    if os.getenv("SEARCH_BACKEND") == "stub":
+        return [truncate(f"{query} 관련 검색 결과 {i}: 시장 지수와 금리, 주요 기업 실적에 관한 요약입니다.") for i in range(3)]
     results = DDGS().text(query, max_results=5, backend='api', timelimit='w')
     urls = []
     for result in results:
@@ -206,46 +323,58 @@ def truncate(text):
 
     return truncated
 
-def getSearchResponse_LLAMA(query):
+# Prompt template
+search_prompt = PromptTemplate(
+    input_variables=['text', 'search_results'],
+    template="You are a participant in a 1:1 dialogue. Respond to the question using the search results. "
+             "Question: {text}\n"
+             "Search Results: {search_results}\n"
+             "Answer:"
+)
+
+def streamSearchResponse_LLAMA(query):
     try:
-        search_results = ddg_search(query)
+        with stageTimer("web_search"):
+            search_results = ddg_search(query)
     except Exception as e:
-        return "검색 사용량 제한 한도에 도달했습니다."
+        yield "검색 사용량 제한 한도에 도달했습니다."
+        return
     if not search_results:
-        return "No search results found or an error occurred."
-
-    # LLM initialization
-    llm = ChatGroq(model="llama-3.1-8b-instant")  # Ensure this model exists and is configured
-
-    # Prompt template
-    combine_prompt = PromptTemplate(
-        input_variables=['text', 'search_results'],
-        template="You are a participant in a 1:1 dialogue. Respond to the question using the search results. "
-                 "Question: {text}\n"
-                 "Search Results: {search_results}\n"
-                 "Answer:"
-    )
-
-    # Chain setup
-    chain = LLMChain(llm=llm, prompt=combine_prompt, verbose=True)
+        yield "No search results found or an error occurred."
+        return
+
+    # Chain setup (LLM is shared through the gateway)
+    chain = search_prompt | llm_gateway.get_llm() | StrOutputParser()
     try:
-        response = chain.invoke({'text': query, 'search_results': "\n".join(search_results)})
-        return response['text']
+        with stageTimer("search_generation"):
+            yield from chain.stream({'text': query, 'search_results': "\n".join(search_results)})
     except Exception as e:
         print(f"Error during LLM invocation: {e}")
-        return "An error occurred while generating the response."
+        yield "An error occurred while generating the response."
+
+def getSearchResponse_LLAMA(query):
+    return "".join(streamSearchResponse_LLAMA(query))
 
 
 # 정보 보내주는 함수들
+# 카드 응답은 CSV/PNG 파일이 바뀔 때만 다시 만든다
+card_cache = CardSnapshotCache()
+
 def getFearandGreed(request: Request):
-    # CSV 파일 경로
-    file_path = "/Users/admin/Documents/OSS_TermProject/data/raw/fear_greed_index.csv"
-    df = pd.read_csv(file_path)
+    base_url = request["base_url"]
+    return card_cache.get(("fear_greed", base_url),
+                          lambda: [FEAR_GREED_CSV, marketImagePath("half_circle_gauge"), VARIANT_MANIFEST],
+                          lambda: buildFearandGreed(base_url))
 
+def buildFearandGreed(base_url):
     # 마지막 행의 마지막 열 값 읽기
-    score = round(float(df.iloc[-1, -1]))
-    base_url = request["base_url"]
-    fear_greed_image_url = f"{base_url.replace("chat/", "")}data/images/market_data/half_circle_gauge_{datetime.now().strftime("%Y%m%d")}.png" 
+    score = readLastCsvValue(FEAR_GREED_CSV)
+    if score is None:
+        # 숫자로 읽히는 행이 없으면(파일 손상 등) 지수 없이 안내만 보낸다 (CSV 가 바뀌면 다시 만든다)
+        print(f"Fear & Greed 지수를 읽지 못했습니다: {FEAR_GREED_CSV}")
+        return textResponseFormat("Fear & Greed 지수를 불러오지 못했어요😢\n잠시 후 다시 시도해 주세요!")
+    score = round(score)
+    fear_greed_image_url = marketImageUrl(base_url, "half_circle_gauge")
     cor_image_url = f"{base_url.replace("chat/", "")}data/images/market_data/correlation_matrix_20241208_022323.png"
     # 오늘 날짜 가져오기
     today = date.today()
@@ -273,8 +402,13 @@ def getFearandGreed(request: Request):
 
 def getDashboard(request : Request):
     base_url = request["base_url"]
-    dashboard_image_url = f"{base_url.replace("chat/", "")}data/images/market_data/dashboard_{datetime.now().strftime("%Y%m%d")}.png"
-    index_image_url = f"{base_url.replace("chat/", "")}data/images/market_data/table_주요지수_{datetime.now().strftime("%Y%m%d")}.png"
+    return card_cache.get(("dashboard", base_url),
+                          lambda: [marketImagePath("dashboard"), marketImagePath("table_주요지수"), VARIANT_MANIFEST],
+                          lambda: buildDashboard(base_url))
+
+def buildDashboard(base_url):
+    dashboard_image_url = marketImageUrl(base_url, "dashboard")
+    index_image_url = marketImageUrl(base_url, "table_주요지수")
     response = {
     "version": "2.0",
     "template": {
@@ -293,9 +427,14 @@ def getDashboard(request : Request):
 
 def getIndex(request : Request):
     base_url = request["base_url"]
-    index_url_1 = f"{base_url.replace("chat/", "")}data/images/market_data/table_기술주_{datetime.now().strftime("%Y%m%d")}.png"
-    index_url_2 = f"{base_url.replace("chat/", "")}data/images/market_data/table_원자재_{datetime.now().strftime("%Y%m%d")}.png"
-    index_url_3 = f"{base_url.replace("chat/", "")}data/images/market_data/table_국채수익률_{datetime.now().strftime("%Y%m%d")}.png"
+    return card_cache.get(("index", base_url),
+                          lambda: [marketImagePath(f"table_{name}") for name in ("기술주", "원자재", "국채수익률")] + [VARIANT_MANIFEST],
+                          lambda: buildIndex(base_url))
+
+def buildIndex(base_url):
+    index_url_1 = marketImageUrl(base_url, "table_기술주")
+    index_url_2 = marketImageUrl(base_url, "table_원자재")
+    index_url_3 = marketImageUrl(base_url, "table_국채수익률")
     response = {
     "version": "2.0",
     "template": {
@@ -318,7 +457,12 @@ def getIndex(request : Request):
 def getCorrelationMatrix(request : Request):
     # 클라이언트 요청의 호스트 URL 가져오기
     base_url = request["base_url"]
-    image_url = f"{base_url.replace("chat/", "")}data/images/market_data/correlation_matrix_{datetime.now().strftime("%Y%m%d")}.png"
+    return card_cache.get(("correlation", base_url),
+                          lambda: [marketImagePath("correlation_matrix"), VARIANT_MANIFEST],
+                          lambda: buildCorrelationMatrix(base_url))
+
+def buildCorrelationMatrix(base_url):
+    image_url = marketImageUrl(base_url, "correlation_matrix")
     # 오늘 날짜 가져오기
     today = date.today()
     formatted_date = today.strftime("%Y-%m-%d")
@@ -0,0 +1,178 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+from server.components.cardCache import fileSignature
+from src.vector_store import describe_index, get_cached_embedding_model, load_store
+from src.vector_store.lexical import HYBRID_SEARCH, lexical_index
+from src.vector_store.mmap_store import SqliteDocstore
+from src.vector_store.partitioned import MANIFEST_FILE, PartitionSet, Window, load_partitions
+
+VECTOR_STORE_PATH = './db/faiss'
+WARMUP_QUERY = "오늘 미국 증시 주요 뉴스"
+
+
+class RetrievalService:
+    """
+    상주 벡터 검색 컴포넌트
+
+    FAISS 벡터 스토어를 한 번만 읽어 두고 요청마다 재사용한다.
+    일일 파이프라인이 db/faiss 를 다시 쓰면 감시 스레드가 새 인덱스를 따로 읽고 워밍업한 뒤
+    참조만 바꿔 끼운다 (더블 버퍼). 교체 전에 스토어를 받아 간 요청은 예전 인덱스로 끝까지 검색한다.
+    db/faiss/manifest.json 이 있으면 날짜별 파티션을 읽고(바뀐 파티션만 다시 읽음), 기간으로 파티션을 골라 검색한다.
+    """
+
+    def __init__(self, path: str = VECTOR_STORE_PATH, reload_interval: float = None, embeddings=None):
+        """
+        Args:
+            path: 벡터 스토어 디렉토리
+            reload_interval: index.faiss 변경 확인 주기(초) (기본값: 환경변수 VECTOR_STORE_RELOAD_INTERVAL 또는 30)
+            embeddings: 질문 임베딩 모델 (기본값: 임베딩 캐시를 붙인 공용 ko-sbert 모델)
+        """
+        self.path = path
+        self.embeddings = embeddings
+        self.reload_interval = reload_interval or float(os.getenv("VECTOR_STORE_RELOAD_INTERVAL", "30"))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._store = None
+        self._signature = None
+        self._versions: Dict[str, str] = {}
+        self._watcher = None
+        self._stop = threading.Event()
+        self.loaded_at = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+
+    @property
+    def ready(self) -> bool:
+        return self._store is not None
+
+    def _indexSignature(self):
+        # 파티션 모드에서는 파이프라인이 마지막에 교체하는 manifest.json 만 본다
+        manifest = fileSignature(os.path.join(self.path, MANIFEST_FILE))
+        return manifest if manifest is not None else fileSignature(os.path.join(self.path, 'index.faiss'))
+
+    def _read(self):
+        """(스토어 또는 PartitionSet, 파티션 버전) 읽기"""
+        embeddings = self.embeddings or get_cached_embedding_model()
+        if os.path.exists(os.path.join(self.path, MANIFEST_FILE)):
+            previous = self._store if isinstance(self._store, PartitionSet) else None
+            return load_partitions(self.path, embeddings, previous, self._versions)
+        return load_store(self.path, embeddings), {}
+
+    def load(self) -> bool:
+        """현재 디스크의 인덱스를 새 버퍼에 읽고 워밍업한 뒤 교체. 이미 최신이면 아무것도 하지 않는다"""
+        with self._load_lock:
+            signature = self._indexSignature()
+            if signature is None or signature == self._signature:
+                return self.ready
+            started = time.perf_counter()
+            try:
+                store, versions = self._read()
+                if store is None:
+                    # index.faiss 와 문서 파일(chunks.sqlite3/index.pkl) 교체 도중이면 다음 확인 때 다시 시도
+                    return self.ready
+                load_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                # 파티션 모드에서는 전체 기간 뷰를 미리 만들어 둔다
+                view = store.view() if isinstance(store, PartitionSet) else store
+                view.similarity_search(WARMUP_QUERY, k=1)
+                if HYBRID_SEARCH:
+                    # 어휘 색인도 교체 전에 만들어 첫 요청이 기다리지 않게 한다
+                    lexical_index(view)
+                warmup_seconds = time.perf_counter() - started
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                self.logger.error(f"벡터 스토어 로드 실패 ({self.path}): {e}")
+                return self.ready
+            # 읽는 동안 파일이 또 바뀌었으면 다음 확인 때 다시 읽도록 읽기 전 시그니처를 기록
+            with self._lock:
+                replaced = self._store is not None
+                self._store = store
+                self._signature = signature
+                self._versions = versions
+                self.loaded_at = time.time()
+                self.load_seconds = load_seconds
+                self.warmup_seconds = warmup_seconds
+                if replaced:
+                    self.reloads += 1
+            self.logger.info(f"벡터 스토어 {'교체' if replaced else '로드'} 완료: {self._vectorCount(store)}개 벡터, "
+                             f"로드 {load_seconds:.2f}초, 워밍업 {warmup_seconds:.2f}초")
+            return True
+
+    @staticmethod
+    def _vectorCount(store) -> int:
+        if store is None:
+            return 0
+        return store.ntotal if isinstance(store, PartitionSet) else store.index.ntotal
+
+    @staticmethod
+    def _storeFormat(store) -> Optional[str]:
+        # mmap: index.faiss 메모리 매핑 + chunks.sqlite3, pickle: 예전 index.pkl 형식
+        if store is None:
+            return None
+        stores = store.partitions.values() if isinstance(store, PartitionSet) else [store]
+        formats = {'mmap' if isinstance(s.docstore, SqliteDocstore) else 'pickle' for s in stores}
+        return formats.pop() if len(formats) == 1 else 'mixed'
+
+    def get(self, window: Optional[Window] = None):
+        """
+        현재 벡터 스토어. 아직 읽지 않았으면 이 요청에서 읽는다
+
+        Args:
+            window: (시작일, 종료일). 파티션 모드에서 이 기간의 파티션만 검색한다 (기본값: 보관 중인 전체)
+        """
+        store = self._store
+        if store is None:
+            self.load()
+            store = self._store
+            if store is None:
+                raise RuntimeError(f"벡터 스토어를 읽을 수 없습니다: {self.path} ({self.last_error})")
+        return store.view(window) if isinstance(store, PartitionSet) else store
+
+    def start(self):
+        """백그라운드에서 로드/워밍업 후 변경 감시 시작 (이미 시작된 경우 무시)"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="retrieval-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        self.load()
+        while not self._stop.wait(self.reload_interval):
+            if self._indexSignature() != self._signature:
+                self.load()
+
+    def stats(self) -> Dict:
+        store = self._store
+        return {
+            'ready': self.ready,
+            'vectors': self._vectorCount(store),
+            'index': describe_index(store.index) if store is not None and not isinstance(store, PartitionSet) else None,
+            'format': self._storeFormat(store),
+            'lexical': store.lexical_index.stats() if getattr(store, 'lexical_index', None) is not None else None,
+            'partitions': {name: p.index.ntotal for name, p in store.partitions.items()} if isinstance(store, PartitionSet) else None,
+            'version': "-".join(str(x) for x in self._signature) if self._signature else None,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'warmup_seconds': self.warmup_seconds,
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+
+retrieval_service = RetrievalService()
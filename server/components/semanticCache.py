@@ -0,0 +1,178 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.vector_store import get_cached_embedding_model, normalize_text
+
+
+# 임베딩은 반대 방향/부정 질문("왜 올랐어" / "왜 떨어졌어" / "안 올랐어")도 거의 같은 벡터로 만든다.
+# 그래서 방향과 부정 여부가 같은 질문끼리만 답변을 재사용한다
+# 한글은 어간이 들어 있으면, 영어와 한 글자 부정어("안", "못")는 단어가 같을 때만 센다
+UP_WORDS = ('올랐', '오르', '오른', '올라', '상승', '급등', '반등', '강세', '뛰었', '호재')
+DOWN_WORDS = ('떨어', '내렸', '내린', '내려', '하락', '급락', '폭락', '약세', '빠졌', '빠진', '악재')
+NEGATION_WORDS = ('않', '없', '아니', '말고')
+UP_TOKENS = ('up', 'rise', 'rose', 'rising', 'gain', 'gained', 'rally', 'rallied', 'surge', 'surged')
+DOWN_TOKENS = ('down', 'fall', 'fell', 'falling', 'drop', 'dropped', 'decline', 'declined', 'plunge', 'plunged')
+NEGATION_TOKENS = ('안', '못', 'no', 'not', "didn't", "isn't", "wasn't", "doesn't", 'never')
+_TOKEN = re.compile(r"[a-z']+|[가-힣]+")
+
+
+def questionPolarity(question: str) -> int:
+    """질문의 방향(0: 없음, 1: 상승, 2: 하락)과 부정 여부를 합친 값. 같은 값끼리만 캐시 적중으로 본다"""
+    text = normalize_text(question).lower()
+    tokens = set(_TOKEN.findall(text))
+    up = any(word in text for word in UP_WORDS) or not tokens.isdisjoint(UP_TOKENS)
+    down = any(word in text for word in DOWN_WORDS) or not tokens.isdisjoint(DOWN_TOKENS)
+    direction = 0 if up == down else (1 if up else 2)
+    negated = any(word in text for word in NEGATION_WORDS) or not tokens.isdisjoint(NEGATION_TOKENS)
+    return direction + 3 * negated
+
+
+def nextRefreshTime(now: float, refresh_hour: int) -> float:
+    """다음 일일 데이터 갱신 시각 (매일 refresh_hour 시, crontab 과 동일)"""
+    current = datetime.fromtimestamp(now)
+    boundary = current.replace(hour=refresh_hour, minute=0, second=0, microsecond=0)
+    if boundary <= current:
+        boundary += timedelta(days=1)
+    return boundary.timestamp()
+
+
+class SemanticAnswerCache:
+    """비슷한 질문에 대한 LLM 답변 재사용 캐시
+
+    질문을 ko-sbert 로 임베딩해서 저장된 질문들과 코사인 유사도를 비교하고,
+    threshold 이상이면서 방향/부정 여부(questionPolarity)가 같고 아직 유효한 답변이 있으면 그대로 돌려준다.
+    답변은 다음 일일 데이터 갱신 시각에 만료되며, 메모리 상한을 넘으면 LRU 로 제거한다.
+    """
+
+    def __init__(self, embed: Callable[[str], list] = None, threshold: float = None,
+                 max_bytes: int = None, refresh_hour: int = None):
+        """
+        Args:
+            embed: 문장 -> 정규화된 벡터 함수 (기본값: 임베딩 캐시를 붙인 공용 ko-sbert 모델의 embed_query)
+            threshold: 캐시 적중으로 볼 최소 코사인 유사도 (기본값: 환경변수 SEMANTIC_CACHE_THRESHOLD 또는 0.95)
+            max_bytes: 캐시가 사용할 최대 메모리 (기본값: 환경변수 SEMANTIC_CACHE_MAX_BYTES 또는 8MB)
+            refresh_hour: 일일 데이터 갱신 시각 (기본값: 환경변수 DATA_REFRESH_HOUR 또는 8)
+        """
+        self._embed = embed or (lambda text: get_cached_embedding_model().embed_query(text))
+        self.threshold = threshold if threshold is not None else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+        self.max_bytes = max_bytes or int(os.getenv("SEMANTIC_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+        self.refresh_hour = refresh_hour if refresh_hour is not None else int(os.getenv("DATA_REFRESH_HOUR", "8"))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # slot 번호 -> (질문, 답변, 만료 시각, 사용 바이트). 맨 앞이 가장 오래 안 쓰인 항목
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._vectors = None          # (capacity, dim) float32 행렬
+        self._valid = None            # 사용 중인 slot 표시
+        self._polarity = None         # slot 별 questionPolarity
+        self._free = []
+        self._size = 0
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def lookup(self, question: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Returns:
+            (캐시된 답변 또는 None, 질문 벡터). 벡터는 store() 에 넘겨 다시 임베딩하지 않도록 한다
+        """
+        try:
+            vector = np.asarray(self._embed(normalize_text(question)), dtype=np.float32)
+        except Exception as e:
+            self.logger.error(f"질문 임베딩 실패, 캐시를 건너뜁니다: {e}")
+            return None, None
+
+        polarity = questionPolarity(question)
+        now = time.time()
+        with self._lock:
+            if self._size:
+                sims = self._vectors[:self._size] @ vector
+                sims[~self._valid[:self._size] | (self._polarity[:self._size] != polarity)] = -np.inf
+                slot = int(np.argmax(sims))
+                if sims[slot] >= self.threshold:
+                    _, answer, expires_at, _ = self._entries[slot]
+                    if expires_at > now:
+                        self._entries.move_to_end(slot)
+                        self.hits += 1
+                        return answer, vector
+                    self._remove(slot)
+                    self.expired += 1
+            self.misses += 1
+        return None, vector
+
+    def store(self, question: str, answer: str, vector: np.ndarray = None):
+        """답변 저장 (lookup 에서 받은 벡터가 있으면 재사용)"""
+        if vector is None:
+            try:
+                vector = np.asarray(self._embed(normalize_text(question)), dtype=np.float32)
+            except Exception as e:
+                self.logger.error(f"질문 임베딩 실패, 답변을 저장하지 않습니다: {e}")
+                return
+        nbytes = vector.nbytes + len(answer.encode('utf-8')) + len(question.encode('utf-8'))
+        if nbytes > self.max_bytes:
+            return
+
+        expires_at = nextRefreshTime(time.time(), self.refresh_hour)
+        with self._lock:
+            while self._entries and self._bytes + nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evicted += 1
+            slot = self._allocate(vector.shape[0])
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._polarity[slot] = questionPolarity(question)
+            self._entries[slot] = (question, answer, expires_at, nbytes)
+            self._bytes += nbytes
+
+    def _allocate(self, dim: int) -> int:
+        if self._free:
+            return self._free.pop()
+        if self._vectors is None:
+            self._vectors = np.zeros((64, dim), dtype=np.float32)
+            self._valid = np.zeros(64, dtype=bool)
+            self._polarity = np.zeros(64, dtype=np.int8)
+        elif self._size == len(self._vectors):
+            capacity = len(self._vectors) * 2
+            self._vectors = np.resize(self._vectors, (capacity, dim))
+            self._valid = np.concatenate([self._valid, np.zeros(capacity - len(self._valid), dtype=bool)])
+            self._polarity = np.concatenate([self._polarity, np.zeros(capacity - len(self._polarity), dtype=np.int8)])
+        self._size += 1
+        return self._size - 1
+
+    def _remove(self, slot: int):
+        _, _, _, nbytes = self._entries.pop(slot)
+        self._valid[slot] = False
+        self._free.append(slot)
+        self._bytes -= nbytes
+
+    def invalidate(self):
+        """일일 데이터 갱신 등으로 전체 캐시를 비울 때 사용"""
+        with self._lock:
+            for slot in list(self._entries):
+                self._remove(slot)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expired': self.expired,
+                'evicted': self.evicted,
+            }
@@ -0,0 +1,72 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합치는 실행기
+
+    먼저 들어온 호출 하나만 실제로 실행하고, 그동안 같은 키로 들어온 호출은
+    그 결과를 기다렸다가 함께 돌려받는다. 실행이 끝나면 키가 지워지므로
+    결과를 오래 보관하는 캐시와는 다르다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.saved: Dict[str, int] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, label: str = "") -> Tuple[Any, bool]:
+        """
+        Args:
+            key: 같은 결과를 내는 호출끼리 같은 키
+            fn: 실제 계산 함수
+            label: 절약 횟수를 나눠 셀 이름 (명령어 등)
+
+        Returns:
+            (결과, 다른 호출의 결과를 공유했는지 여부)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.saved[label] = self.saved.get(label, 0) + 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'saved': dict(self.saved),
+                'saved_total': sum(self.saved.values()),
+                'in_flight': len(self._calls),
+            }
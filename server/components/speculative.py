@@ -0,0 +1,56 @@
+import os
+from typing import Dict, Optional
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from server.components.llmGateway import llm_gateway
+from server.components.metrics import registry, stageTimer
+
+# 빠른 답변용 작은 모델 (SPECULATIVE_MODEL 환경변수로 변경)
+FAST_MODEL = os.getenv("SPECULATIVE_MODEL", "llama-3.2-1b-preview")
+# 명령별 빠른 답변 최대 토큰 수. 목록에 없거나 0 이면 빠른 답변을 만들지 않는다
+DEFAULT_POLICY = "v=160,s=160,ask=120"
+# 카카오 마감이 지나면 빠른 답변은 쓰이지 않으므로 그 안에 끝나지 않는 호출은 재시도 없이 끊는다
+FAST_TIMEOUT = float(os.getenv("SPECULATIVE_TIMEOUT", "3.5"))
+# 전체 답변을 이만큼(초) 기다려도 끝나지 않을 때만 빠른 답변을 시작한다
+# (저장된 답변/같은 질문 공유/카드 캐시로 바로 끝나는 요청에 작은 모델을 부르지 않도록)
+FAST_GRACE = float(os.getenv("SPECULATIVE_GRACE", "1.0"))
+
+SPECULATIVE_WINS = registry.counter(
+    "speculative_tier_wins_total",
+    "Which tier answered within the Kakao deadline (full = complete answer, fast = short answer, placeholder = neither)",
+    ["command", "tier"])
+
+fast_prompt = PromptTemplate(
+    input_variables=['question'],
+    template="다음 질문에 한국어로 2~3문장 이내로 짧게 핵심만 답해줘. 자세한 답변은 이어서 따로 전달돼.\n질문: {question}")
+
+
+def parsePolicy(spec: str) -> Dict[str, int]:
+    """"v=160,s=0,ask=120" 형식을 {명령: max_tokens} 로 변환 (0 또는 off 는 비활성)"""
+    policy = {}
+    for item in (spec or "").split(","):
+        command, _, value = item.partition("=")
+        command, value = command.strip(), value.strip().lower()
+        if not command or value in ("", "0", "off"):
+            continue
+        policy[command] = int(value)
+    return policy
+
+
+speculative_policy = parsePolicy(os.getenv("SPECULATIVE_POLICY", DEFAULT_POLICY))
+
+
+def fastAnswerTokens(command: str) -> Optional[int]:
+    """이 명령에 빠른 답변을 함께 만들지 여부 (만들면 max_tokens, 아니면 None)"""
+    return speculative_policy.get(command)
+
+
+def getFastAnswer(utterance: str, max_tokens: int) -> str:
+    # 검색/RAG 없이 작은 모델로 짧은 답변만 생성
+    question = utterance.replace("/v", "").replace("/s", "").strip()
+    llm = llm_gateway.get_llm(FAST_MODEL, max_tokens=max_tokens, request_timeout=FAST_TIMEOUT, max_retries=0)
+    chain = fast_prompt | llm | StrOutputParser()
+    with stageTimer("fast_answer"):
+        return chain.invoke({'question': question})
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ConversationStateStore:
+    """사용자별 마지막 답변 저장소 (userRequest.user.id 기준)
+
+    메모리 딕셔너리에 TTL 을 두고 보관하며, db_path 를 주면
+    SQLite(WAL) 에도 기록해서 재시작이나 여러 워커 사이에서 공유한다.
+    """
+
+    def __init__(self, ttl: float = None, max_entries: int = None, db_path: str = None):
+        """
+        Args:
+            ttl: 저장된 답변의 유효 시간(초) (기본값: 환경변수 STATE_TTL_SECONDS 또는 3600)
+            max_entries: 메모리에 보관할 최대 사용자 수 (기본값: 환경변수 STATE_MAX_ENTRIES 또는 10000)
+            db_path: SQLite 파일 경로 (기본값: 환경변수 STATE_DB_PATH, 없으면 메모리만 사용)
+        """
+        self.ttl = ttl or float(os.getenv("STATE_TTL_SECONDS", "3600"))
+        self.max_entries = max_entries or int(os.getenv("STATE_MAX_ENTRIES", "10000"))
+        self.db_path = db_path or os.getenv("STATE_DB_PATH")
+        self.logger = logging.getLogger(__name__)
+
+        # user_id -> (만료 시각, 값). 갱신 시 맨 뒤로 보내므로 앞쪽이 가장 먼저 만료된다
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._db = None
+        # 여러 프로세스가 같은 SQLite 를 쓰면 메모리 사본이 낡을 수 있으므로 SQLite 를 먼저 본다
+        self._shared = False
+        if self.db_path:
+            self._db = self._open_db(self.db_path)
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # fork 이전에 연 SQLite 연결은 자식에서 쓸 수 없으므로 새로 연다 (pre-fork 워커)
+        self._lock = threading.Lock()
+        self._db = self._open_db(self.db_path)
+        self._shared = True
+
+    def _open_db(self, path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_state ("
+            "user_id TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        return db
+
+    def put(self, user_id: str, value: Dict):
+        """사용자의 마지막 답변 저장"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._entries[user_id] = (expires_at, value)
+            self._entries.move_to_end(user_id)
+            self._puts += 1
+            self._evict(time.time())
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversation_state VALUES (?, ?, ?)",
+                    (user_id, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """저장된 답변 조회 (만료되었거나 없으면 None)"""
+        now = time.time()
+        with self._lock:
+            entry = None if self._shared else self._entries.get(user_id)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM conversation_state WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]))
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                self._delete(user_id)
+                return None
+            return entry[1]
+
+    def pop(self, user_id: str) -> Optional[Dict]:
+        """저장된 답변을 꺼내고 삭제 (여러 워커가 동시에 꺼내도 한 곳만 받는다)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(user_id, None)
+            if self._db is not None:
+                # 조회와 삭제를 한 트랜잭션으로 묶는다. 쓰기 잠금을 먼저 잡으므로 다른 프로세스가 그 사이에 꺼내지 못한다
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute(
+                        "SELECT expires_at, value FROM conversation_state WHERE user_id = ?", (user_id,)
+                    ).fetchone()
+                    self._db.execute("DELETE FROM conversation_state WHERE user_id = ?", (user_id,))
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                # 여러 프로세스가 같은 파일을 쓰므로 SQLite 에 남아 있던 값만 유효하다
+                entry = (row[0], json.loads(row[1])) if row else None
+            if entry is None or entry[0] <= now:
+                return None
+            return entry[1]
+
+    def clear(self, user_id: str):
+        """사용자의 저장된 답변 삭제"""
+        with self._lock:
+            self._delete(user_id)
+
+    def _delete(self, user_id: str):
+        had_entry = self._entries.pop(user_id, None) is not None
+        if self._db is not None:
+            self._db.execute("DELETE FROM conversation_state WHERE user_id = ?", (user_id,))
+        return had_entry
+
+    def _evict(self, now: float):
+        # 만료된 항목과 용량 초과분을 오래된 순서대로 제거
+        while self._entries:
+            user_id, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+        # 디스크 정리는 가끔만 수행
+        if self._db is not None and self._puts % 256 == 0:
+            self._db.execute("DELETE FROM conversation_state WHERE expires_at <= ?", (now,))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -1,33 +1,49 @@
+import sys
 import json
 import numpy as np
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
 from langchain.prompts import PromptTemplate, ChatPromptTemplate
 import dotenv
-from langchain.chains import LLMChain
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_community.vectorstores.utils import DistanceStrategy
-from langchain.retrievers.multi_query import MultiQueryRetriever
 from langchain_core.output_parsers import StrOutputParser
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.schema.runnable import RunnablePassthrough, RunnableLambda
 import os
 from datetime import datetime
 
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+from server.components.llmGateway import llm_gateway
+from server.components.queryExpansion import query_expander
+from src.vector_store import get_embedding_model
+from src.vector_store.partitioned import PartitionedVectorStore
+
 with open(f'./data/raw/news/collected_news_{datetime.now().strftime('%Y%m%d')}.json', 'r', encoding='utf-8') as f:
     data = json.load(f)
 dotenv.load_dotenv()
 articles = data['articles']
 
+# HuggingFaceEmbeddings를 사용하여 임베딩 모델 로드
+#embedding_model = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
+embedding_model = get_embedding_model()
+partitioned_store = PartitionedVectorStore('./db/faiss', embedding_model)
+
+# RSS 와 NewsAPI 에 같이 실린 기사, 이전 날 이미 저장한 기사는 번역 전에 뺀다 (원문 지문 기준)
+articles = [article for article in articles if article.get('full_content')]
+kept = partitioned_store.filter_new([article['full_content'] for article in articles], source='news')
+print(f"새 기사 {len(kept)}개 / 수집 {len(articles)}개")
+articles = [articles[i] for i in kept]
+# 원문 지문은 벡터 스토어 저장이 끝난 뒤에 기록한다
+new_contents = [article['full_content'] for article in articles]
+
 # LLM을 이용한 번역
 def translate_text(text, source_language, target_language):
     template = f"Translate the following text from {source_language} to {target_language} preserving the original meaning:\n\n{text}\n\nTranslation:"
-    llm = ChatGroq(model="llama-3.1-8b-instant")
     prompt = PromptTemplate(template=template, input_variables=['text'])
-    chain = LLMChain(llm=llm, prompt=prompt, verbose=True)
+    chain = prompt | llm_gateway.get_llm() | StrOutputParser()
     response = chain.invoke({'text':prompt})
-    return response['text'].strip()
+    return response.strip()
 
 # 기사 내용 추출 및 Document 객체화해서 vector store 구축
 documents = []
@@ -56,22 +72,26 @@ text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100
 chunks = text_splitter.split_documents(documents)
 
 # vector space 생성 
+if not chunks:
+    # 새 기사가 없으면 오늘 파티션을 다시 쓰지 않는다
+    partitioned_store.maintain()
+    print("오늘 새로 저장할 뉴스가 없습니다.")
+    sys.exit(0)
 
-# HuggingFaceEmbeddings를 사용하여 임베딩 모델 로드
-#embedding_model = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2')
-embedding_model = HuggingFaceEmbeddings(
-    model_name='jhgan/ko-sbert-nli',
-    model_kwargs={'device':'cpu'},
-    encode_kwargs={'normalize_embeddings':True},
-)
-vector_store = FAISS.from_documents(chunks,
-                                    embedding = embedding_model,
-                                    )
-vector_store.save_local('./db/faiss')
+# 오늘 날짜 파티션의 뉴스 문서만 교체 (다른 날 파티션과 시장 데이터 문서는 그대로)
+# 중복/유사 중복 청크는 임베딩하지 않고 빼며, 같은 날 다시 돌리면 이미 임베딩한 청크의 벡터를 재사용한다
+# FAISS_INDEX_TYPE 이 hnsw/ivf/압축 종류면 저장 전에 그 인덱스로 다시 만들고, 서버는 manifest.json 교체를 보고 다시 읽는다
+vector_store = partitioned_store.write(chunks, source='news')
+# 번역/임베딩/저장이 모두 끝났으므로 이제 기사 지문을 기록 (중간에 실패하면 다음 실행에서 다시 처리)
+partitioned_store.record_new(new_contents, source='news')
+partitioned_store.maintain()
+if vector_store is None:
+    print("오늘 새로 저장한 뉴스가 없습니다.")
+    sys.exit(0)
 
 
 
-llm = ChatGroq(model="llama-3.1-8b-instant")
+llm = llm_gateway.get_llm()
 
 
 
@@ -87,10 +107,8 @@ query = '주어진 기사들 중 경제, 정치와 관련있는 문서를 관련
 
 # LLM 객체 생성
 
-retriever_from_llm = MultiQueryRetriever.from_llm(
-    retriever=vector_store.as_retriever(
-    ), llm=llm
-)
+# 질문 확장 방식은 QUERY_EXPANSION 환경변수로 선택 (llm / local / none)
+retriever_from_llm = RunnableLambda(lambda question: query_expander.retrieve(question, vector_store, llm))
 prompt = ChatPromptTemplate.from_template(template)
 
 
@@ -1,51 +1,49 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_groq import ChatGroq
-from langchain.retrievers.multi_query import MultiQueryRetriever
+from server.components.llmGateway import llm_gateway
+from server.components.metrics import stageTimer
+from server.components.retrievalService import retrieval_service
+from server.components.queryExpansion import query_expander
+from src.vector_store import get_cached_embedding_model
+from src.vector_store.partitioned import parse_time_window
 from langchain_core.output_parsers import StrOutputParser
-from langchain.schema.runnable import RunnablePassthrough
 from langchain_community.vectorstores import FAISS
 from langchain.prompts import PromptTemplate, ChatPromptTemplate
 import os
 import dotenv
 
-def getResponseBasedVectorSpace(question):
-    dotenv.load_dotenv()
-    embedding_model = HuggingFaceEmbeddings(
-        model_name='jhgan/ko-sbert-nli',
-        model_kwargs={'device':'cpu'},
-        encode_kwargs={'normalize_embeddings':True},
-    )
-    #print(os.getcwd())
-    vector_store = FAISS.load_local('./db/faiss', embedding_model, allow_dangerous_deserialization=True)
-
-
-    template = '''Answer the question based as much as possible on the following context:
+template = '''Answer the question based as much as possible on the following context:
     {context}
 
     Question: {question}
     '''
+prompt = ChatPromptTemplate.from_template(template)
 
+def format_docs(docs):
+    return '\n\n'.join([d.page_content for d in docs])
 
+def streamResponseBasedVectorSpace(question, window=None):
+    dotenv.load_dotenv()
+    # 임베딩 모델은 프로세스당 한 번만 로드
+    with stageTimer("embedding_load"):
+        embedding_model = get_cached_embedding_model()
+    #print(os.getcwd())
+    # 상주 검색 컴포넌트가 읽어 둔 인덱스 사용 (db/faiss 가 바뀌면 백그라운드에서 교체됨)
+    # "오늘", "이번 주" 같은 기간 표현이 있으면 그 기간의 날짜 파티션만 검색
+    with stageTimer("faiss_load"):
+        vector_store = retrieval_service.get(window or parse_time_window(question))
 
-    # LLM 객체 생성
-    llm = ChatGroq(model="llama-3.1-8b-instant")
-    retriever_from_llm = MultiQueryRetriever.from_llm(
-        retriever=vector_store.as_retriever(
-        ), llm=llm
-    )
-    prompt = ChatPromptTemplate.from_template(template)
-    def format_docs(docs):
-        return '\n\n'.join([d.page_content for d in docs])
+    # LLM 객체 (게이트웨이에서 공유)
+    llm = llm_gateway.get_llm()
+    # 질문 확장 방식은 QUERY_EXPANSION (llm: MultiQueryRetriever 와 같은 LLM 재작성, local: LLM 없이 확장, none)
+    docs = query_expander.retrieve(question, vector_store, llm)
 
     # Chain
-    chain = (
-        {'context': retriever_from_llm | format_docs, 'question': RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
-
-    # Run
-    response = chain.invoke(question)
+    chain = prompt | llm | StrOutputParser()
+
+    # Run (검색이 끝난 뒤 답변 토큰을 순서대로 전달)
+    with stageTimer("generation"):
+        yield from chain.stream({'context': format_docs(docs), 'question': question})
+
+def getResponseBasedVectorSpace(question, window=None):
+    response = "".join(streamResponseBasedVectorSpace(question, window))
     #print(response)
-    return response
\ No newline at end of file
+    return response
@@ -0,0 +1,93 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict
+
+
+class PoolOverloaded(Exception):
+    """작업 큐가 가득 차서 요청을 받을 수 없을 때 발생"""
+
+
+class BoundedWorkerPool:
+    """동시 실행 수와 대기열 길이가 제한된 AI_Response 실행용 스레드 풀"""
+
+    def __init__(self, max_workers: int = None, max_queue: int = None, name: str = "ai-worker"):
+        """
+        Args:
+            max_workers: 동시에 실행할 수 있는 핸들러 수 (기본값: 환경변수 AI_WORKERS 또는 8)
+            max_queue: 실행을 기다릴 수 있는 요청 수 (기본값: 환경변수 AI_QUEUE_SIZE 또는 32)
+            name: 워커 스레드 이름 접두사
+        """
+        self.max_workers = max_workers or int(os.getenv("AI_WORKERS", "8"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("AI_QUEUE_SIZE", "32"))
+        self.logger = logging.getLogger(__name__)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        # 실행 중 + 대기 중인 작업 수의 상한
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """작업 제출. 대기열이 가득 찼으면 바로 PoolOverloaded 발생"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            self.logger.warning("작업 대기열 초과: 요청 거절")
+            raise PoolOverloaded(f"queue full ({self.max_workers} workers, {self.max_queue} queued)")
+
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+
+        def run():
+            waited = time.perf_counter() - enqueued_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._queued -= 1
+            self._slots.release()
+            raise
+
+    def stats(self) -> Dict:
+        """풀 크기 조정을 위한 현재 상태"""
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'active': self._active,
+                'queue_depth': self._queued,
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'completed': self._completed,
+                'avg_wait_s': round(self._wait_total / started, 4) if started else 0.0,
+                'max_wait_s': round(self._wait_max, 4),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
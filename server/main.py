@@ -1,14 +1,24 @@
+import os
 import time
-import queue as q
-import threading
+import queue
+import asyncio
 import json
+import threading
 from fastapi import Request, FastAPI, Response
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
 from pathlib import Path
 from fastapi.staticfiles import StaticFiles
 from server.components.summerize.retrivial_from_vector_space import getResponseBasedVectorSpace
 from server.components.responseHandlers import *
-import requests
+from server.components.workerPool import BoundedWorkerPool, PoolOverloaded
+from server.components.callbackDispatcher import CallbackDispatcher
+from server.components.llmGateway import llm_gateway
+from server.components.retrievalService import retrieval_service
+from server.components.queryExpansion import query_expander
+from src.vector_store import get_embedding_cache
+from server.components.metrics import registry, DEADLINE_TOTAL
+from server.components.imageVariants import CachedStaticFiles, VARIANT_DIR, IMMUTABLE_CACHE_CONTROL
+from server.components.speculative import FAST_GRACE, SPECULATIVE_WINS, fastAnswerTokens, getFastAnswer
 dotenv.load_dotenv()
 
 
@@ -16,10 +26,45 @@ dotenv.load_dotenv()
 
 app = FastAPI()
 
+# AI_Response 실행용 풀 (AI_WORKERS / AI_QUEUE_SIZE 환경변수로 크기 조정)
+worker_pool = BoundedWorkerPool()
+# 빠른 답변(작은 모델) 전용 풀. 전체 답변과 자리를 다투지 않고, 자리가 없으면 빠른 답변만 생략한다
+fast_pool = BoundedWorkerPool(max_workers=int(os.getenv("SPECULATIVE_WORKERS", "4")),
+                              max_queue=int(os.getenv("SPECULATIVE_QUEUE_SIZE", "0")), name="fast-answer")
+# callbackUrl 전송용 발송기 (keep-alive 세션 + 재시도)
+callback_dispatcher = CallbackDispatcher()
+
+# /metrics 에서 함께 내보낼 풀/콜백/캐시 상태
+registry.callback("ai_pool_queue_depth", "AI_Response jobs waiting for a worker", lambda: worker_pool.stats()['queue_depth'])
+registry.callback("ai_pool_active", "AI_Response jobs currently running", lambda: worker_pool.stats()['active'])
+registry.callback("ai_pool_rejected_total", "Requests rejected because the queue was full", lambda: worker_pool.stats()['rejected'], kind="counter")
+registry.callback("ai_pool_wait_seconds_avg", "Average time a job waited for a worker", lambda: worker_pool.stats()['avg_wait_s'])
+registry.callback("speculative_pool_active", "Fast answers currently running", lambda: fast_pool.stats()['active'])
+registry.callback("speculative_pool_rejected_total", "Fast answers skipped because the fast-answer pool was full",
+                  lambda: fast_pool.stats()['rejected'], kind="counter")
+registry.callback("callback_delivery_total", "Kakao callback deliveries by result",
+                  lambda: {k: v for k, v in callback_dispatcher.stats().items() if k in ('delivered', 'failed', 'dropped', 'retries')},
+                  labelname="result", kind="counter")
+registry.callback("callback_outbox_depth", "Callbacks waiting to be sent", lambda: callback_dispatcher.stats()['outbox_depth'])
+registry.callback("semantic_cache_lookups_total", "Semantic answer cache lookups by result",
+                  lambda: {'hit': answer_cache.hits, 'miss': answer_cache.misses}, labelname="result", kind="counter")
+registry.callback("single_flight_saved_total", "Handler executions saved by sharing an identical in-flight request",
+                  lambda: single_flight.stats()['saved'], labelname="command", kind="counter")
+registry.callback("embedding_cache_lookups_total", "Query embedding cache lookups by result",
+                  lambda: {'hit': get_embedding_cache().hits, 'miss': get_embedding_cache().misses}, labelname="result", kind="counter")
+registry.callback("embedding_cache_cpu_seconds_saved_total", "Embedding model time skipped thanks to cache hits",
+                  lambda: get_embedding_cache().cpu_seconds_saved, kind="counter")
+registry.callback("vector_store_ready", "1 when the FAISS store is loaded and warmed up", lambda: int(retrieval_service.ready))
+registry.callback("vector_store_reloads_total", "FAISS store hot swaps after db/faiss changed", lambda: retrieval_service.reloads, kind="counter")
+registry.callback("llm_in_flight", "LLM calls in flight per model", lambda: llm_gateway.stats()['in_flight'], labelname="model")
+
 # Static files 경로 설정  예시 : (../data/visualizations 디렉토리를 /data/images 경로로 매핑)
 static_path = Path(__file__).parent.parent #/Users/admin/Documents/OSS_TermProject/
 app.mount("/data/images/visualizations", StaticFiles(directory=str(static_path)+'/data/visualizations'), name="visualizations_images")
-app.mount("/data/images/market_data", StaticFiles(directory=str(static_path)+'/market_data'), name="market_data_images")
+app.mount("/data/images/market_data", CachedStaticFiles(directory=str(static_path)+'/market_data'), name="market_data_images")
+# 축소 변형본은 파일명에 내용 해시가 있으므로 영구 캐시
+VARIANT_DIR.mkdir(parents=True, exist_ok=True)
+app.mount("/data/images/variants", CachedStaticFiles(directory=str(VARIANT_DIR), cache_control=IMMUTABLE_CACHE_CONTROL), name="image_variants")
 app.mount("/data/news", StaticFiles(directory=str(static_path)+'/data/raw/news'), name='collected_news')
 
 
@@ -27,49 +72,204 @@ app.mount("/data/news", StaticFiles(directory=str(static_path)+'/data/raw/news')
 async def root():
     return {"message": "kakaoTest"}
 
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/pool")
+async def pool_stats():
+    return worker_pool.stats()
+
+@app.get("/stats/callback")
+async def callback_stats():
+    return callback_dispatcher.stats()
+
+@app.get("/stats/llm")
+async def llm_stats():
+    return llm_gateway.stats()
+
+@app.get("/stats/cache")
+async def cache_stats():
+    return {"semantic_answer": answer_cache.stats(),
+            "query_embedding": get_embedding_cache().stats(),
+            "cards": {"hits": card_cache.hits, "rebuilds": card_cache.rebuilds},
+            "news_digest": {"served": news_digest.served, "refreshes": news_digest.refreshes},
+            "single_flight": single_flight.stats()}
+
+@app.get("/ready")
+async def ready():
+    # 벡터 스토어 로드/워밍업이 끝나야 트래픽을 받을 준비가 된 것으로 본다
+    stats = retrieval_service.stats()
+    return Response(content=json.dumps(stats), media_type='application/json',
+                    status_code=200 if stats['ready'] else 503)
+
+@app.get("/stats/retrieval")
+async def retrieval_stats():
+    return {**retrieval_service.stats(), 'query_expansion': query_expander.stats()}
+
+@app.on_event("startup")
+def start_retrieval_service():
+    # 서버 시작과 함께 백그라운드에서 인덱스 로드/워밍업 후 변경 감시
+    retrieval_service.start()
+
+@app.on_event("shutdown")
+def stop_callback_dispatcher():
+    retrieval_service.stop()
+    # EMBEDDING_CACHE_PATH 가 설정되어 있으면 다음 시작 때 쓰도록 질문 임베딩 저장
+    get_embedding_cache().save()
+    callback_dispatcher.stop()
+    llm_gateway.close()
+
 @app.post("/chat/")
 async def chat(request: Request):
     kakaorequest = await request.json()
     # request에 URL이 포함되어있지 않아서 넣어줘야 한다
+    kakaorequest["base_url"] = requestBaseUrl(request)
+
+
+    #print(json.dumps(kakaorequest, indent=2))
+    return await mainChat(kakaorequest)
+
+@app.post("/chat/stream")
+async def chat_stream(request: Request):
+    body = await request.json()
+    # 웹/대시보드 클라이언트는 {"utterance": "...", "user": {"id": "..."}} 형식으로 보내도 된다
+    if "userRequest" in body:
+        kakaorequest = body
+    else:
+        kakaorequest = {"userRequest": {"utterance": body.get("utterance", ""), "user": body.get("user", {"id": "web"})}}
+    kakaorequest["base_url"] = requestBaseUrl(request).replace("chat/stream", "chat/")
+    return StreamingResponse(sseEvents(kakaorequest), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def requestBaseUrl(request):
     scope = request.scope 
     scheme = scope.get("scheme", "http")
     host = scope["headers"][0][1].decode("utf-8")  # Host 헤더에서 호스트 정보 가져오기(base url넘기기)
     path = scope["path"]
-    url = f"{scheme}://{host}{path}"
-    kakaorequest["base_url"] = url
+    return f"{scheme}://{host}{path}"
 
+def sseFormat(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def produceEvents(kakaorequest, events, closed):
+    # 워커 풀 스레드: 토큰(또는 완성된 카드/저장된 답변 응답 하나)을 만들어 큐로 넘긴다
+    try:
+        chunks = streamAIResponse(kakaorequest)
+        if chunks is None:
+            events.put(("response", AI_Response(kakaorequest)))
+            return
+        try:
+            for chunk in chunks:
+                if closed.is_set():
+                    break
+                events.put(("token", chunk))
+        finally:
+            # 클라이언트가 끊었으면 LLM 스트림을 바로 닫아 게이트웨이 슬롯을 돌려준다
+            if hasattr(chunks, "close"):
+                chunks.close()
+    except Exception as e:
+        print(f"스트리밍 응답 생성 중 오류 발생: {e}")
+        events.put(("response", errorResponseFormat(kakaorequest["userRequest"]["utterance"])))
+    finally:
+        events.put(None)
+
+def sseEvents(kakaorequest):
+    # 동기 generator 이므로 Starlette 가 스레드 풀에서 순회한다
+    # 응답은 /chat/ 과 같은 워커 풀에서 만들므로 같은 동시 실행 제한과 과부하 응답을 따른다
+    started = time.perf_counter()
+    events = queue.Queue()
+    closed = threading.Event()
+    try:
+        worker_pool.submit(produceEvents, kakaorequest, events, closed)
+    except PoolOverloaded:
+        yield sseFormat("response", overloadResponseFormat(kakaorequest["userRequest"]["utterance"]))
+        return
+
+    first_token_at = None
+    parts = []
+    try:
+        while True:
+            item = events.get()
+            if item is None:
+                break
+            event, data = item
+            if event != "token":
+                # 카드/저장된 답변처럼 스트리밍할 토큰이 없는 명령, 또는 오류
+                yield sseFormat(event, data)
+                return
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            parts.append(data)
+            yield sseFormat("token", {"text": data})
+    finally:
+        # 끝까지 읽지 않고 닫혀도(연결 끊김) 생산 스레드가 멈추도록 알린다
+        closed.set()
+    finished = time.perf_counter()
+    yield sseFormat("done", {
+        "text": "".join(parts),
+        "ttft_ms": round(((first_token_at or finished) - started) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+    })
 
-    #print(json.dumps(kakaorequest, indent=2))
-    return mainChat(kakaorequest)
 
 
+# 카카오 스킬 서버 응답 제한(5초)보다 여유 있게 잡은 대기 시간
+MAX_WAIT_TIME = 3.5
 
-def post_in_background(url, data, headers):
-    # 별도 스레드에서 POST 요청 처리
-    r = requests.post(url, data=json.dumps(data), headers=headers)
-    print("POST 요청 상태코드:", r.status_code)
-    print("POST 응답 본문:", r.text)
+# 응답 반환 이후에도 실행되어야 하는 콜백 태스크 (GC 방지용 참조 보관)
+background_tasks = set()
 
-def wait_and_post(response_queue, url, headers):
-    # response_queue에 응답이 들어올 때까지 대기
-    response = response_queue.get()  # 여기서 블로킹되어 응답을 기다림
-    # 응답이 들어오면 post_in_background 실행
-    post_in_background(url, response, headers)
+async def deliverCallback(task, url, utterance):
+    # 핸들러가 끝날 때까지 기다린 뒤 callbackUrl 발송 대기열에 최종 응답 등록
+    try:
+        response = await task
+    except Exception as e:
+        # 사용자에게는 이미 useCallback 으로 응답했으므로 오류도 콜백으로 알린다
+        print(f"응답 생성 중 오류 발생: {e}")
+        response = errorResponseFormat(utterance)
+    if response is None:
+        return
+    callback_dispatcher.enqueue(url, response)
 
-def mainChat(kakaorequest):
-    start_time = time.time()
-    cwd = os.getcwd()
-    filename = os.path.join(cwd, "botlog.txt")
-    if not os.path.exists(filename):
-        with open(filename, "w") as f:
-            f.write("")
+def fastAnswerResult(fast_task):
+    # 마감 시점까지 정상적으로 끝난 빠른 답변만 사용
+    if fast_task is None or not fast_task.done() or fast_task.cancelled():
+        return None
+    if fast_task.exception() is not None:
+        print(f"빠른 답변 생성 중 오류 발생: {fast_task.exception()}")
+        return None
+    return fast_task.result().strip() or None
 
-    response_queue = q.Queue()
-    request_respond = threading.Thread(target=AI_Response, args=(kakaorequest, response_queue, filename))
-    request_respond.start()
+def startFastAnswer(utterance, max_tokens):
+    # 빠른 답변 풀이 가득 찼으면 생략
+    try:
+        fast_task = asyncio.wrap_future(fast_pool.submit(getFastAnswer, utterance, max_tokens))
+    except PoolOverloaded:
+        return None
+    # 쓰이지 않고 끝난 빠른 답변의 오류가 경고로 남지 않도록 결과를 소비
+    fast_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return fast_task
+
+async def mainChat(kakaorequest):
+    # 동기 핸들러(LLM/RAG 호출)는 워커 풀에서 실행하고 이벤트 루프는 막지 않는다
+    try:
+        future = worker_pool.submit(AI_Response, kakaorequest)
+    except PoolOverloaded:
+        # 대기열이 가득 찼으면 기다리게 하지 않고 바로 재시도 안내
+        DEADLINE_TOTAL.inc(outcome="overload")
+        overload = overloadResponseFormat(kakaorequest["userRequest"]["utterance"])
+        return Response(content=json.dumps(overload), media_type='application/json')
+    task = asyncio.wrap_future(future)
+
+    # 정책에 포함된 명령이면 전체 답변이 FAST_GRACE 안에 끝나지 않을 때 작은 모델의 짧은 답변을 함께 준비
+    utterance = kakaorequest["userRequest"]["utterance"]
+    kind = classifyCommand(utterance)
+    fast_task = None
+    max_tokens = fastAnswerTokens(kind)
 
     target_url = kakaorequest["userRequest"]["callbackUrl"]
-    headers = {"Content-Type": "application/json"}
 
     delayedResponse = {
         "version": "2.0",
@@ -86,40 +286,45 @@ def mainChat(kakaorequest):
         }
     }
 
-    max_wait_time = 3.5
-    response_data = None
-
-    # 최대 3.5초 대기하며 queue 확인
-    while (time.time() - start_time) < max_wait_time:
-        if not response_queue.empty():
-            # 큐가 차있다면 즉시 응답 반환
-            response_data = response_queue.get()
-            break
-        time.sleep(0.1)  # 0.1초 간격으로 큐 상태 확인
-
-    if response_data is not None:
+    # 최대 3.5초 대기 (shield 로 감싸서 타임아웃이 나도 핸들러는 계속 실행)
+    try:
+        remaining = MAX_WAIT_TIME
+        if max_tokens:
+            grace = min(FAST_GRACE, MAX_WAIT_TIME)
+            done, _ = await asyncio.wait({task}, timeout=grace)
+            if not done:
+                fast_task = startFastAnswer(utterance, max_tokens)
+            remaining -= grace
+        await asyncio.wait_for(asyncio.shield(task), timeout=remaining)
         # 3.5초 이내 응답 도착 시 immediateResponse 반환
+        DEADLINE_TOTAL.inc(outcome="sync")
+        tier = "full"
         client_response = Response(content=json.dumps(immediateResponse), media_type='application/json')
-    else:
-        # 3.5초 동안 대기했는데도 응답이 없다면 delayedResponse 반환
-        client_response = Response(content=json.dumps(delayedResponse), media_type='application/json')
-
-    # 반환 후에도 응답이 나중에 들어오면 post_in_background 호출
-    def wait_and_post():
-        if response_data is None:
-            # 아직 응답을 못받은 경우 큐에 응답 들어올 때까지 대기
-            final_response = response_queue.get()
+    except asyncio.TimeoutError:
+        # 3.5초 동안 대기했는데도 응답이 없다면 빠른 답변, 그것도 없으면 delayedResponse 반환
+        DEADLINE_TOTAL.inc(outcome="callback")
+        fast_answer = fastAnswerResult(fast_task)
+        if fast_answer:
+            tier = "fast"
+            delayedResponse["data"]["text"] = f"{fast_answer}\n\n자세한 답변을 이어서 보내드릴게요😘"
         else:
-            # 이미 response_data가 있는 경우 바로 사용
-            final_response = response_data
+            tier = "placeholder"
+        client_response = Response(content=json.dumps(delayedResponse), media_type='application/json')
+    except Exception:
+        # 핸들러 오류는 콜백 태스크가 로그로 남기고 오류 안내 카드를 보낸다
+        DEADLINE_TOTAL.inc(outcome="error")
+        tier = None
+        client_response = Response(content=json.dumps(immediateResponse), media_type='application/json')
 
-        post_in_background(target_url, final_response, headers)
+    if max_tokens and tier is not None:
+        SPECULATIVE_WINS.inc(command=kind, tier=tier)
+    if fast_task is not None:
+        # 전체 답변이 먼저 끝났으면 아직 시작하지 않은 빠른 답변은 취소 (실행 중인 호출은 FAST_TIMEOUT 안에 끝난다)
+        fast_task.cancel()
 
-    threading.Thread(target=wait_and_post).start()
+    # 반환 후에도 응답이 나중에 들어오면 백그라운드 태스크가 콜백으로 전달
+    callback = asyncio.create_task(deliverCallback(task, target_url, utterance))
+    background_tasks.add(callback)
+    callback.add_done_callback(background_tasks.discard)
 
     return client_response
-
-
-
-
-        
\ No newline at end of file
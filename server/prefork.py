@@ -0,0 +1,177 @@
+"""
+pre-fork 멀티 워커 실행
+
+uvicorn --workers 는 워커마다 ko-sbert 임베딩 모델과 FAISS 인덱스를 따로 읽는다.
+이 실행기는 부모 프로세스에서 앱, 임베딩 모델, 벡터 인덱스를 한 번만 읽고
+gc.freeze() 로 고정한 뒤 fork 하므로, 자식 워커들은 그 메모리 페이지를 copy-on-write 로 공유한다.
+듣기 소켓도 부모가 만들어서 자식들이 같은 포트에서 연결을 나눠 받는다.
+
+사용법 (프로젝트 루트에서):
+    python -m server.prefork --workers 4 --port 8000
+"""
+import os
+import gc
+import sys
+import time
+import socket
+import signal
+import logging
+import argparse
+
+# 워커끼리 사용자 상태를 공유하도록 기본 SQLite 저장소 사용 (프로세스별 메모리 저장소 대신)
+os.environ.setdefault("STATE_DB_PATH", os.path.join("data", "conversation_state.db"))
+# fork 후 토크나이저 병렬 처리 교착을 막기 위해 끈다
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import uvicorn
+
+from server.components.metrics import processStats
+
+logger = logging.getLogger("prefork")
+
+
+def formatMemory(stats):
+    mb = lambda v: f"{v / 1024 / 1024:.1f}MB" if v is not None else "-"
+    return f"RSS {mb(stats['rss_bytes'])}, PSS {mb(stats['pss_bytes'])}, USS {mb(stats['uss_bytes'])}"
+
+
+def preload():
+    """fork 전에 부모에서 공유할 객체를 모두 읽어 둔다"""
+    started = time.perf_counter()
+    from server.main import app
+    from server.components.retrievalService import retrieval_service
+    from src.vector_store import get_cached_embedding_model
+
+    timings = {'app_import': time.perf_counter() - started}
+    try:
+        t = time.perf_counter()
+        # 저장된 임베딩 캐시도 여기서 읽어 워커들이 공유한다
+        get_cached_embedding_model()
+        timings['embedding_model'] = time.perf_counter() - t
+        t = time.perf_counter()
+        retrieval_service.load()
+        timings['faiss_index'] = time.perf_counter() - t
+    except Exception as e:
+        # 모델/인덱스가 없어도 서버는 뜨고, 해당 기능은 첫 요청 때 워커마다 다시 시도한다
+        logger.warning(f"임베딩 모델/인덱스 미리 읽기 실패: {e}")
+
+    # 지금까지 만든 객체는 GC 대상에서 빼서 자식의 GC 가 공유 페이지를 건드리지(복사하지) 않게 한다
+    gc.collect()
+    gc.freeze()
+    timings['total'] = time.perf_counter() - started
+    return app, timings
+
+
+def bindSocket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def runWorker(app, sock, index, log_level):
+    """자식 프로세스: 부모가 만든 소켓으로 uvicorn 서버 실행"""
+    forked_at = time.perf_counter()
+
+    async def reportReady():
+        stats = processStats()
+        logger.info(f"워커 {index} (pid {os.getpid()}) 준비 완료: fork 후 {time.perf_counter() - forked_at:.3f}초, "
+                    f"{formatMemory(stats)}")
+
+    app.add_event_handler("startup", reportReady)
+    config = uvicorn.Config(app, log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+class WorkerSupervisor:
+    """워커 프로세스를 fork 하고 비정상 종료된 워커를 다시 띄우는 부모 프로세스 루프"""
+
+    def __init__(self, target, workers):
+        """
+        Args:
+            target: 자식 프로세스에서 실행할 함수 target(index)
+            workers: 워커 수
+        """
+        self.target = target
+        self.workers = workers
+        self.children = {}
+        self.stopping = False
+        self.respawns = 0
+
+    def spawn(self, index):
+        pid = os.fork()
+        if pid == 0:
+            # 자식은 부모의 시그널 핸들러 대신 uvicorn 의 종료 처리를 사용
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                self.target(index)
+            finally:
+                os._exit(0)
+        self.children[pid] = index
+        return pid
+
+    def start(self):
+        for i in range(self.workers):
+            self.spawn(i)
+
+    def stop(self, signum=None, frame=None):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def wait(self):
+        # 워커가 비정상 종료되면 다시 띄운다 (공유 메모리는 부모에 그대로 있으므로 빠르게 뜬다)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = self.children.pop(pid, None)
+            if index is not None and not self.stopping:
+                logger.warning(f"워커 {index} (pid {pid}) 종료됨 (status {status}), 다시 시작합니다")
+                self.spawn(index)
+                self.respawns += 1
+
+    def run(self):
+        self.start()
+        self.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 모델/FAISS 를 공유하는 pre-fork 멀티 워커 서버")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    app, timings = preload()
+    logger.info("부모 미리 읽기 완료: " + ", ".join(f"{k} {v:.2f}초" for k, v in timings.items())
+                + f" / {formatMemory(processStats())}")
+
+    sock = bindSocket(args.host, args.port)
+    supervisor = WorkerSupervisor(lambda index: runWorker(app, sock, index, args.log_level), args.workers)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    signal.signal(signal.SIGINT, supervisor.stop)
+
+    supervisor.start()
+    logger.info(f"{args.workers}개 워커 시작 (http://{args.host}:{args.port})")
+    supervisor.wait()
+
+    sock.close()
+    logger.info("모든 워커 종료")
+
+
+if __name__ == "__main__":
+    main()
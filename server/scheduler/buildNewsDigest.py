@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+'오늘의 뉴스' 요약 미리 만들기 (dailyReporter.py 가 뉴스 인덱스를 만든 직후 실행)
+
+서버 컴포넌트는 파이썬 경로를 건드리지 않으므로 스크립트로 실행할 때 필요한 경로 설정은 여기서 한다.
+"""
+import os
+import sys
+import logging
+
+# 프로젝트 루트 디렉토리를 파이썬 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from server.components.newsDigest import buildDigest
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    result = buildDigest()
+    print(f"오늘의 뉴스 요약 v{result['version']} 생성 완료 ({result['build_seconds']}초)")
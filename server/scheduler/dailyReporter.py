@@ -25,7 +25,9 @@ scripts_to_run = [
     "./src/data_processing/market_data_visualization.py",
     "./src/data_processing/cnn_fear_greed_visualization.py",
     "./src/data_collection/news_api.py",
-    "./server/components/summerize/pick_and_summerize.py"
+    "./server/components/summerize/pick_and_summerize.py",
+    # 뉴스 인덱스가 만들어진 직후 '오늘의 뉴스' 요약을 미리 생성
+    "./buildNewsDigest.py"
 ]
 
 for script in scripts_to_run:
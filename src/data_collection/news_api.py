@@ -323,7 +323,28 @@ class NewsCollector:
         ]
         
         scored_articles.sort(key=lambda x: x[0], reverse=True)
-        return [article for _, article in scored_articles]
+        return self._remove_duplicates([article for _, article in scored_articles])
+
+    def _remove_duplicates(self, articles: List[Dict]) -> List[Dict]:
+        """
+        RSS 와 NewsAPI 에 같이 실린 기사 제거 (점수 순으로 정렬된 목록에서 먼저 나온 것을 남긴다)
+
+        URL(쿼리/끝 슬래시 제외)이나 제목(소문자, 공백 정리)이 같으면 같은 기사로 본다.
+        본문 기준 유사 중복은 벡터 스토어에 저장할 때 다시 검사한다.
+        """
+        seen_urls, seen_titles = set(), set()
+        unique = []
+        for article in articles:
+            url = (article.get('url') or '').split('?')[0].rstrip('/').lower()
+            title = ' '.join((article.get('title') or '').lower().split())
+            if (url and url in seen_urls) or (title and title in seen_titles):
+                continue
+            seen_urls.add(url)
+            seen_titles.add(title)
+            unique.append(article)
+        if len(unique) < len(articles):
+            self.logger.info(f"중복 기사 {len(articles) - len(unique)}개 제거")
+        return unique
 
     def _process_newsapi_articles(self, articles: List[Dict]) -> List[Dict]:
         """NewsAPI 기사 처리"""
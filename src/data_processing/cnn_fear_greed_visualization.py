@@ -47,7 +47,9 @@ import seaborn as sns
 from data_collection.cnn_fear_greed import CNNFearGreedIndex
 from data_collection.yahoo_finance import YahooFinance
 from langchain.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
+from vector_store import get_embedding_model
+from vector_store.partitioned import PartitionedVectorStore
+from data_processing.image_variants import write_variants
 from langchain.docstore.document import Document
 import pprint
 
@@ -133,11 +135,7 @@ class ComprehensiveMarketVisualizer:
 
     def create_market_tables(self) -> Dict[str, go.Figure]:
         # 벡터스페이스 저장을 위한 코드
-        embedding_model = HuggingFaceEmbeddings(
-            model_name='jhgan/ko-sbert-nli',
-            model_kwargs={'device':'cpu'},
-            encode_kwargs={'normalize_embeddings':True},
-        )
+        embedding_model = get_embedding_model()
         
         """카테고리별 시장 데이터 테이블 생성"""
         market_data = self.yahoo_collector.get_market_summary()
@@ -146,10 +144,8 @@ class ComprehensiveMarketVisualizer:
         categorized_data = {
             '주요지수': {}, '국채수익률': {}, '원자재': {}, '기술주': {}
         }
-        # 기존 인덱스 로드
-        db = FAISS.load_local("./db/faiss", embedding_model, allow_dangerous_deserialization=True)
-
-        # 새로운 문서 추가
+        # 오늘 수집한 시장 데이터 문서 (저장은 오늘 날짜 파티션에만)
+        market_docs = []
         for symbol, data in market_data.items():
             if symbol in self.yahoo_collector.indices:
                 categorized_data['주요지수'][symbol] = data
@@ -162,11 +158,14 @@ class ComprehensiveMarketVisualizer:
             # vectorSpace 저장
             print(f"종목코드 : {symbol}, 종목 이름 : {data['name']}, 변동폭 : {data['change_percent']:+.2f}%, 가격 : {data['price']}{data['unit']}, 거래량 : {data['volume']}, 기준시각 : {data['timestamp']}")
 
-            new_docs = [Document(
+            market_docs.append(Document(
                 page_content=f"다음은 주식 종목과 그에 대한 정보이다. 종목코드 : {symbol}, 종목 이름 : {data['name']}, 변동폭 : {data['change_percent']:+.2f}%, 주가 : {data['price']}{data['unit']}, 거래량 : {data['volume']} 기준시각 : {data['timestamp']}"
-            )]
-            db.add_documents(new_docs)
-        db.save_local("./db/faiss")
+            ))
+        # 오늘 파티션의 시장 데이터만 교체하므로 지난 주의 가격 스냅샷과 섞이지 않는다
+        partitioned_store = PartitionedVectorStore("./db/faiss", embedding_model)
+        # 숫자 몇 개만 다른 다른 종목/날짜 행은 유사 중복이 아니므로 완전히 같은 행만 뺀다
+        partitioned_store.write(market_docs, source='market', near_duplicates=False)
+        partitioned_store.maintain()
 
         for category, data in categorized_data.items():
             if data:
@@ -231,6 +230,7 @@ class ComprehensiveMarketVisualizer:
         if save_path:
             plt.savefig(save_path, bbox_inches='tight', dpi=300)
             print(f"차트가 저장되었습니다: {save_path}")
+            write_variants(save_path)
         
         plt.close()
 
@@ -268,6 +268,7 @@ class ComprehensiveMarketVisualizer:
         if save_path:
             plt.savefig(save_path, bbox_inches='tight', dpi=300)
             print(f"반원형 차트가 저장되었습니다: {save_path}")
+            write_variants(save_path)
         
         plt.close()
 
@@ -287,6 +288,7 @@ def main():
     # 대시보드 이미지 저장
     dashboard_path = os.path.join(save_dir, f"dashboard_{timestamp}.png")
     dashboard.write_image(dashboard_path)
+    write_variants(dashboard_path)
     print(f"대시보드 이미지 저장 완료: {dashboard_path}")
 
     print("\n2. 카테고리별 테이블 생성 중...")
@@ -297,6 +299,7 @@ def main():
         # 테이블 이미지 저장
         table_path = os.path.join(save_dir, f"table_{category}_{timestamp}.png")
         table.write_image(table_path)
+        write_variants(table_path)
         print(f"{category} 테이블 이미지 저장 완료: {table_path}")
 
     print("\n3. Fear & Greed 게이지 차트 생성 중...")
@@ -0,0 +1,161 @@
+"""
+차트 이미지 변형본 생성
+
+dpi=300 으로 저장된 원본 PNG 는 수 MB 라서 카카오톡으로 휴대폰에 보내기에는 너무 크다.
+차트를 저장할 때 폭을 줄이고 목표 용량에 맞춘 PNG/WebP/JPEG 변형본을 함께 만든다.
+변형본 파일명에는 내용 해시가 들어가므로 서버는 이 주소를 영구 캐시(immutable)로 내보낼 수 있다.
+
+    market_data/dashboard_20241209.png                          (원본)
+    market_data/variants/dashboard_20241209.3f9a1c2b7e.w1080.jpg (변형본)
+    market_data/variants/manifest.json                           (원본 파일명 -> 변형본 목록)
+"""
+import os
+import io
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from PIL import Image
+
+VARIANT_DIR_NAME = "variants"
+MANIFEST_NAME = "manifest.json"
+
+# 카카오 카드 썸네일/이미지에 충분한 폭
+DEFAULT_WIDTHS = (1080, 720)
+
+# 형식별 확장자와 목표 용량(바이트). 손실 압축 형식은 목표 이하가 될 때까지 품질을 낮춘다
+FORMATS = {
+    'png': {'ext': 'png', 'target_bytes': None},
+    'webp': {'ext': 'webp', 'target_bytes': 120_000},
+    'jpeg': {'ext': 'jpg', 'target_bytes': 180_000},
+}
+QUALITY_STEPS = (85, 75, 65, 55, 45)
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    """형식별로 인코딩. 손실 형식은 목표 용량을 넘지 않는 가장 높은 품질을 고른다"""
+    if fmt == 'png':
+        # 차트는 색 수가 적어서 256색 팔레트로 줄여도 거의 구분되지 않는다
+        buffer = io.BytesIO()
+        image.quantize(colors=256, method=Image.Quantize.FASTOCTREE).save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+
+    target = FORMATS[fmt]['target_bytes']
+    data = b''
+    for quality in QUALITY_STEPS:
+        buffer = io.BytesIO()
+        if fmt == 'jpeg':
+            image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(buffer, format='WEBP', quality=quality, method=4)
+        data = buffer.getvalue()
+        if target is None or len(data) <= target:
+            break
+    return data
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """투명 배경을 흰색으로 채운 RGB 이미지"""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        return background
+    return image.convert('RGB')
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(variant_dir: str) -> Dict:
+    try:
+        with open(os.path.join(variant_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_variants(source_path: str, widths: Iterable[int] = DEFAULT_WIDTHS,
+                   formats: Iterable[str] = tuple(FORMATS), variant_dir: Optional[str] = None) -> Dict:
+    """
+    원본 이미지의 변형본을 만들고 manifest 에 기록
+
+    Args:
+        source_path: 원본 PNG 경로
+        widths: 만들 폭 목록 (원본보다 넓으면 원본 폭 사용)
+        formats: 'png', 'webp', 'jpeg' 중 만들 형식
+        variant_dir: 변형본 저장 디렉토리 (기본값: 원본 옆의 variants/)
+
+    Returns:
+        Dict: manifest 에 기록된 이 원본의 항목
+    """
+    variant_dir = variant_dir or os.path.join(os.path.dirname(source_path), VARIANT_DIR_NAME)
+    os.makedirs(variant_dir, exist_ok=True)
+    filename = os.path.basename(source_path)
+    stem = os.path.splitext(filename)[0]
+
+    with Image.open(source_path) as original:
+        source = _flatten(original)
+
+    variants = {}
+    for width in sorted(set(widths), reverse=True):
+        width = min(width, source.width)
+        if width in variants:
+            continue
+        height = round(source.height * width / source.width)
+        resized = source.resize((width, height), Image.Resampling.LANCZOS) if width < source.width else source
+        variants[width] = {}
+        for fmt in formats:
+            data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            variant_name = f"{stem}.{digest}.w{width}.{FORMATS[fmt]['ext']}"
+            variant_path = os.path.join(variant_dir, variant_name)
+            if not os.path.exists(variant_path):
+                _write_atomic(variant_path, data)
+            variants[width][fmt] = {'file': variant_name, 'bytes': len(data)}
+
+    entry = {
+        'source_bytes': os.path.getsize(source_path),
+        'created_at': datetime.now().isoformat(),
+        'variants': {str(width): files for width, files in variants.items()},
+    }
+
+    manifest = load_manifest(variant_dir)
+    previous = manifest.get(filename)
+    manifest[filename] = entry
+    _write_atomic(os.path.join(variant_dir, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    # 같은 원본으로 만들었던 예전 변형본은 지운다 (새 주소가 manifest 에 반영된 뒤)
+    if previous:
+        current = {v['file'] for files in entry['variants'].values() for v in files.values()}
+        for files in previous.get('variants', {}).values():
+            for v in files.values():
+                if v['file'] not in current:
+                    try:
+                        os.remove(os.path.join(variant_dir, v['file']))
+                    except OSError:
+                        pass
+
+    smallest = min(v['bytes'] for files in entry['variants'].values() for v in files.values())
+    logger.info(f"{filename} 변형본 생성: 원본 {entry['source_bytes']:,}B -> 최소 {smallest:,}B")
+    return entry
+
+
+if __name__ == "__main__":
+    # 이미 저장된 차트들의 변형본 일괄 생성: python src/data_processing/image_variants.py market_data
+    import sys
+    import glob
+
+    logging.basicConfig(level=logging.INFO)
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else "market_data"
+    for path in sorted(glob.glob(os.path.join(target_dir, "*.png"))):
+        write_variants(path)
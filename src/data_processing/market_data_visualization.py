@@ -15,6 +15,7 @@ import numpy as np
 import yfinance as yf
 import matplotlib.pyplot as plt
 from src.data_collection.yahoo_finance import YahooFinance
+from src.data_processing.image_variants import write_variants
 
 class MarketVisualizer:
     def __init__(self, output_dir: str = "market_data"):
@@ -48,6 +49,8 @@ class MarketVisualizer:
         plt.savefig(filepath, bbox_inches='tight', dpi=300, facecolor='white')
         plt.close()
         print(f"차트가 저장되었습니다: {filepath}")
+        # 카카오 카드용 축소 변형본 생성
+        write_variants(filepath)
         return filepath
 
     def create_market_dashboard(self, save: bool = True) -> str:
@@ -0,0 +1,28 @@
+# src/vector_store/__init__.py
+
+from .embeddings import EMBEDDING_MODEL_NAME, get_embedding_model
+from .store_io import load_store, save_store_atomic
+from .embedding_cache import EmbeddingCache, CachedEmbeddings, get_embedding_cache, get_cached_embedding_model
+from .index_builder import INDEX_TYPES, build_index, describe_index, index_config_from_env, rebuild_index
+from .search import batched_search, embed_queries, lookup_symbols
+from .text import normalize_text
+
+__all__ = [
+    'EMBEDDING_MODEL_NAME',
+    'get_embedding_model',
+    'EmbeddingCache',
+    'CachedEmbeddings',
+    'get_embedding_cache',
+    'get_cached_embedding_model',
+    'load_store',
+    'save_store_atomic',
+    'INDEX_TYPES',
+    'build_index',
+    'describe_index',
+    'index_config_from_env',
+    'rebuild_index',
+    'batched_search',
+    'embed_queries',
+    'lookup_symbols',
+    'normalize_text'
+]
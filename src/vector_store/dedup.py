@@ -0,0 +1,234 @@
+# src/vector_store/dedup.py
+
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FILE = 'fingerprints.sqlite3'
+
+SIMHASH_BITS = 64
+# 64비트를 16비트 밴드 4개로 나눈다. 해밍 거리 3 이하인 두 SimHash 는 적어도 한 밴드가 같다 (비둘기집 원리)
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+SHINGLE_SIZE = 4
+# 이보다 짧은 본문은 shingle 이 적어 SimHash 가 우연히 가까울 수 있으므로 완전 중복만 검사한다
+NEAR_MIN_CHARS = 50
+MAX_DISTANCE = min(int(os.getenv("DEDUP_MAX_DISTANCE", "3")), BANDS - 1)
+
+_BIT_SHIFTS = np.arange(SIMHASH_BITS, dtype=np.uint64)
+
+
+class Fingerprint(NamedTuple):
+    hash: str       # 정규화한 본문의 SHA-256 (완전 중복)
+    simhash: int    # 문자 shingle SimHash (유사 중복)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """정규화한 본문의 문자 4-gram SimHash (한국어는 조사가 붙어 단어 단위보다 문자 단위가 안정적이다)"""
+    text = normalize_text(text)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = Counter([text])
+    else:
+        shingles = Counter(text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1))
+    hashes = np.array([int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+                       for s in shingles], dtype=np.uint64)
+    weights = np.array(list(shingles.values()), dtype=np.int64)
+    bits = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).astype(np.int64)
+    votes = ((bits * 2 - 1) * weights[:, None]).sum(axis=0)
+    return int(sum(1 << int(i) for i in np.nonzero(votes > 0)[0]))
+
+
+def fingerprint(text: str) -> Fingerprint:
+    return Fingerprint(content_hash(text), simhash(text))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def bands(value: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (i * BAND_BITS)) & mask for i in range(BANDS)]
+
+
+def _signed(value: int) -> int:
+    # SQLite INTEGER 는 부호 있는 64비트이다
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class DuplicateFilter:
+    """한 배치 안의 중복 검사 (메모리, 밴드별 해시 테이블)"""
+
+    def __init__(self, near_duplicates: bool = True, max_distance: int = MAX_DISTANCE):
+        self.near_duplicates = near_duplicates
+        self.max_distance = max_distance
+        self._hashes = set()
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+
+    def check(self, fp: Fingerprint, near_duplicates: bool = True) -> Optional[str]:
+        """중복이면 'exact' / 'near', 아니면 None"""
+        if fp.hash in self._hashes:
+            return 'exact'
+        if self.near_duplicates and near_duplicates:
+            for table, value in zip(self._bands, bands(fp.simhash)):
+                if any(hamming(fp.simhash, other) <= self.max_distance for other in table.get(value, ())):
+                    return 'near'
+        return None
+
+    def add_hash(self, fp: Fingerprint):
+        self._hashes.add(fp.hash)
+
+    def add(self, fp: Fingerprint):
+        self._hashes.add(fp.hash)
+        for table, value in zip(self._bands, bands(fp.simhash)):
+            table.setdefault(value, []).append(fp.simhash)
+
+
+class FingerprintIndex:
+    """
+    벡터 스토어에 저장된 문서의 지문 (SQLite)
+
+    (kind, hash) 마다 한 행이고, 어느 파티션의 어느 source(news/market) 로 저장됐는지 같이 기록한다.
+    kind 는 'chunk'(임베딩한 청크) 또는 'article'(번역 전 원문 기사) 이다.
+    유사 중복 후보는 밴드 값 인덱스로 찾고 해밍 거리로 확인한다.
+    """
+
+    def __init__(self, path: str, max_distance: int = MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "kind TEXT NOT NULL, hash TEXT NOT NULL, simhash INTEGER NOT NULL, "
+            "band0 INTEGER NOT NULL, band1 INTEGER NOT NULL, band2 INTEGER NOT NULL, band3 INTEGER NOT NULL, "
+            "partition TEXT NOT NULL, source TEXT NOT NULL, PRIMARY KEY (kind, hash))"
+        )
+        for i in range(BANDS):
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS fingerprints_band{i} ON fingerprints (kind, band{i})")
+        self._db.execute("CREATE INDEX IF NOT EXISTS fingerprints_scope ON fingerprints (partition, source)")
+
+    def find(self, fp: Fingerprint, kind: str = 'chunk', exclude: Tuple[str, str] = None,
+             near_duplicates: bool = True) -> Optional[Tuple[str, str, str]]:
+        """
+        이미 저장된 같은/비슷한 문서 찾기
+
+        Args:
+            exclude: 검사에서 뺄 (파티션, source). 다시 쓰는 중인 범위의 문서는 교체될 것이므로 중복으로 보지 않는다
+
+        Returns:
+            ('exact' 또는 'near', 파티션, source) 또는 None
+        """
+        partition, source = exclude or ('', '')
+        with self._lock:
+            row = self._db.execute(
+                "SELECT partition, source FROM fingerprints WHERE kind = ? AND hash = ? "
+                "AND NOT (partition = ? AND source = ?)", (kind, fp.hash, partition, source)
+            ).fetchone()
+            if row:
+                return ('exact',) + tuple(row)
+            if not near_duplicates:
+                return None
+            values = bands(fp.simhash)
+            rows = self._db.execute(
+                "SELECT simhash, partition, source FROM fingerprints WHERE kind = ? "
+                "AND (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?) AND NOT (partition = ? AND source = ?)",
+                (kind, *values, partition, source)
+            ).fetchall()
+        for other, other_partition, other_source in rows:
+            if hamming(fp.simhash, _unsigned(other)) <= self.max_distance:
+                return 'near', other_partition, other_source
+        return None
+
+    def replace(self, partition: str, source: str, fingerprints: Iterable[Fingerprint], kind: str = 'chunk'):
+        """(파티션, source) 범위의 kind 지문을 새 지문들로 교체"""
+        rows = [(kind, fp.hash, _signed(fp.simhash), *bands(fp.simhash), partition, source) for fp in fingerprints]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM fingerprints WHERE kind = ? AND partition = ? AND source = ?",
+                                 (kind, partition, source))
+                self._db.executemany("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def move(self, partitions: Sequence[str], target: str):
+        """파티션 압축 후 지문의 파티션 이름 변경"""
+        with self._lock:
+            self._db.executemany("UPDATE fingerprints SET partition = ? WHERE partition = ?",
+                                 [(target, name) for name in partitions])
+
+    def drop(self, partitions: Sequence[str]):
+        """삭제한 파티션의 지문 제거 (보관 기간이 지난 뒤 같은 기사가 다시 나오면 새로 저장된다)"""
+        with self._lock:
+            self._db.executemany("DELETE FROM fingerprints WHERE partition = ?", [(name,) for name in partitions])
+
+    def count(self, kind: str = None) -> int:
+        with self._lock:
+            if kind is None:
+                return self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+            return self._db.execute("SELECT COUNT(*) FROM fingerprints WHERE kind = ?", (kind,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def deduplicate(texts: Sequence[str], index: Optional[FingerprintIndex] = None, kind: str = 'chunk',
+                scope: Tuple[str, str] = None, near_duplicates: bool = True) -> Tuple[List[int], List[Fingerprint], Dict]:
+    """
+    배치 안 중복과 이미 저장된 문서와의 중복을 뺀 위치 목록
+
+    Args:
+        texts: 검사할 본문들 (앞에 있는 것을 남긴다)
+        index: 저장된 문서 지문 (없으면 배치 안에서만 검사)
+        kind: 지문 종류 ('chunk' / 'article')
+        scope: 지금 다시 쓰는 (파티션, source). 이 범위의 기존 지문은 중복으로 보지 않는다
+        near_duplicates: SimHash 유사 중복도 제거할지 (숫자 몇 개만 다른 시장 데이터 행은 False)
+
+    Returns:
+        (남길 위치 목록, 남긴 문서의 지문, {'input', 'exact', 'near', 'kept'})
+    """
+    batch = DuplicateFilter(near_duplicates, index.max_distance if index else MAX_DISTANCE)
+    kept, fingerprints = [], []
+    report = {'input': len(texts), 'exact': 0, 'near': 0, 'kept': 0}
+    for position, text in enumerate(texts):
+        fp = fingerprint(text)
+        near = near_duplicates and len(normalize_text(text)) >= NEAR_MIN_CHARS
+        duplicate = batch.check(fp, near)
+        if duplicate is None and index is not None:
+            found = index.find(fp, kind, exclude=scope, near_duplicates=near)
+            duplicate = found[0] if found else None
+        if duplicate:
+            report[duplicate] += 1
+            # 같은 본문이 또 나오면 완전 중복으로 센다
+            batch.add_hash(fp)
+            continue
+        batch.add(fp)
+        kept.append(position)
+        fingerprints.append(fp)
+    report['kept'] = len(kept)
+    return kept, fingerprints, report
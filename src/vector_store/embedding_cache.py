@@ -0,0 +1,198 @@
+# src/vector_store/embedding_cache.py
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .embeddings import EMBEDDING_MODEL_NAME, get_embedding_model
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    질문 임베딩 LRU 캐시
+
+    키는 (모델 이름, 정규화된 문장), 값은 float32 벡터이다.
+    벡터는 (capacity, dim) 행렬 한 개에 slot 단위로 저장하고, 벡터 바이트 합이 max_bytes 를 넘지 않도록
+    가장 오래 안 쓰인 slot 을 재사용한다.
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, max_bytes: int = None, path: str = None):
+        """
+        Args:
+            model_name: 임베딩 모델 이름 (다른 모델의 벡터와 섞이지 않도록 키에 포함)
+            max_bytes: 벡터 저장에 쓸 최대 메모리 (기본값: 환경변수 EMBEDDING_CACHE_MAX_BYTES 또는 4MB)
+            path: 재시작 후에도 쓰도록 저장할 .npz 파일 (기본값: 환경변수 EMBEDDING_CACHE_PATH, 없으면 메모리만 사용)
+        """
+        self.model_name = model_name
+        self.max_bytes = max_bytes or int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH")
+
+        self._lock = threading.Lock()
+        # 키 -> (slot, 임베딩에 걸린 시간). 맨 앞이 가장 오래 안 쓰인 항목
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._vectors = None          # (capacity, dim) float32 행렬
+        self._free: List[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.cpu_seconds_saved = 0.0
+        if self.path:
+            self.load(self.path)
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}\x00{normalize_text(text)}"
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            slot, cost = entry
+            # 적중하면 모델 추론(CPU) 시간만큼 아낀 것으로 본다
+            self.cpu_seconds_saved += cost
+            return self._vectors[slot].copy()
+
+    def put(self, text: str, vector, cost: float = 0.0):
+        """
+        Args:
+            text: 임베딩한 문장
+            vector: 임베딩 벡터
+            cost: 이 벡터를 만드는 데 걸린 시간(초). 적중 때마다 cpu_seconds_saved 에 더한다
+        """
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        key = self._key(text)
+        with self._lock:
+            if self._vectors is None:
+                capacity = self.max_bytes // vector.nbytes
+                if capacity < 1:
+                    return
+                self._vectors = np.zeros((capacity, vector.shape[0]), dtype=np.float32)
+                self._free = list(range(capacity - 1, -1, -1))
+            elif vector.shape[0] != self._vectors.shape[1]:
+                return
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                slot = entry[0]
+            elif self._free:
+                slot = self._free.pop()
+            else:
+                _, (slot, _) = self._entries.popitem(last=False)
+                self.evicted += 1
+            self._vectors[slot] = vector
+            self._entries[key] = (slot, cost)
+
+    def save(self, path: str = None):
+        """캐시 내용을 .npz 로 저장 (임시 파일에 쓴 뒤 교체)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            slots = [self._entries[k][0] for k in keys]
+            costs = np.array([self._entries[k][1] for k in keys], dtype=np.float64)
+            vectors = self._vectors[slots] if keys else np.zeros((0, 0), dtype=np.float32)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors, costs=costs)
+        os.replace(tmp_path, path)
+        logger.info(f"임베딩 캐시 저장 완료: {path} ({len(keys)}개)")
+
+    def load(self, path: str) -> int:
+        """저장된 캐시 읽기 (파일이 없거나 깨졌으면 빈 캐시로 시작)"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys, vectors, costs = data['keys'], data['vectors'], data['costs']
+        except (OSError, ValueError, KeyError):
+            return 0
+        loaded = 0
+        # 오래 안 쓰인 것부터 넣어서 LRU 순서를 유지한다 (모델이 바뀐 항목은 키가 달라 자연히 밀려난다)
+        for key, vector, cost in zip(keys, vectors, costs):
+            model_name, _, text = str(key).partition("\x00")
+            if model_name == self.model_name:
+                self.put(text, vector, float(cost))
+                loaded += 1
+        return loaded
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'capacity': len(self._vectors) if self._vectors is not None else None,
+                'bytes': len(self._entries) * self._vectors.itemsize * self._vectors.shape[1] if self._entries else 0,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evicted': self.evicted,
+                'cpu_seconds_saved': round(self.cpu_seconds_saved, 3),
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """EmbeddingCache 를 거쳐 가는 임베딩 모델 (질문 임베딩용, 문서 인덱싱에는 원래 모델을 쓴다)"""
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(text)
+        if vector is None:
+            started = time.perf_counter()
+            vector = self.base.embed_query(text)
+            self.cache.put(text, vector, time.perf_counter() - started)
+        return np.asarray(vector, dtype=np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [self.cache.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # 캐시에 없는 문장만 모아서 한 번에 임베딩
+            started = time.perf_counter()
+            computed = self.base.embed_documents([texts[i] for i in missing])
+            cost = (time.perf_counter() - started) / len(missing)
+            for i, vector in zip(missing, computed):
+                self.cache.put(texts[i], vector, cost)
+                vectors[i] = vector
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in vectors]
+
+
+_lock = threading.Lock()
+_embedding_cache = None
+_cached_model = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """프로세스 공용 질문 임베딩 캐시 (모델은 읽지 않는다)"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache()
+    return _embedding_cache
+
+
+def get_cached_embedding_model() -> CachedEmbeddings:
+    """공용 ko-sbert 모델 앞에 공용 임베딩 캐시를 붙인 질문 임베딩 모델"""
+    global _cached_model
+    if _cached_model is None:
+        cache = get_embedding_cache()
+        with _lock:
+            if _cached_model is None:
+                _cached_model = CachedEmbeddings(get_embedding_model(), cache)
+    return _cached_model
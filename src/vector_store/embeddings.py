@@ -0,0 +1,25 @@
+# src/vector_store/embeddings.py
+
+import threading
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# 뉴스/시장 데이터 벡터 스페이스와 질문 임베딩에 공통으로 사용하는 모델
+EMBEDDING_MODEL_NAME = 'jhgan/ko-sbert-nli'
+
+_lock = threading.Lock()
+_embedding_model = None
+
+
+def get_embedding_model() -> HuggingFaceEmbeddings:
+    """프로세스당 한 번만 로드하는 ko-sbert 임베딩 모델"""
+    global _embedding_model
+    if _embedding_model is None:
+        with _lock:
+            if _embedding_model is None:
+                _embedding_model = HuggingFaceEmbeddings(
+                    model_name=EMBEDDING_MODEL_NAME,
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True},
+                )
+    return _embedding_model
@@ -0,0 +1,180 @@
+# src/vector_store/index_builder.py
+
+import os
+import math
+import logging
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ('flat', 'hnsw', 'ivf', 'sq8', 'pq', 'opq')
+# 벡터를 압축해서 저장하는 종류 (원본 float32 벡터는 재정렬용으로 따로 저장)
+COMPRESSED_TYPES = ('sq8', 'pq', 'opq')
+
+
+def index_config_from_env() -> Dict:
+    """
+    환경변수로 정한 인덱스 설정
+
+    FAISS_INDEX_TYPE: flat(기본값, 전수 검색) / hnsw / ivf / sq8(int8 스칼라 양자화) / pq / opq(회전 + PQ)
+    FAISS_HNSW_M, FAISS_HNSW_EF_CONSTRUCTION, FAISS_HNSW_EF_SEARCH: HNSW 그래프 연결 수, 구축/검색 탐색 폭
+    FAISS_IVF_NLIST, FAISS_IVF_NPROBE: IVF 클러스터 수(0 이면 문서 수로 자동 결정), 검색할 클러스터 수
+    FAISS_PQ_M: PQ 부분 벡터 수 (벡터당 바이트 수, 차원의 약수로 맞춘다)
+    """
+    index_type = os.getenv("FAISS_INDEX_TYPE", "flat").lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"알 수 없는 FAISS_INDEX_TYPE 값: {index_type}")
+    return {
+        'index_type': index_type,
+        'hnsw_m': int(os.getenv("FAISS_HNSW_M", "32")),
+        'ef_construction': int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80")),
+        'ef_search': int(os.getenv("FAISS_HNSW_EF_SEARCH", "64")),
+        'nlist': int(os.getenv("FAISS_IVF_NLIST", "0")),
+        'nprobe': int(os.getenv("FAISS_IVF_NPROBE", "8")),
+        'pq_m': int(os.getenv("FAISS_PQ_M", "48")),
+    }
+
+
+def default_nlist(n: int) -> int:
+    """문서 수에 맞춘 IVF 클러스터 수 (약 4*sqrt(n), 클러스터당 학습 벡터 39개 이상)"""
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def pq_subquantizers(dim: int, pq_m: int) -> int:
+    """pq_m 이하에서 차원을 나누어떨어지게 하는 가장 큰 부분 벡터 수"""
+    return next(m for m in range(min(pq_m, dim), 0, -1) if dim % m == 0)
+
+
+def pq_nbits(n: int) -> int:
+    """부분 벡터당 코드 비트 수 (코드북 크기 2^nbits 마다 학습 벡터 39개 이상, 최대 8비트)"""
+    return max(1, min(8, int(math.log2(max(n // 39, 2)))))
+
+
+def build_index(vectors: np.ndarray, index_type: str = 'flat', hnsw_m: int = 32, ef_construction: int = 80,
+                ef_search: int = 64, nlist: int = 0, nprobe: int = 8, pq_m: int = 48) -> faiss.Index:
+    """
+    벡터로 FAISS 인덱스 생성 (IVF 는 주어진 벡터로 학습)
+
+    거리는 LangChain FAISS 기본값과 같은 L2 이다. 벡터가 정규화되어 있으므로 순위는 코사인 유사도와 같다.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    if index_type == 'flat':
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dim, hnsw_m)
+        index.hnsw.efConstruction = ef_construction
+    elif index_type == 'ivf':
+        nlist = min(nlist, n) if nlist else default_nlist(n)
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, max(1, nlist))
+        index.train(vectors)
+    elif index_type == 'sq8':
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+        index.train(vectors)
+    elif index_type in ('pq', 'opq'):
+        m, nbits = pq_subquantizers(dim, pq_m), pq_nbits(n)
+        index = faiss.IndexPQ(dim, m, nbits)
+        if index_type == 'opq':
+            # OPQ 회전 학습에도 같은 비트 수를 써서 문서가 적을 때 학습이 실패하지 않게 한다
+            opq = faiss.OPQMatrix(dim, m)
+            training_pq = faiss.ProductQuantizer(dim, m, nbits)
+            opq.pq = training_pq
+            index = faiss.IndexPreTransform(opq, index)
+        index.train(vectors)
+    else:
+        raise ValueError(f"알 수 없는 인덱스 종류: {index_type}")
+    index.add(vectors)
+    if index_type == 'ivf':
+        # 이웃 확장(reconstruct)을 위해 위치 -> 벡터 직접 매핑 유지
+        index.make_direct_map()
+    configure_search(index, nprobe=nprobe, ef_search=ef_search)
+    return index
+
+
+def configure_search(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> faiss.Index:
+    """검색 시 정확도/속도 조절 값 적용 (인덱스를 다시 만들 필요 없음)"""
+    if nprobe and isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe, index.nlist)
+    if ef_search and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def configure_search_from_env(index: faiss.Index) -> faiss.Index:
+    """FAISS_IVF_NPROBE / FAISS_HNSW_EF_SEARCH 가 설정되어 있으면 읽은 인덱스에 적용"""
+    nprobe = os.getenv("FAISS_IVF_NPROBE")
+    ef_search = os.getenv("FAISS_HNSW_EF_SEARCH")
+    return configure_search(index, nprobe=int(nprobe) if nprobe else None, ef_search=int(ef_search) if ef_search else None)
+
+
+def is_compressed(index: faiss.Index) -> bool:
+    return isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexPQ, faiss.IndexPreTransform))
+
+
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    """인덱스에 저장된 벡터 전체 (재학습/재구축용, 압축 인덱스면 복원한 근사 벡터)"""
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def store_vectors(store: FAISS) -> np.ndarray:
+    """
+    벡터 스토어의 원본(float32) 벡터 전체
+
+    압축 인덱스면 따로 저장해 둔 원본 벡터를 쓰고, 그 뒤에 add_documents 로 추가된 문서는 다시 임베딩한다.
+    """
+    index = store.index
+    if not is_compressed(index):
+        return index_vectors(index)
+    exact = getattr(store, 'exact_vectors', None)
+    known = 0 if exact is None else min(len(exact), index.ntotal)
+    parts = [np.asarray(exact[:known], dtype=np.float32)] if known else []
+    if known < index.ntotal:
+        texts = [store.docstore.search(store.index_to_docstore_id[i]).page_content for i in range(known, index.ntotal)]
+        parts.append(np.asarray(store.embeddings.embed_documents(texts), dtype=np.float32))
+    return np.vstack(parts)
+
+
+def describe_index(index: faiss.Index) -> Dict:
+    """인덱스 종류/설정과 메모리에 올라가는 벡터당 바이트 수 (HNSW 는 0층 연결 포함 근사값)"""
+    info = {'type': 'flat', 'vectors': index.ntotal, 'dim': index.d, 'bytes_per_vector': index.d * 4}
+    if isinstance(index, faiss.IndexHNSW):
+        info.update(type='hnsw', m=index.hnsw.nb_neighbors(1), ef_search=index.hnsw.efSearch,
+                    bytes_per_vector=index.d * 4 + index.hnsw.nb_neighbors(0) * 4)
+    elif isinstance(index, faiss.IndexIVF):
+        info.update(type='ivf', nlist=index.nlist, nprobe=index.nprobe)
+    elif isinstance(index, faiss.IndexScalarQuantizer):
+        info.update(type='sq8', bytes_per_vector=index.sa_code_size())
+    elif is_compressed(index):
+        info.update(type='opq' if isinstance(index, faiss.IndexPreTransform) else 'pq',
+                    bytes_per_vector=index.sa_code_size())
+    return info
+
+
+def rebuild_index(store: FAISS, **config) -> FAISS:
+    """
+    벡터 스토어의 인덱스를 설정한 종류로 다시 만든다 (기존 벡터를 그대로 쓰므로 압축 인덱스에 새로 추가된 문서 외에는 다시 임베딩하지 않는다)
+
+    from_documents / add_documents 는 항상 flat 인덱스에 추가하므로 저장 직전에 호출한다.
+    flat 설정이고 이미 flat 이면 그대로 돌려준다.
+
+    Args:
+        store: FAISS 벡터 스토어
+        **config: build_index 인자 (기본값: index_config_from_env())
+    """
+    config = {**index_config_from_env(), **config}
+    if config['index_type'] == 'flat' and describe_index(store.index)['type'] == 'flat':
+        return store
+    if store.index.ntotal == 0:
+        return store
+    vectors = store_vectors(store)
+    store.index = build_index(vectors, **config)
+    # 압축 인덱스는 상위 후보 재정렬용 원본 벡터를 같이 저장한다 (save_store_atomic 이 vectors.npy 로 기록)
+    store.exact_vectors = vectors if config['index_type'] in COMPRESSED_TYPES else None
+    logger.info(f"FAISS 인덱스 재구축: {describe_index(store.index)}")
+    return store
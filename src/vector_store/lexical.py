@@ -0,0 +1,273 @@
+# src/vector_store/lexical.py
+
+import os
+import re
+import math
+import threading
+import unicodedata
+from collections import Counter
+from itertools import chain, zip_longest
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .mmap_store import SqliteDocstore
+from .text import normalize_text
+
+# 한글 이름 / 영문 이름 / 티커를 같은 대상으로 묶은 별칭 표 (시장 데이터 문서는 "종목코드 : NVDA, 종목 이름 : NVIDIA" 형식)
+ALIAS_GROUPS = [
+    ("나스닥", "NASDAQ", "^IXIC"),
+    ("S&P 500", "S&P500", "에스앤피", "^GSPC"),
+    ("다우존스", "다우", "Dow Jones", "^DJI"),
+    ("러셀", "Russell 2000", "^RUT"),
+    ("변동성 지수", "공포지수", "VIX", "^VIX"),
+    ("닛케이", "Nikkei 225", "^N225"),
+    ("엔비디아", "NVIDIA", "NVDA"),
+    ("애플", "Apple", "AAPL"),
+    ("마이크로소프트", "Microsoft", "MSFT"),
+    ("구글", "알파벳", "Alphabet", "GOOGL"),
+    ("아마존", "Amazon", "AMZN"),
+    ("메타", "Meta", "META"),
+    ("테슬라", "Tesla", "TSLA"),
+    ("국채", "Treasury", "10 Year Treasury", "^TNX"),
+    ("금값", "금 가격", "Gold", "GC=F"),
+    ("은값", "Silver", "SI=F"),
+    ("원유", "유가", "WTI Oil", "CL=F"),
+    ("천연가스", "Natural Gas", "NG=F"),
+    ("구리", "Copper", "HG=F"),
+    ("연준", "Fed", "FOMC", "연방준비제도"),
+    ("기준금리", "금리", "interest rate"),
+    ("인플레이션", "물가", "CPI", "inflation"),
+]
+
+# 시장 데이터 문서에서 티커와 종목 이름 추출
+MARKET_ROW = re.compile(r'종목코드\s*:\s*([^\s,]+)\s*,\s*종목 이름\s*:\s*([^,]+?)\s*,')
+# 티커/이름만 묻는 질문에 같이 쓰이는 말 (이 말과 조사만 남으면 임베딩 없이 종목 행을 바로 돌려준다)
+QUOTE_WORDS = ('주가', '가격', '시세', '현재가', '종가', '지수', '수익률', '변동폭', '거래량', '얼마', '어때', '어떄',
+               '알려줘', '알려', '줘', '좀', '오늘', '지금', '현재', '요즘', 'price', 'quote', 'now', 'today')
+PARTICLES = ('인가요', '이야', '예요', '에요', '인가', '하고', '은', '는', '이', '가', '을', '를', '의', '도', '요', '야',
+             '과', '와', '랑', '및', 'and')
+
+_LATIN = re.compile(r'\^?[a-z0-9]+(?:[=&.\-][a-z0-9]+)*')
+_HANGUL = re.compile(r'[가-힣]+')
+# 종목 사전용 단어 (대소문자 유지, 티커의 ^ = & . - 포함)
+_SYMBOL_WORD = re.compile(r'\^?[A-Za-z0-9]+(?:[=&.\-][A-Za-z0-9]+)*|[가-힣]+')
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1").lower() not in ("0", "false", "no")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    BM25 토큰 (영문/숫자/티커는 단어 단위, 한글은 글자 bigram)
+
+    한글은 조사가 붙어도("엔비디아의") 같은 bigram 이 나오도록 글자 bigram 으로 나누고,
+    ^GSPC 같은 티커는 ^ 를 뺀 토큰도 같이 넣는다.
+    """
+    text = normalize_text(text)
+    tokens = []
+    for token in _LATIN.findall(text):
+        tokens.append(token)
+        if token.startswith('^'):
+            tokens.append(token[1:])
+    for run in _HANGUL.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def symbol_key(text: str) -> str:
+    """종목 이름/별칭 비교용 키 (단어만 남기고 소문자, 공백 하나로)"""
+    return ' '.join(_SYMBOL_WORD.findall(unicodedata.normalize('NFKC', text or ''))).lower()
+
+
+_PARTICLE_SET = frozenset(PARTICLES)
+_PARTICLE_LENGTHS = sorted({len(particle) for particle in PARTICLES}, reverse=True)
+
+
+def _strip_particle(word: str) -> str:
+    for length in _PARTICLE_LENGTHS:
+        if len(word) > length and word[-length:] in _PARTICLE_SET:
+            return word[:-length]
+    return word
+
+
+class LexicalIndex:
+    """
+    청크 본문 역색인 (BM25) + 티커/종목 이름 사전
+
+    FAISS 위치와 같은 순서로 만든다. 시장 데이터 행은 거의 같은 템플릿 문장이라 임베딩으로는 종목이 잘 구분되지 않으므로
+    티커·종목 이름·별칭으로 그 행의 위치를 바로 찾는다.
+    """
+
+    def __init__(self, texts: Iterable[str], aliases: Sequence[Sequence[str]] = ALIAS_GROUPS,
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        postings: Dict[str, Tuple[list, list]] = {}
+        lengths = []
+        symbols: Dict[str, List[int]] = {}
+        # 본문은 한 번씩만 읽고 버리므로 generator 로 넘겨도 된다
+        for position, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                entry = postings.setdefault(token, ([], []))
+                entry[0].append(position)
+                entry[1].append(tf)
+            for ticker, name in MARKET_ROW.findall(text):
+                symbols.setdefault(ticker, []).append(position)
+                symbols.setdefault(f"name:{normalize_text(name)}", []).append(position)
+
+        self.size = len(lengths)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        avgdl = float(lengths.mean()) if self.size else 0.0
+        # 문서 길이 정규화 항은 문서마다 한 번만 계산해 둔다
+        self._norm = (k1 * (1 - b + b * lengths / avgdl)).astype(np.float32) if avgdl else lengths
+        self._postings = {}
+        for token, (positions, tfs) in postings.items():
+            idf = math.log(1 + (self.size - len(positions) + 0.5) / (len(positions) + 0.5))
+            self._postings[token] = (np.asarray(positions, dtype=np.int64), np.asarray(tfs, dtype=np.float32), idf)
+
+        self._build_symbols(symbols, aliases)
+
+    def _build_symbols(self, symbols: Dict[str, List[int]], aliases):
+        """
+        티커 / 종목 이름·별칭 -> 종목 행 위치 (최근에 추가된 행이 앞)
+
+        티커는 대소문자를 구분하고(C, MS, NOW 같은 짧은 티커가 일반 단어에 걸리지 않도록),
+        종목 이름과 별칭은 symbol_key 로 비교한다.
+        """
+        tickers, names = {}, {}
+        for key, positions in symbols.items():
+            positions = sorted(set(positions), reverse=True)
+            if key.startswith('name:'):
+                names[symbol_key(key[5:])] = positions
+            else:
+                tickers[key] = positions
+                if key.startswith('^'):
+                    tickers.setdefault(key[1:], positions)
+        for group in aliases:
+            rows = next((tickers.get(alias) or names.get(symbol_key(alias)) for alias in group
+                         if alias in tickers or symbol_key(alias) in names), None)
+            if rows is None:
+                continue
+            for alias in group:
+                if ' ' not in alias and (alias.isupper() or alias.startswith('^')):
+                    tickers.setdefault(alias, rows)
+                if not alias.isascii() or (len(alias) > 3 and not alias.startswith('^') and '=' not in alias):
+                    names.setdefault(symbol_key(alias), rows)
+        self._tickers, self._names = tickers, names
+        # 여러 단어 이름은 첫 단어가 맞을 때만 이어 붙여 본다
+        self._name_heads = {key.split(' ', 1)[0] for key in names if ' ' in key}
+        self._max_words = max((key.count(' ') + 1 for key in names), default=1)
+
+    def match_symbols(self, query: str) -> Tuple[List[int], List[str]]:
+        """
+        질문에 나온 티커/종목 이름의 행 위치와 종목이 아닌 나머지 단어들
+
+        단어 단위 사전 조회만 하므로 정규식 스캔이나 임베딩이 필요 없다. 여러 단어 이름("FTSE 100")을 티커보다 먼저 맞추고,
+        한글 단어는 조사를 뗀 형태("엔비디아의" -> "엔비디아")로도 찾는다.
+        종목이 여럿이면 종목별 최신 행부터 번갈아 놓는다 (한 종목의 여러 날 행이 상위 k 를 다 차지하지 않도록).
+        """
+        words = _SYMBOL_WORD.findall(unicodedata.normalize('NFKC', query or ''))
+        groups, rest = [], []
+        i = 0
+        while i < len(words):
+            word, rows = words[i].lower(), None
+            if word in self._name_heads:
+                for span in range(min(self._max_words, len(words) - i), 1, -1):
+                    key = ' '.join(words[i:i + span]).lower()
+                    rows = self._names.get(key) or self._names.get(_strip_particle(key))
+                    if rows is not None:
+                        break
+            if rows is None:
+                span = 1
+                rows = self._tickers.get(words[i]) or self._names.get(word) or self._names.get(_strip_particle(word))
+            if rows is None:
+                rest.append(word if word in QUOTE_WORDS else _strip_particle(word))
+            else:
+                groups.append(rows)
+            i += span
+        positions = [p for p in chain.from_iterable(zip_longest(*groups)) if p is not None]
+        return list(dict.fromkeys(positions)), rest
+
+    def lookup(self, query: str) -> Optional[List[int]]:
+        """
+        티커/종목 이름만 묻는 질문("NVDA", "엔비디아 주가는?")이면 그 종목 행 위치, 아니면 None
+
+        임베딩 없이 단어 몇 개의 사전 조회로 끝난다.
+        """
+        positions, rest = self.match_symbols(query)
+        if not positions or any(word not in QUOTE_WORDS and word not in PARTICLES for word in rest):
+            return None
+        return positions
+
+    def search(self, query: str, k: int = 4) -> np.ndarray:
+        """BM25 상위 k 위치 (점수 0 인 문서는 빼므로 k 개보다 적을 수 있다)"""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in set(tokenize(query)):
+            entry = self._postings.get(token)
+            if entry is None:
+                continue
+            positions, tfs, idf = entry
+            scores[positions] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[positions])
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        return hits[np.argsort(-scores[hits], kind='stable')]
+
+    def ranked(self, queries: Sequence[str], k: int = 4) -> np.ndarray:
+        """
+        질문별 어휘 검색 순위 행렬 (fuse_ranked 에 벡터 검색 순위와 같이 넘긴다, 빈 칸은 -1)
+
+        질문에 티커/종목 이름이 있으면 그 종목 행 순위를 한 줄 더 넣는다.
+        """
+        rows = []
+        for query in queries:
+            symbol_rows = self.match_symbols(query)[0]
+            if symbol_rows:
+                rows.append(np.asarray(symbol_rows[:k], dtype=np.int64))
+            rows.append(self.search(query, k))
+        matrix = np.full((len(rows), k), -1, dtype=np.int64)
+        for i, row in enumerate(rows):
+            matrix[i, :len(row)] = row
+        return matrix
+
+    def stats(self) -> Dict:
+        return {'documents': self.size, 'terms': len(self._postings), 'symbols': len(self._tickers)}
+
+
+_lock = threading.Lock()
+
+
+def iter_texts(store) -> Iterator[str]:
+    """FAISS 위치 순서대로 청크 본문 (전체 본문 목록을 만들지 않는다)"""
+    partition_stores = getattr(store, 'partition_stores', None)
+    if partition_stores is not None:
+        # 파티션 뷰는 파티션 순서대로 이어 붙인 위치다
+        for partition in partition_stores:
+            yield from iter_texts(partition)
+        return
+    if isinstance(store.docstore, SqliteDocstore):
+        # chunks.sqlite3 에서 일정 개수씩 나눠 읽는다
+        yield from store.docstore.table.iter_texts()
+        return
+    for chunk_id in store.index_to_docstore_id.values():
+        yield store.docstore.search(chunk_id).page_content
+
+
+def lexical_index(store) -> LexicalIndex:
+    """벡터 스토어의 어휘 색인 (처음 쓸 때 같은 청크로 만들어 스토어에 붙여 둔다)"""
+    index = getattr(store, 'lexical_index', None)
+    if index is None or index.size != store.index.ntotal:
+        with _lock:
+            index = getattr(store, 'lexical_index', None)
+            if index is None or index.size != store.index.ntotal:
+                # 본문을 흘려 읽으며 만들므로 지연 로딩 문서 저장소의 메모리 절약이 그대로 유지된다
+                index = LexicalIndex(iter_texts(store))
+                store.lexical_index = index
+    return index
@@ -0,0 +1,252 @@
+# src/vector_store/mmap_store.py
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Union
+
+import faiss
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# 청크 본문/메타데이터 테이블 (index.pkl 대신). 위치(FAISS 행 번호)와 청크 id 로 필요한 행만 읽는다
+CHUNKS_FILE = 'chunks.sqlite3'
+# 저장본 id. chunks.sqlite3 의 meta 에도 같은 값을 적어 index.faiss 와 같은 저장본인지 확인한다
+GENERATION_FILE = 'index.generation'
+# 본문을 순서대로 흘려 읽을 때 한 번에 가져오는 행 수
+TEXT_BATCH = 1000
+# faiss 1.11 부터는 Flat/SQ/PQ 코드 배열까지 메모리 매핑한다(IO_FLAG_MMAP_IFC).
+# 그 전 버전(requirements.txt 의 1.9)은 IVF 역리스트만 매핑하고 Flat 등은 힙에 읽으므로 워커끼리 공유되지 않는다
+MMAP_READ_FLAGS = getattr(faiss, 'IO_FLAG_MMAP_IFC', faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+# SQLite 가 읽기에 쓰는 mmap 크기. 본문 페이지도 페이지 캐시에서 프로세스끼리 공유된다
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def read_index_mmap(path: str) -> faiss.Index:
+    """
+    FAISS 인덱스를 메모리 매핑으로 열기
+
+    벡터/코드 배열을 힙에 복사하지 않고 파일을 그대로 매핑하므로 여는 시간이 파일 크기와 무관하고,
+    여러 워커 프로세스가 같은 페이지 캐시를 공유한다. 매핑된 인덱스에는 벡터를 추가할 수 없다.
+    faiss 1.11 미만에서는 IVF 역리스트만 매핑된다 (MMAP_READ_FLAGS).
+    """
+    return faiss.read_index(path, MMAP_READ_FLAGS)
+
+
+def write_generation(path: str, generation: str) -> None:
+    with open(path, 'w') as f:
+        f.write(generation)
+
+
+def read_generation(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def write_chunks(store: FAISS, path: str, generation: str, vectors_file: Optional[str] = None) -> int:
+    """
+    벡터 스토어의 청크를 SQLite 파일로 저장 (새 파일에 쓰고 os.replace 로 교체하는 용도)
+
+    Args:
+        store: FAISS 벡터 스토어
+        path: 저장할 파일 (이미 있으면 지운다)
+        generation: 같이 저장하는 index.faiss 의 저장본 id (index.generation 에도 같은 값을 쓴다).
+            크기만으로는 같은 개수의 Flat/SQ 인덱스를 다시 만든 경우를 구분할 수 없다
+        vectors_file: 같은 저장본의 재정렬용 원본 벡터 파일 이름 (압축 인덱스만)
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    try:
+        db.execute("CREATE TABLE chunks (position INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, "
+                   "text TEXT NOT NULL, metadata TEXT NOT NULL)")
+        db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        rows = []
+        for position in range(store.index.ntotal):
+            chunk_id = store.index_to_docstore_id[position]
+            doc = store.docstore.search(chunk_id)
+            rows.append((position, chunk_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False, default=str)))
+        db.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+        meta = [('ntotal', str(len(rows))), ('generation', generation)]
+        if vectors_file:
+            meta.append(('vectors_file', vectors_file))
+        db.executemany("INSERT INTO meta VALUES (?, ?)", meta)
+        db.commit()
+    finally:
+        db.close()
+    return len(rows)
+
+
+class ChunkTable:
+    """
+    chunks.sqlite3 읽기 전용 연결
+
+    파일은 통째로 교체만 하고 고치지 않으므로 immutable 로 열어 잠금 없이 읽는다.
+    교체된 뒤에도 이미 연 연결은 예전 파일을 계속 읽으므로 검색 도중 내용이 바뀌지 않는다.
+    fork 된 워커에서는 연결을 새로 연다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._db = None
+        self._connect()
+        meta = dict(self._query("SELECT key, value FROM meta"))
+        self.ntotal = int(meta['ntotal'])
+        self.generation = meta.get('generation')
+        self.vectors_file = meta.get('vectors_file')
+        # 저장본 id 가 생기기 전 저장본은 index.faiss 크기로만 확인한다
+        self.index_bytes = int(meta['index_bytes']) if 'index_bytes' in meta else None
+
+    def _connect(self):
+        self._db = sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro&immutable=1", uri=True,
+                                   check_same_thread=False)
+        self._db.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        self._pid = os.getpid()
+
+    def _query(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._connect()
+            return self._db.execute(sql, params).fetchall()
+
+    def chunk_id(self, position: int) -> Optional[str]:
+        rows = self._query("SELECT chunk_id FROM chunks WHERE position = ?", (int(position),))
+        return rows[0][0] if rows else None
+
+    def chunk_ids(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT chunk_id FROM chunks ORDER BY position")]
+
+    def iter_texts(self, batch: int = TEXT_BATCH) -> Iterator[str]:
+        """위치 순서대로 본문 (batch 개씩 나눠 읽으므로 전체 본문을 한꺼번에 메모리에 올리지 않는다)"""
+        position = -1
+        while True:
+            rows = self._query("SELECT position, text FROM chunks WHERE position > ? ORDER BY position LIMIT ?",
+                               (position, batch))
+            if not rows:
+                return
+            for position, text in rows:
+                yield text
+
+    def document(self, chunk_id: str) -> Optional[Document]:
+        rows = self._query("SELECT text, metadata FROM chunks WHERE chunk_id = ?", (chunk_id,))
+        if not rows:
+            return None
+        return Document(id=chunk_id, page_content=rows[0][0], metadata=json.loads(rows[0][1]))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ChunkIdMap(Mapping):
+    """FAISS 위치 -> 청크 id (index_to_docstore_id 대신, 검색 결과 위치만 그때그때 조회한다)"""
+
+    def __init__(self, table: ChunkTable):
+        self.table = table
+
+    def __getitem__(self, position: int) -> str:
+        chunk_id = self.table.chunk_id(position)
+        if chunk_id is None:
+            raise KeyError(position)
+        return chunk_id
+
+    def __len__(self) -> int:
+        return self.table.ntotal
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.table.ntotal))
+
+    def values(self) -> List[str]:
+        # 전체 순회(파티션 합치기, 재구축)는 쿼리 한 번으로
+        return self.table.chunk_ids()
+
+    def items(self) -> List[tuple]:
+        return list(enumerate(self.table.chunk_ids()))
+
+
+class SqliteDocstore(Docstore):
+    """chunks.sqlite3 에서 청크를 필요할 때만 읽는 문서 저장소 (읽기 전용)"""
+
+    def __init__(self, table: ChunkTable):
+        self.table = table
+
+    def search(self, search: str) -> Union[str, Document]:
+        doc = self.table.document(search)
+        return doc if doc is not None else f"ID {search} not found."
+
+
+def load_mmap_store(path: str, embeddings, index_file: str) -> Optional[FAISS]:
+    """
+    index.faiss(메모리 매핑) + chunks.sqlite3 로 벡터 스토어 열기
+
+    두 파일이 서로 다른 저장본이면(교체 도중) None 을 돌려준다.
+    저장할 때 chunks.sqlite3 -> index.faiss -> index.generation 순서로 교체하므로 읽을 때는 반대 순서로 연다.
+    그러면 id 가 같을 때 index.faiss 도 항상 같은 저장본이다.
+    """
+    index_path = os.path.join(path, index_file)
+    generation = read_generation(os.path.join(path, GENERATION_FILE))
+    index_bytes = os.path.getsize(index_path)
+    index = read_index_mmap(index_path)
+    table = ChunkTable(os.path.join(path, CHUNKS_FILE))
+    if table.generation is not None:
+        same = table.generation == generation
+    else:
+        same = generation is None and table.index_bytes == index_bytes
+    if not same or index.ntotal != table.ntotal:
+        table.close()
+        return None
+    return FAISS(embeddings, index, SqliteDocstore(table), ChunkIdMap(table))
+
+
+def convert_pickle_store(path: str = './db/faiss', embeddings=None) -> Optional[FAISS]:
+    """index.pkl 형식 저장본을 chunks.sqlite3 형식으로 바꿔 저장 (임베딩은 다시 하지 않는다)"""
+    from .store_io import DOCSTORE_FILE, load_store, save_store_atomic
+
+    if not os.path.exists(os.path.join(path, DOCSTORE_FILE)):
+        return None
+    store = load_store(path, embeddings, store_format='pickle')
+    if store is None:
+        return None
+    save_store_atomic(store, path, store_format='mmap')
+    return store
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    parser = argparse.ArgumentParser(description="index.pkl 벡터 스토어를 메모리 매핑 형식(chunks.sqlite3)으로 변환")
+    parser.add_argument("paths", nargs="*", default=["./db/faiss"],
+                        help="변환할 디렉토리들 (partitions/ 아래 파티션도 같이 변환)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    for root in args.paths:
+        targets = [root]
+        partition_root = os.path.join(root, 'partitions')
+        if os.path.isdir(partition_root):
+            targets += [os.path.join(partition_root, name) for name in sorted(os.listdir(partition_root))]
+        for target in targets:
+            # 본문만 옮기므로 임베딩 모델을 읽을 필요가 없다 (차원만 맞으면 된다)
+            index_path = os.path.join(target, 'index.faiss')
+            if not os.path.exists(index_path):
+                continue
+            dim = read_index_mmap(index_path).d
+            converted = convert_pickle_store(target, DeterministicFakeEmbedding(size=dim))
+            print(f"{target}: {'변환 완료 (' + str(converted.index.ntotal) + '개)' if converted else '변환할 index.pkl 없음'}")
+        if os.path.isdir(partition_root):
+            # 파티션 파일이 바뀌었으므로 매니페스트 버전도 새로 기록
+            from .partitioned import PartitionedVectorStore
+            PartitionedVectorStore(root, DeterministicFakeEmbedding(size=1), dedup=False).write_manifest()
@@ -0,0 +1,537 @@
+# src/vector_store/partitioned.py
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from .dedup import FINGERPRINT_FILE, FingerprintIndex, content_hash, deduplicate, fingerprint
+from .index_builder import COMPRESSED_TYPES, build_index, index_config_from_env, rebuild_index, store_vectors
+from .search import search_index
+from .store_io import INDEX_FILE, is_vectors_file, load_store, save_store_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+PARTITION_DIR = 'partitions'
+
+Window = Tuple[date, date]
+
+_DAY_NAME = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_WEEK_NAME = re.compile(r'^(\d{4})-W(\d{2})$')
+
+
+def day_partition(day: date) -> str:
+    return day.isoformat()
+
+
+def week_partition(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def partition_range(name: str) -> Optional[Window]:
+    """파티션 이름이 덮는 기간 (일 파티션 YYYY-MM-DD, 주 파티션 YYYY-Www)"""
+    if _DAY_NAME.match(name):
+        day = date.fromisoformat(name)
+        return day, day
+    match = _WEEK_NAME.match(name)
+    if match:
+        monday = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        return monday, monday + timedelta(days=6)
+    return None
+
+
+def parse_time_window(text: str, today: date = None) -> Optional[Window]:
+    """
+    질문에 나온 기간 표현을 (시작일, 종료일) 로 변환. 기간 표현이 없으면 None
+
+    오늘/금일, 어제/전일, 이번 주/금주, 지난주/저번 주, 이번 달/금월, 최근 N일/N일간
+    """
+    today = today or date.today()
+    text = (text or '').lower()
+    match = re.search(r'최근\s*(\d+)\s*일|(\d+)\s*일\s*(?:간|동안)', text)
+    if match:
+        days = max(1, int(match.group(1) or match.group(2)))
+        return today - timedelta(days=days - 1), today
+    if re.search(r'지난\s*주|저번\s*주|last week', text):
+        monday = today - timedelta(days=today.weekday() + 7)
+        return monday, monday + timedelta(days=6)
+    if re.search(r'이번\s*주|금주|this week', text):
+        return today - timedelta(days=today.weekday()), today
+    if re.search(r'이번\s*달|이번\s*월|금월|this month', text):
+        return today.replace(day=1), today
+    if re.search(r'어제|전일|yesterday', text):
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    if re.search(r'오늘|금일|today', text):
+        return today, today
+    return None
+
+
+def _signature(path: str) -> Optional[str]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class PartitionDocstore(Docstore):
+    """합친 뷰의 청크 id 를 원래 파티션의 문서 저장소로 보낸다 (본문은 검색 결과만 그 파티션에서 읽는다)"""
+
+    def __init__(self, owners: Dict[str, Docstore]):
+        self.owners = owners
+
+    def search(self, search: str):
+        owner = self.owners.get(search)
+        return owner.search(search) if owner is not None else f"ID {search} not found."
+
+
+class PartitionIndex:
+    """
+    여러 파티션의 인덱스를 하나처럼 검색하는 읽기 전용 인덱스 (faiss 인덱스의 search / reconstruct 만 흉내 낸다)
+
+    위치는 파티션 순서대로 이어 붙인 번호다. 검색은 파티션마다 자기 인덱스(mmap 그대로, 압축 인덱스면 자기 원본 벡터로
+    재정렬)에서 상위 k 개를 뽑고 거리로 합치므로 벡터를 복사하거나 인덱스를 새로 만들지 않는다.
+    """
+
+    is_trained = True
+
+    def __init__(self, stores: Sequence[FAISS]):
+        self.stores = list(stores)
+        sizes = [store.index.ntotal for store in self.stores]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self.ntotal = int(self.offsets[-1])
+        self.d = self.stores[0].index.d
+        self.metric_type = self.stores[0].index.metric_type
+
+    def search(self, x: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        # 내적 인덱스는 클수록 가까우므로 부호를 바꿔 L2 와 같이 오름차순으로 합친다
+        sign = -1 if self.metric_type == faiss.METRIC_INNER_PRODUCT else 1
+        distances = [np.full((len(x), k), np.inf, dtype=np.float32)]
+        positions = [np.full((len(x), k), -1, dtype=np.int64)]
+        for store, offset in zip(self.stores, self.offsets):
+            if store.index.ntotal == 0:
+                continue
+            part_distances, part_positions = search_index(store, x, k)
+            # 빈 칸(-1)은 합칠 때 맨 뒤로 가도록 거리를 무한대로 둔다
+            missing = part_positions < 0
+            distances.append(np.where(missing, np.inf, sign * part_distances))
+            positions.append(np.where(missing, -1, part_positions + offset))
+        distances, positions = np.hstack(distances), np.hstack(positions)
+        order = np.argsort(distances, axis=1, kind='stable')[:, :k]
+        return sign * np.take_along_axis(distances, order, axis=1), np.take_along_axis(positions, order, axis=1)
+
+    def reconstruct(self, position: int) -> np.ndarray:
+        part = int(np.searchsorted(self.offsets, position, side='right')) - 1
+        store = self.stores[part]
+        local = int(position - self.offsets[part])
+        exact_vectors = getattr(store, 'exact_vectors', None)
+        if exact_vectors is not None:
+            return np.asarray(exact_vectors[local], dtype=np.float32)
+        return store.index.reconstruct(local)
+
+
+def partition_view(stores: Sequence[FAISS], embeddings) -> FAISS:
+    """여러 파티션을 그대로 둔 채 하나의 벡터 스토어처럼 검색하는 뷰 (PartitionIndex, 청크 본문은 원래 파티션에서 읽는다)"""
+    owners, ids = {}, []
+    for store in stores:
+        for chunk_id in store.index_to_docstore_id.values():
+            owners[chunk_id] = store.docstore
+            ids.append(chunk_id)
+    view = FAISS(embeddings, PartitionIndex(stores), PartitionDocstore(owners), dict(enumerate(ids)),
+                 normalize_L2=stores[0]._normalize_L2)
+    view.partition_stores = list(stores)
+    return view
+
+
+def merge_stores(stores: Sequence[FAISS], embeddings) -> FAISS:
+    """
+    여러 파티션을 하나의 벡터 스토어로 합친다 (원본 벡터를 이어 붙여 설정한 종류의 인덱스로 구축)
+
+    인덱스를 새로 학습하므로 주 파티션 압축(compact) 같은 오프라인 작업에만 쓴다. 검색용 뷰는 partition_view.
+    """
+    vectors, owners, ids = [], {}, []
+    for store in stores:
+        vectors.append(store_vectors(store))
+        for chunk_id in store.index_to_docstore_id.values():
+            owners[chunk_id] = store.docstore
+            ids.append(chunk_id)
+    vectors = np.vstack(vectors)
+    config = index_config_from_env()
+    merged = FAISS(embeddings, build_index(vectors, **config), PartitionDocstore(owners), dict(enumerate(ids)))
+    if config['index_type'] in COMPRESSED_TYPES:
+        merged.exact_vectors = vectors
+    return merged
+
+
+class PartitionedVectorStore:
+    """
+    날짜별로 나눠 저장하는 벡터 스토어 (쓰기 쪽, 일일 파이프라인용)
+
+    root/partitions/<YYYY-MM-DD>/ 에 하루치 문서를 보통의 FAISS 스토어로 저장하고,
+    compact_after_days 가 지난 일 파티션은 주 파티션(<YYYY-Www>)으로 합치며 retention_days 가 지난 파티션은 지운다.
+    쓰기가 끝날 때마다 root/manifest.json 을 마지막에 교체하므로 서버는 이 파일만 보고 바뀐 파티션을 다시 읽는다.
+    dedup 이 켜져 있으면 root/fingerprints.sqlite3 의 지문으로 다른 파티션에 이미 있는 문서는 임베딩하지 않고 버린다.
+    """
+
+    def __init__(self, root: str = './db/faiss', embeddings=None, retention_days: int = None,
+                 compact_after_days: int = None, dedup: bool = None):
+        """
+        Args:
+            root: 벡터 스토어 디렉토리
+            embeddings: 문서 임베딩 모델 (기본값: 공용 ko-sbert 모델)
+            retention_days: 보관 기간(일) (기본값: 환경변수 VECTOR_RETENTION_DAYS 또는 30)
+            compact_after_days: 일 파티션을 주 파티션으로 합치기까지의 기간(일) (기본값: 환경변수 VECTOR_COMPACT_AFTER_DAYS 또는 7)
+            dedup: 중복 문서 제거 여부 (기본값: 환경변수 VECTOR_DEDUP 또는 켜짐)
+        """
+        self.root = root
+        if embeddings is None:
+            from .embeddings import get_embedding_model
+            embeddings = get_embedding_model()
+        self.embeddings = embeddings
+        self.retention_days = retention_days or int(os.getenv("VECTOR_RETENTION_DAYS", "30"))
+        self.compact_after_days = compact_after_days or int(os.getenv("VECTOR_COMPACT_AFTER_DAYS", "7"))
+        if dedup is None:
+            dedup = os.getenv("VECTOR_DEDUP", "1").lower() not in ("0", "false", "no")
+        self.fingerprints = None
+        if dedup:
+            path = os.path.join(root, FINGERPRINT_FILE)
+            rebuild = not os.path.exists(path)
+            self.fingerprints = FingerprintIndex(path)
+            if rebuild:
+                # 지문 파일이 생기기 전에 만든 파티션이 있으면 그 문서들로 채운다
+                self.rebuild_fingerprints()
+        self.last_dedup = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, PARTITION_DIR, name)
+
+    def partition_names(self) -> List[str]:
+        directory = os.path.join(self.root, PARTITION_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if partition_range(name) and os.path.exists(os.path.join(directory, name, INDEX_FILE)))
+
+    def write(self, documents: List[Document], source: str, day: date = None, near_duplicates: bool = True) -> Optional[FAISS]:
+        """
+        day 파티션의 source 문서를 새 문서로 교체 (다른 파티션은 건드리지 않는다)
+
+        같은 날 파이프라인을 다시 돌려도 문서가 중복되지 않고, 다른 source(뉴스/시장 데이터) 문서는 그대로 남는다.
+        dedup 이 켜져 있으면 배치 안 중복과 다른 파티션/source 에 이미 있는 문서를 빼고,
+        이 파티션에 이미 있던 같은 본문은 저장된 벡터를 재사용해서 새 문서만 임베딩한다.
+
+        Args:
+            near_duplicates: SimHash 유사 중복도 제거할지 (가격 숫자만 다른 시장 데이터 행은 False 로 호출)
+
+        Returns:
+            저장한 파티션 스토어. 중복 제거 뒤 남은 source 문서가 없으면 None
+        """
+        name = day_partition(day or date.today())
+        path = self._path(name)
+        texts, vectors, metadatas = [], [], []
+        reusable = {}
+        existing = load_store(path, self.embeddings) if os.path.exists(os.path.join(path, INDEX_FILE)) else None
+        if existing is not None:
+            existing_vectors = store_vectors(existing)
+            for position, chunk_id in existing.index_to_docstore_id.items():
+                doc = existing.docstore.search(chunk_id)
+                if doc.metadata.get('pipeline') != source:
+                    texts.append(doc.page_content)
+                    vectors.append(existing_vectors[position])
+                    metadatas.append(doc.metadata)
+                else:
+                    reusable[content_hash(doc.page_content)] = existing_vectors[position]
+
+        fingerprints = [fingerprint(doc.page_content) for doc in documents]
+        if self.fingerprints is not None:
+            kept, fingerprints, self.last_dedup = deduplicate(
+                [doc.page_content for doc in documents], self.fingerprints, scope=(name, source),
+                near_duplicates=near_duplicates)
+            documents = [documents[i] for i in kept]
+            if len(documents) < self.last_dedup['input']:
+                logger.info(f"파티션 {name} {source} 중복 제거: {self.last_dedup}")
+        if documents:
+            missing = [i for i, fp in enumerate(fingerprints) if fp.hash not in reusable]
+            embedded = iter(np.asarray(self.embeddings.embed_documents([documents[i].page_content for i in missing]),
+                                       dtype=np.float32).reshape(len(missing), -1)) if missing else iter(())
+            texts.extend(doc.page_content for doc in documents)
+            vectors.extend(reusable[fp.hash] if fp.hash in reusable else next(embedded) for fp in fingerprints)
+            metadatas.extend({**doc.metadata, 'pipeline': source, 'partition': name} for doc in documents)
+        if not texts or (not documents and not reusable):
+            # 남은 문서가 없거나, 새 문서도 교체할 예전 source 문서도 없으면 파티션을 다시 쓰지 않는다
+            return None
+
+        store = FAISS.from_embeddings(list(zip(texts, [v.tolist() for v in vectors])), self.embeddings, metadatas=metadatas)
+        store = rebuild_index(store)
+        save_store_atomic(store, path)
+        self.write_manifest()
+        self._record(name, source, fingerprints)
+        logger.info(f"파티션 {name} 저장: {source} 문서 {len(documents)}개, 전체 {store.index.ntotal}개")
+        return store if documents else None
+
+    def _record(self, name: str, source: str, fingerprints):
+        if self.fingerprints is not None:
+            self.fingerprints.replace(name, source, fingerprints)
+
+    def filter_new(self, texts: List[str], source: str, kind: str = 'article', day: date = None) -> List[int]:
+        """
+        이전 파티션에 이미 저장한 원문(기사 등)과 배치 안 중복을 뺀 위치 목록 (지문은 기록하지 않는다)
+
+        번역/요약처럼 비싼 처리 전에 호출해서, 어제 저장한 기사가 오늘 다시 수집돼도 다시 처리하지 않게 한다.
+        남긴 원문은 write() 가 끝난 뒤 record_new() 로 기록한다. 번역/임베딩이 실패하면 기록되지 않으므로 다음 실행에서 다시 처리한다.
+        """
+        if self.fingerprints is None:
+            return list(range(len(texts)))
+        name = day_partition(day or date.today())
+        kept, _, report = deduplicate(texts, self.fingerprints, kind=kind, scope=(name, source))
+        if report['kept'] < report['input']:
+            logger.info(f"파티션 {name} {source} {kind} 중복 제거: {report}")
+        return kept
+
+    def record_new(self, texts: List[str], source: str, kind: str = 'article', day: date = None) -> None:
+        """
+        저장을 마친 원문(filter_new 가 남긴 것)의 지문 기록
+
+        같은 날 다시 돌리면 그날 기록한 지문은 교체되므로 같은 기사를 다시 처리한다.
+        """
+        if self.fingerprints is None:
+            return
+        name = day_partition(day or date.today())
+        self.fingerprints.replace(name, source, [fingerprint(text) for text in texts], kind=kind)
+
+    def rebuild_fingerprints(self) -> int:
+        """저장된 파티션의 청크 지문을 다시 기록 (지문 파일을 지웠거나 중복 제거 전에 만든 파티션용)"""
+        if self.fingerprints is None:
+            return 0
+        count = 0
+        for name in self.partition_names():
+            store = self.load(name)
+            if store is None:
+                continue
+            by_source: Dict[str, list] = {}
+            for chunk_id in store.index_to_docstore_id.values():
+                doc = store.docstore.search(chunk_id)
+                by_source.setdefault(doc.metadata.get('pipeline', 'legacy'), []).append(fingerprint(doc.page_content))
+            for source, fingerprints in by_source.items():
+                self.fingerprints.replace(name, source, fingerprints)
+                count += len(fingerprints)
+        return count
+
+    def load(self, name: str) -> Optional[FAISS]:
+        return load_store(self._path(name), self.embeddings)
+
+    def compact(self, today: date = None) -> List[str]:
+        """compact_after_days 보다 오래된 일 파티션을 주 파티션으로 합친다. 만든 주 파티션 이름 목록을 돌려준다"""
+        cutoff = (today or date.today()) - timedelta(days=self.compact_after_days)
+        weeks: Dict[str, List[str]] = {}
+        for name in self.partition_names():
+            if _DAY_NAME.match(name) and date.fromisoformat(name) < cutoff:
+                weeks.setdefault(week_partition(date.fromisoformat(name)), []).append(name)
+
+        for week, days in weeks.items():
+            sources = [week] if os.path.exists(os.path.join(self._path(week), INDEX_FILE)) else []
+            stores = [self.load(name) for name in sources + days]
+            merged = merge_stores([s for s in stores if s is not None], self.embeddings)
+            save_store_atomic(merged, self._path(week))
+            # 서버가 일 파티션 대신 주 파티션을 보게 한 뒤에 일 파티션을 지운다
+            self.write_manifest(exclude=days)
+            if self.fingerprints is not None:
+                self.fingerprints.move(days, week)
+            for name in days:
+                shutil.rmtree(self._path(name), ignore_errors=True)
+            logger.info(f"파티션 압축: {', '.join(days)} -> {week} ({merged.index.ntotal}개)")
+        return list(weeks)
+
+    def apply_retention(self, today: date = None) -> List[str]:
+        """보관 기간이 지난 파티션 삭제. 지운 파티션 이름 목록을 돌려준다"""
+        oldest = (today or date.today()) - timedelta(days=self.retention_days - 1)
+        expired = [name for name in self.partition_names() if partition_range(name)[1] < oldest]
+        if expired:
+            # 매니페스트에서 먼저 빼서 서버가 지울 파티션을 더 이상 읽지 않게 한다
+            self.write_manifest(exclude=expired)
+            if self.fingerprints is not None:
+                self.fingerprints.drop(expired)
+            for name in expired:
+                shutil.rmtree(self._path(name), ignore_errors=True)
+            logger.info(f"보관 기간({self.retention_days}일)이 지난 파티션 삭제: {', '.join(expired)}")
+        return expired
+
+    def maintain(self, today: date = None) -> Dict:
+        """일일 쓰기 후 호출: 압축 후 보관 기간 정리"""
+        return {'compacted': self.compact(today), 'expired': self.apply_retention(today)}
+
+    def write_manifest(self, exclude: Sequence[str] = ()) -> Dict:
+        """현재 파티션 목록과 버전을 manifest.json 으로 원자적으로 기록"""
+        partitions = {}
+        for name in self.partition_names():
+            if name in exclude:
+                continue
+            start, end = partition_range(name)
+            partitions[name] = {
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'version': _signature(os.path.join(self._path(name), INDEX_FILE)),
+            }
+        manifest = {'updated_at': datetime.now().isoformat(), 'partitions': partitions}
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, MANIFEST_FILE)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return manifest
+
+    def migrate_monolithic(self, day: date = None) -> Optional[str]:
+        """
+        예전 단일 인덱스(root/index.faiss)를 일 파티션 하나로 옮긴다 (기본값: 파일 수정 날짜)
+
+        dedup 이 켜져 있으면 재실행으로 쌓인 중복 청크를 빼고 옮긴다 (저장된 벡터를 그대로 쓰므로 다시 임베딩하지 않는다).
+        """
+        legacy = os.path.join(self.root, INDEX_FILE)
+        if not os.path.exists(legacy):
+            return None
+        day = day or date.fromtimestamp(os.path.getmtime(legacy))
+        store = load_store(self.root, self.embeddings)
+        if store is None:
+            return None
+        name = day_partition(day)
+        if self.fingerprints is not None:
+            docs = [store.docstore.search(store.index_to_docstore_id[i]) for i in range(store.index.ntotal)]
+            kept, _, report = deduplicate([doc.page_content for doc in docs])
+            if len(kept) < len(docs):
+                vectors = store_vectors(store)
+                store = FAISS.from_embeddings([(docs[i].page_content, vectors[i].tolist()) for i in kept],
+                                              self.embeddings, metadatas=[docs[i].metadata for i in kept])
+                store = rebuild_index(store)
+                logger.info(f"단일 인덱스 중복 제거: {report}")
+        save_store_atomic(store, self._path(name))
+        self.write_manifest()
+        self.rebuild_fingerprints()
+        for filename in os.listdir(self.root):
+            if filename.startswith('index.') or is_vectors_file(filename):
+                os.remove(os.path.join(self.root, filename))
+        logger.info(f"단일 인덱스를 파티션 {name} 으로 옮김 ({store.index.ntotal}개)")
+        return name
+
+
+def read_manifest(root: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(root, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class PartitionSet:
+    """
+    서버가 읽어 둔 파티션들 (읽기 쪽)
+
+    기간(window)과 겹치는 파티션만 골라 검색용 뷰(partition_view)를 만들고, 같은 파티션 조합은 다시 만들지 않는다.
+    뷰는 각 파티션의 인덱스를 그대로 검색하므로 만드는 비용은 청크 id 목록 정도다 (어휘 색인은 처음 쓸 때 만든다).
+    """
+
+    def __init__(self, partitions: Dict[str, FAISS], embeddings, max_views: int = 8):
+        self.partitions = dict(sorted(partitions.items(), key=lambda item: partition_range(item[0])))
+        self.embeddings = embeddings
+        self.max_views = max_views
+        self._views: "OrderedDict[tuple, FAISS]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def names_for(self, window: Optional[Window] = None) -> List[str]:
+        """기간과 겹치는 파티션 이름 목록. 겹치는 파티션이 없으면(예: 오늘 데이터 수집 전) 가장 최근 파티션"""
+        names = list(self.partitions)
+        if window is None or not names:
+            return names
+        start, end = window
+        selected = [name for name in names if partition_range(name)[0] <= end and partition_range(name)[1] >= start]
+        return selected or names[-1:]
+
+    def view(self, window: Optional[Window] = None) -> FAISS:
+        names = tuple(self.names_for(window))
+        if not names:
+            raise RuntimeError("읽어 둔 벡터 파티션이 없습니다")
+        if len(names) == 1:
+            return self.partitions[names[0]]
+        with self._lock:
+            merged = self._views.get(names)
+            if merged is None:
+                started = time.perf_counter()
+                merged = partition_view([self.partitions[name] for name in names], self.embeddings)
+                self._views[names] = merged
+                while len(self._views) > self.max_views:
+                    self._views.popitem(last=False)
+                logger.info(f"파티션 뷰 생성: {names[0]}~{names[-1]} ({len(names)}개, {merged.index.ntotal}개 벡터, "
+                            f"{time.perf_counter() - started:.2f}초)")
+            else:
+                self._views.move_to_end(names)
+            return merged
+
+    @property
+    def ntotal(self) -> int:
+        return sum(store.index.ntotal for store in self.partitions.values())
+
+
+def load_partitions(root: str, embeddings=None, previous: Optional[PartitionSet] = None,
+                    previous_versions: Dict[str, str] = None) -> Tuple[Optional[PartitionSet], Dict[str, str]]:
+    """
+    manifest.json 에 적힌 파티션 읽기. 버전이 같은 파티션은 이전에 읽어 둔 것을 재사용한다
+
+    Returns:
+        (PartitionSet 또는 None, 파티션 이름 -> 버전)
+    """
+    manifest = read_manifest(root)
+    if manifest is None:
+        return None, {}
+    if embeddings is None:
+        from .embeddings import get_embedding_model
+        embeddings = get_embedding_model()
+    previous_versions = previous_versions or {}
+    partitions, versions = {}, {}
+    for name, info in manifest['partitions'].items():
+        if previous is not None and previous_versions.get(name) == info['version'] and name in previous.partitions:
+            partitions[name] = previous.partitions[name]
+        else:
+            store = load_store(os.path.join(root, PARTITION_DIR, name), embeddings)
+            if store is None:
+                # 파티션 교체 도중이면 다음 확인 때 다시 시도
+                return None, {}
+            partitions[name] = store
+        versions[name] = info['version']
+    return PartitionSet(partitions, embeddings), versions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="날짜별 벡터 파티션 관리")
+    parser.add_argument("--root", default="./db/faiss")
+    parser.add_argument("--migrate", action="store_true", help="예전 단일 인덱스를 일 파티션으로 옮긴다")
+    parser.add_argument("--maintain", action="store_true", help="압축 후 보관 기간 정리")
+    parser.add_argument("--rebuild-fingerprints", action="store_true", help="저장된 파티션으로 중복 검사용 지문을 다시 기록")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    partitioned_store = PartitionedVectorStore(args.root)
+    if args.migrate:
+        print(f"옮긴 파티션: {partitioned_store.migrate_monolithic()}")
+    if args.maintain:
+        print(partitioned_store.maintain())
+    if args.rebuild_fingerprints:
+        print(f"다시 기록한 지문: {partitioned_store.rebuild_fingerprints()}개")
+    print(json.dumps(read_manifest(args.root), ensure_ascii=False, indent=2))
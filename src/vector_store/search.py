@@ -0,0 +1,128 @@
+# src/vector_store/search.py
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from .lexical import HYBRID_SEARCH, lexical_index
+
+# Reciprocal Rank Fusion 상수 (원 논문 기본값)
+RRF_K = 60
+# 압축 인덱스에서 k * RERANK_FACTOR 개 후보를 뽑아 원본 벡터로 다시 정렬 (0 또는 1 이면 재정렬 안 함)
+RERANK_FACTOR = int(os.getenv("FAISS_RERANK_FACTOR", "4"))
+
+
+def embed_queries(embeddings, queries: Sequence[str]) -> np.ndarray:
+    """여러 질문을 embed_documents 한 번으로 임베딩 (모델 호출 한 번에 배치 처리)"""
+    return np.asarray(embeddings.embed_documents(list(queries)), dtype=np.float32).reshape(len(queries), -1)
+
+
+def rerank(exact_vectors: np.ndarray, queries: np.ndarray, candidates: np.ndarray, k: int,
+           return_distances: bool = False):
+    """
+    후보 위치들을 원본 벡터와의 L2 거리로 다시 정렬해서 쿼리별 상위 k 위치를 돌려준다
+
+    return_distances 면 (제곱 L2 거리, 위치) 를 돌려준다 (빈 칸은 inf / -1, index.search 와 같은 형식).
+    """
+    positions = np.full((len(queries), k), -1, dtype=np.int64)
+    top_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    for row, (query, candidate) in enumerate(zip(queries, candidates)):
+        # mmap 된 파일을 앞에서부터 읽도록 위치 순으로 정렬해서 가져온다
+        candidate = np.unique(candidate[candidate >= 0])
+        distances = ((np.asarray(exact_vectors[candidate]) - query) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind='stable')[:k]
+        positions[row, :len(order)] = candidate[order]
+        top_distances[row, :len(order)] = distances[order]
+    return (top_distances, positions) if return_distances else positions
+
+
+def search_index(store: FAISS, vectors: np.ndarray, k: int = 4, rerank_factor: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    정규화까지 끝난 질문 벡터 행렬로 (거리, 위치) 검색
+
+    압축 인덱스(sq8/pq/opq)이고 원본 벡터가 있으면 후보를 더 뽑아서 원본 벡터로 재정렬하고, 거리도 원본 벡터 기준이다.
+    """
+    k = min(k, store.index.ntotal)
+    rerank_factor = RERANK_FACTOR if rerank_factor is None else rerank_factor
+    exact_vectors = getattr(store, 'exact_vectors', None)
+    if exact_vectors is None or len(exact_vectors) != store.index.ntotal or rerank_factor <= 1:
+        return store.index.search(vectors, k)
+    _, candidates = store.index.search(vectors, min(k * rerank_factor, store.index.ntotal))
+    return rerank(exact_vectors, vectors, candidates, k, return_distances=True)
+
+
+def search_vectors(store: FAISS, vectors: np.ndarray, k: int = 4, rerank_factor: int = None) -> np.ndarray:
+    """
+    질문 벡터 행렬을 index.search 한 번으로 검색해서 쿼리별 상위 k 위치 행렬을 돌려준다
+
+    압축 인덱스(sq8/pq/opq)이고 원본 벡터가 있으면 후보를 더 뽑아서 원본 벡터로 재정렬한다.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if store._normalize_L2:
+        import faiss
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+    return search_index(store, vectors, k, rerank_factor)[1]
+
+
+def fuse_ranked(store: FAISS, positions: np.ndarray, rrf_k: int = RRF_K,
+                limit: Optional[int] = None) -> List[Document]:
+    """
+    쿼리별 검색 순위를 Reciprocal Rank Fusion 으로 합친 문서 목록
+
+    같은 청크(docstore id)는 한 번만 남기고, 여러 쿼리에서 높은 순위로 나온 청크가 앞에 온다.
+    """
+    scores = {}
+    for row in positions:
+        for rank, position in enumerate(row):
+            if position < 0:
+                # 인덱스 크기보다 k 가 크면 -1 로 채워진다
+                continue
+            chunk_id = store.index_to_docstore_id[int(position)]
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    if limit is not None:
+        ranked = ranked[:limit]
+    return [store.docstore.search(chunk_id) for chunk_id in ranked]
+
+
+def lookup_symbols(store: FAISS, question: str, limit: Optional[int] = None) -> Optional[List[Document]]:
+    """티커/종목 이름만 묻는 질문이면 임베딩 없이 그 종목의 시장 데이터 문서를 돌려준다 (아니면 None)"""
+    if store.index.ntotal == 0:
+        return None
+    positions = lexical_index(store).lookup(question)
+    if not positions:
+        return None
+    return [store.docstore.search(store.index_to_docstore_id[p]) for p in positions[:limit]]
+
+
+def batched_search(store: FAISS, queries: Sequence[str] = (), k: int = 4, vectors: np.ndarray = None,
+                   limit: Optional[int] = None, rerank_factor: int = None, hybrid: bool = None) -> List[Document]:
+    """
+    여러 질문(멀티 쿼리 확장 결과)을 한 번에 검색
+
+    질문 임베딩 한 번, FAISS 검색 한 번으로 처리하고 결과는 청크 id 기준으로 중복 제거 후 RRF 순으로 정렬한다.
+    hybrid 면 같은 청크의 BM25/종목 사전 검색 순위도 같이 RRF 로 합친다 (vectors 를 주더라도 queries 가 있어야 한다).
+
+    Args:
+        store: FAISS 벡터 스토어
+        queries: 검색할 질문들
+        k: 쿼리당 검색 문서 수
+        vectors: 이미 임베딩한 질문 벡터 (주면 queries 대신 사용)
+        limit: 돌려줄 최대 문서 수 (기본값: 중복 제거된 전체)
+        rerank_factor: 압축 인덱스 재정렬 후보 배수 (기본값: 환경변수 FAISS_RERANK_FACTOR 또는 4)
+        hybrid: 어휘 검색도 합칠지 (기본값: 환경변수 HYBRID_SEARCH 또는 켜짐)
+    """
+    if vectors is None:
+        if not queries:
+            return []
+        vectors = embed_queries(store.embeddings, queries)
+    if len(vectors) == 0 or store.index.ntotal == 0:
+        return []
+    positions = search_vectors(store, vectors, k, rerank_factor)
+    if (HYBRID_SEARCH if hybrid is None else hybrid) and queries:
+        positions = np.vstack([positions, lexical_index(store).ranked(queries, positions.shape[1])])
+    return fuse_ranked(store, positions, limit=limit)
@@ -0,0 +1,146 @@
+# src/vector_store/store_io.py
+
+import os
+import uuid
+import shutil
+import logging
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from langchain_community.vectorstores import FAISS
+
+from .index_builder import configure_search_from_env, is_compressed
+from .mmap_store import CHUNKS_FILE, GENERATION_FILE, SqliteDocstore, load_mmap_store, write_chunks, write_generation
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.faiss'
+DOCSTORE_FILE = 'index.pkl'
+# 압축 인덱스의 상위 후보 재정렬에 쓰는 원본 float32 벡터 (검색 시 mmap 으로 필요한 행만 읽는다)
+# pickle 형식과 저장본 id 가 생기기 전 mmap 저장본은 vectors.npy, mmap 형식은 vectors_file(저장본 id)
+VECTORS_FILE = 'vectors.npy'
+
+
+def vectors_file(generation: str) -> str:
+    # 저장본마다 파일 이름이 달라서 저장본 id 확인을 통과한 저장본의 벡터만 열게 된다
+    return f"vectors.{generation}.npy"
+
+
+def is_vectors_file(filename: str) -> bool:
+    return filename.startswith('vectors') and filename.endswith('.npy')
+
+
+STORE_FORMATS = ('mmap', 'pickle')
+
+
+def store_format_from_env() -> str:
+    """
+    저장 형식 (환경변수 VECTOR_STORE_FORMAT)
+
+    mmap(기본값): index.faiss 를 메모리 매핑으로 열고 청크 본문은 chunks.sqlite3 에서 검색 결과만 읽는다
+    pickle: LangChain 기본 형식 (index.pkl 에 문서 저장소 전체를 pickle)
+    """
+    store_format = os.getenv("VECTOR_STORE_FORMAT", "mmap").lower()
+    if store_format not in STORE_FORMATS:
+        raise ValueError(f"알 수 없는 VECTOR_STORE_FORMAT 값: {store_format}")
+    return store_format
+
+
+def save_store_atomic(store: FAISS, path: str = './db/faiss', store_format: str = None) -> None:
+    """
+    서버가 읽는 도중에도 안전하게 FAISS 벡터 스토어 저장
+
+    임시 디렉토리에 먼저 저장한 뒤 파일 단위로 os.replace 한다.
+    서버는 index.faiss 가 바뀌는 것을 보고 다시 읽으므로 원본 벡터, 문서 파일(chunks.sqlite3 또는 index.pkl)을 먼저,
+    index.faiss 를 그다음에 교체하고 다른 형식의 예전 파일과 이번 저장본이 쓰지 않는 원본 벡터 파일은 그 뒤에 지운다.
+    mmap 형식은 저장본 id 파일(index.generation)을 index.faiss 뒤에 교체한다 (load_mmap_store 가 이 순서에 맞춰 확인한다).
+    원본 벡터 파일 이름에도 저장본 id 를 넣고 chunks.sqlite3 에 기록하므로 다른 저장본의 벡터로 재정렬하지 않는다.
+
+    Args:
+        store_format: 'mmap' / 'pickle' (기본값: store_format_from_env())
+    """
+    store_format = store_format or store_format_from_env()
+    os.makedirs(path, exist_ok=True)
+    tmp_dir = os.path.join(path, f".tmp{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    exact_vectors = getattr(store, 'exact_vectors', None)
+    compressed = exact_vectors is not None and is_compressed(store.index)
+    try:
+        if store_format == 'mmap':
+            os.makedirs(tmp_dir)
+            generation = uuid.uuid4().hex
+            vectors_name = vectors_file(generation) if compressed else None
+            faiss.write_index(store.index, os.path.join(tmp_dir, INDEX_FILE))
+            write_chunks(store, os.path.join(tmp_dir, CHUNKS_FILE), generation, vectors_name)
+            write_generation(os.path.join(tmp_dir, GENERATION_FILE), generation)
+            filenames, stale = [CHUNKS_FILE, INDEX_FILE, GENERATION_FILE], [DOCSTORE_FILE]
+        else:
+            store.save_local(tmp_dir)
+            vectors_name = VECTORS_FILE if compressed else None
+            filenames, stale = [DOCSTORE_FILE, INDEX_FILE], [CHUNKS_FILE, GENERATION_FILE]
+        if vectors_name:
+            np.save(os.path.join(tmp_dir, vectors_name), np.asarray(exact_vectors, dtype=np.float32))
+            filenames.insert(0, vectors_name)
+        for filename in filenames:
+            os.replace(os.path.join(tmp_dir, filename), os.path.join(path, filename))
+        # 예전 저장본의 원본 벡터(압축 인덱스를 그만둔 경우 포함)는 교체가 끝난 뒤 지운다.
+        # 이미 매핑한 읽기는 그대로 쓰고, 예전 저장본을 막 확인한 읽기는 파일이 없으므로 다시 시도한다
+        stale += [name for name in os.listdir(path) if is_vectors_file(name) and name != vectors_name]
+        for filename in stale:
+            if os.path.exists(os.path.join(path, filename)):
+                os.remove(os.path.join(path, filename))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    logger.info(f"벡터 스토어 저장 완료: {path} ({store.index.ntotal}개 벡터)")
+
+
+def load_store(path: str = './db/faiss', embeddings=None, store_format: str = None) -> Optional[FAISS]:
+    """
+    저장된 FAISS 벡터 스토어 로드
+
+    chunks.sqlite3 가 있으면 메모리 매핑 형식으로, 없으면 예전 index.pkl 형식으로 읽는다.
+    index.faiss 와 문서 파일이 서로 다른 저장본이면(교체 도중) None 을 돌려주므로 잠시 뒤 다시 시도하면 된다.
+
+    Args:
+        store_format: 'mmap' / 'pickle' 로 형식을 강제 (기본값: 있는 파일로 판단)
+    """
+    if embeddings is None:
+        from .embeddings import get_embedding_model
+        embeddings = get_embedding_model()
+    if store_format is None:
+        store_format = 'mmap' if os.path.exists(os.path.join(path, CHUNKS_FILE)) else 'pickle'
+    if store_format == 'mmap':
+        store = load_mmap_store(path, embeddings, INDEX_FILE)
+        if store is None:
+            logger.warning(f"index.faiss 와 {CHUNKS_FILE} 이 다른 저장본입니다: {path}")
+            return None
+    else:
+        store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    if store.index.ntotal != len(store.index_to_docstore_id):
+        logger.warning(f"인덱스({store.index.ntotal})와 문서 저장소({len(store.index_to_docstore_id)}) 크기가 다릅니다: {path}")
+        return None
+    # nprobe / efSearch 는 인덱스를 다시 만들지 않고 환경변수로 조절
+    configure_search_from_env(store.index)
+    if not is_compressed(store.index):
+        return store
+    table = store.docstore.table if isinstance(store.docstore, SqliteDocstore) else None
+    if table is not None and table.generation is not None:
+        # 확인을 통과한 저장본의 원본 벡터만 연다 (없으면 그 뒤 저장에서 지워진 것이므로 다시 시도)
+        if table.vectors_file is None:
+            return store
+        try:
+            exact_vectors = np.load(os.path.join(path, table.vectors_file), mmap_mode='r')
+        except FileNotFoundError:
+            logger.warning(f"원본 벡터 파일 {table.vectors_file} 이 교체되었습니다: {path}")
+            return None
+    elif os.path.exists(os.path.join(path, VECTORS_FILE)):
+        exact_vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r')
+    else:
+        return store
+    if len(exact_vectors) == store.index.ntotal:
+        store.exact_vectors = exact_vectors
+    else:
+        logger.warning(f"원본 벡터({len(exact_vectors)})와 인덱스({store.index.ntotal}) 크기가 달라 재정렬 없이 검색합니다: {path}")
+    return store
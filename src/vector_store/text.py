@@ -0,0 +1,14 @@
+# src/vector_store/text.py
+
+import re
+import unicodedata
+
+_SPACES = re.compile(r'\s+')
+_TRAILING_PUNCT = re.compile(r'[\s?!.~,。？！]+$')
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 문장 정규화 (유니코드 NFKC, 소문자, 공백 정리, 끝 문장부호 제거)"""
+    text = unicodedata.normalize('NFKC', text or '').lower().strip()
+    text = _SPACES.sub(' ', text)
+    return _TRAILING_PUNCT.sub('', text)
@@ -0,0 +1,265 @@
+import unittest
+import os
+import sys
+import time
+import json
+import asyncio
+import threading
+from unittest import mock
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+import server.main as main
+from server.components.workerPool import BoundedWorkerPool
+from server.components.speculative import SPECULATIVE_WINS
+
+
+class FakeDispatcher:
+    """callbackUrl 로 보낼 응답을 기록만 하는 발송기"""
+
+    def __init__(self):
+        self.sent = []
+
+    def enqueue(self, url, payload):
+        self.sent.append((url, payload))
+        return True
+
+
+def kakaoRequest(utterance, user_id='user-a'):
+    return {"userRequest": {"utterance": utterance, "callbackUrl": "http://callback.test/cb", "user": {"id": user_id}}}
+
+
+def textCard(text):
+    return {"version": "2.0", "template": {"outputs": [{"simpleText": {"text": text}}], "quickReplies": []}}
+
+
+def slowCall(delay, result):
+    def call(*args):
+        time.sleep(delay)
+        return result
+    return call
+
+
+class ChatServerTestCase(unittest.TestCase):
+    """AI_Response / 빠른 답변을 가짜 함수로 바꾸고 ASGI 로 /chat/ 을 호출하는 테스트"""
+
+    def setUp(self):
+        self.dispatcher = FakeDispatcher()
+        self.patch('callback_dispatcher', self.dispatcher)
+        self.patch('MAX_WAIT_TIME', 0.3)
+        self.patch('FAST_GRACE', 0.1)
+        self.patch('worker_pool', BoundedWorkerPool(max_workers=2, max_queue=2))
+        self.patch('fast_pool', BoundedWorkerPool(max_workers=2, max_queue=0, name='fast-answer'))
+
+    def patch(self, name, value):
+        patcher = mock.patch.object(main, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, utterance, wait_callback=True):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                response = await client.post("/chat/", json=kakaoRequest(utterance))
+                # 콜백은 응답을 돌려준 뒤 백그라운드 태스크가 보낸다
+                deadline = time.monotonic() + 5
+                while wait_callback and not self.dispatcher.sent and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                return response.json()
+        return asyncio.run(run())
+
+
+class TestMainChat(ChatServerTestCase):
+    def setUp(self):
+        super().setUp()
+        # 카드 명령은 빠른 답변을 만들지 않는다
+        self.fast_answer = mock.MagicMock()
+        self.patch('getFastAnswer', self.fast_answer)
+
+    def test_sync_reply_within_deadline(self):
+        self.patch('AI_Response', slowCall(0.01, textCard('대시보드 카드')))
+        body = self.post('Dashboard')
+        self.assertEqual(body, {"version": "2.0", "useCallback": "true", "data": {}})
+        self.assertEqual(self.dispatcher.sent, [("http://callback.test/cb", textCard('대시보드 카드'))])
+        self.fast_answer.assert_not_called()
+
+    def test_placeholder_then_callback_after_deadline(self):
+        self.patch('AI_Response', slowCall(0.6, textCard('대시보드 카드')))
+
+        async def waitCallback():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                body = (await client.post("/chat/", json=kakaoRequest('Dashboard'))).json()
+                # 마감 시점에는 아직 콜백이 나가지 않았다
+                self.assertEqual(self.dispatcher.sent, [])
+                deadline = time.monotonic() + 5
+                while not self.dispatcher.sent and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                return body
+        self.assertIn('생각하고 있는 중이에요', asyncio.run(waitCallback())["data"]["text"])
+        self.assertEqual(self.dispatcher.sent, [("http://callback.test/cb", textCard('대시보드 카드'))])
+
+    def test_overload_when_pool_full(self):
+        self.patch('worker_pool', BoundedWorkerPool(max_workers=1, max_queue=0))
+        main.worker_pool.submit(time.sleep, 0.5)
+        ai_response = mock.MagicMock()
+        self.patch('AI_Response', ai_response)
+
+        body = self.post('Dashboard', wait_callback=False)
+        self.assertIn('너무 많이 몰려서', body["template"]["outputs"][0]["simpleText"]["text"])
+        self.assertEqual(body["template"]["quickReplies"][0]["messageText"], 'Dashboard')
+        ai_response.assert_not_called()
+        self.assertEqual(self.dispatcher.sent, [])
+
+    def test_handler_error_sends_error_card(self):
+        def failing(request):
+            raise RuntimeError("boom")
+        self.patch('AI_Response', failing)
+
+        body = self.post('Dashboard')
+        self.assertEqual(body, {"version": "2.0", "useCallback": "true", "data": {}})
+        self.assertEqual(len(self.dispatcher.sent), 1)
+        url, payload = self.dispatcher.sent[0]
+        self.assertEqual(url, "http://callback.test/cb")
+        self.assertIn('문제가 생겼어요', payload["template"]["outputs"][0]["simpleText"]["text"])
+        self.assertEqual(payload["template"]["quickReplies"][0]["messageText"], 'Dashboard')
+
+
+class TestSpeculativeAnswer(ChatServerTestCase):
+    def wins(self, tier):
+        return SPECULATIVE_WINS.value(command='ask', tier=tier)
+
+    def test_full_answer_within_grace_skips_fast_answer(self):
+        # 저장된 답변/같은 질문 공유처럼 바로 끝나는 요청은 작은 모델을 부르지 않는다
+        fast_answer = mock.MagicMock()
+        self.patch('AI_Response', slowCall(0.01, textCard('전체 답변')))
+        self.patch('getFastAnswer', fast_answer)
+        before = self.wins('full')
+
+        body = self.post('오늘 시장 어때?')
+        self.assertEqual(body, {"version": "2.0", "useCallback": "true", "data": {}})
+        self.assertEqual(self.dispatcher.sent, [("http://callback.test/cb", textCard('전체 답변'))])
+        self.assertEqual(self.wins('full'), before + 1)
+        fast_answer.assert_not_called()
+        self.assertEqual(main.fast_pool.stats()['submitted'], 0)
+
+    def test_full_answer_after_grace(self):
+        self.patch('AI_Response', slowCall(0.2, textCard('전체 답변')))
+        self.patch('getFastAnswer', slowCall(1.0, '짧은 답변'))
+        before = self.wins('full')
+
+        body = self.post('오늘 시장 어때?')
+        self.assertEqual(body, {"version": "2.0", "useCallback": "true", "data": {}})
+        self.assertEqual(self.wins('full'), before + 1)
+        self.assertEqual(main.fast_pool.stats()['submitted'], 1)
+
+    def test_fast_answer_replaces_placeholder(self):
+        # 전체 답변 풀이 한 자리뿐이어도 빠른 답변은 자기 풀에서 실행된다
+        self.patch('worker_pool', BoundedWorkerPool(max_workers=1, max_queue=0))
+        self.patch('AI_Response', slowCall(0.6, textCard('전체 답변')))
+        self.patch('getFastAnswer', slowCall(0.01, '짧은 답변'))
+        before = self.wins('fast')
+
+        body = self.post('오늘 시장 어때?')
+        self.assertTrue(body["data"]["text"].startswith('짧은 답변\n\n'))
+        # 자세한 답변은 여전히 콜백으로 간다
+        self.assertEqual(self.dispatcher.sent, [("http://callback.test/cb", textCard('전체 답변'))])
+        self.assertEqual(self.wins('fast'), before + 1)
+        self.assertEqual(main.worker_pool.stats()['rejected'], 0)
+
+    def test_placeholder_when_both_miss_deadline(self):
+        self.patch('AI_Response', slowCall(0.6, textCard('전체 답변')))
+        self.patch('getFastAnswer', slowCall(0.6, '짧은 답변'))
+        before = self.wins('placeholder')
+
+        body = self.post('오늘 시장 어때?')
+        self.assertIn('생각하고 있는 중이에요', body["data"]["text"])
+        self.assertEqual(self.dispatcher.sent, [("http://callback.test/cb", textCard('전체 답변'))])
+        self.assertEqual(self.wins('placeholder'), before + 1)
+
+    def test_fast_pool_full_skips_fast_answer(self):
+        self.patch('fast_pool', BoundedWorkerPool(max_workers=1, max_queue=0, name='fast-answer'))
+        fast_answer = mock.MagicMock()
+        main.fast_pool.submit(time.sleep, 0.5)
+        self.patch('AI_Response', slowCall(0.6, textCard('전체 답변')))
+        self.patch('getFastAnswer', fast_answer)
+
+        body = self.post('오늘 시장 어때?')
+        self.assertIn('생각하고 있는 중이에요', body["data"]["text"])
+        fast_answer.assert_not_called()
+        self.assertEqual(main.fast_pool.stats()['rejected'], 1)
+
+
+def sseParse(text):
+    """SSE 본문을 (이벤트, 데이터) 목록으로 변환"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestChatStream(ChatServerTestCase):
+    def stream(self, utterance):
+        async def run():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+                response = await client.post("/chat/stream", json={"utterance": utterance, "user": {"id": "web"}})
+                return sseParse(response.text)
+        return asyncio.run(run())
+
+    def test_tokens_then_done(self):
+        self.patch('streamAIResponse', lambda request: iter(['삼성', '전자 ', '상승']))
+        events = self.stream('삼성전자 왜 올랐어?')
+        self.assertEqual([event for event, _ in events], ['token', 'token', 'token', 'done'])
+        self.assertEqual([data['text'] for _, data in events[:3]], ['삼성', '전자 ', '상승'])
+        done = events[-1][1]
+        self.assertEqual(done['text'], '삼성전자 상승')
+        self.assertLessEqual(done['ttft_ms'], done['total_ms'])
+
+    def test_card_command_falls_back_to_full_response(self):
+        ai_response = mock.MagicMock(return_value=textCard('대시보드 카드'))
+        self.patch('streamAIResponse', lambda request: None)
+        self.patch('AI_Response', ai_response)
+        events = self.stream('Dashboard')
+        self.assertEqual(events, [('response', textCard('대시보드 카드'))])
+        ai_response.assert_called_once()
+        # 카드도 /chat/ 과 같은 워커 풀에서 만든다
+        self.assertEqual(main.worker_pool.stats()['submitted'], 1)
+
+    def test_overload_when_pool_full(self):
+        self.patch('worker_pool', BoundedWorkerPool(max_workers=1, max_queue=0))
+        main.worker_pool.submit(time.sleep, 0.5)
+        ai_response = mock.MagicMock()
+        self.patch('streamAIResponse', lambda request: None)
+        self.patch('AI_Response', ai_response)
+        events = self.stream('Dashboard')
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][0], 'response')
+        self.assertIn('너무 많이 몰려서', events[0][1]['template']['outputs'][0]['simpleText']['text'])
+        ai_response.assert_not_called()
+
+    def test_disconnect_closes_llm_stream(self):
+        closed = threading.Event()
+
+        def endless(request):
+            try:
+                while True:
+                    time.sleep(0.01)
+                    yield '토큰'
+            finally:
+                closed.set()
+
+        self.patch('streamAIResponse', endless)
+        events = main.sseEvents(kakaoRequest('삼성전자 왜 올랐어?'))
+        self.assertTrue(next(events).startswith('event: token'))
+        # 클라이언트가 끊으면 Starlette 가 generator 를 닫는다
+        events.close()
+        self.assertTrue(closed.wait(2))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import subprocess
+import urllib.request
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+# 부모: 미리 읽기 -> 공유 소켓 -> 워커 2개 fork. 워커는 시작할 때 자기 pid 를 공유 상태 저장소에 기록하고
+# GET /<user_id> 로 저장소 값을 돌려준다
+SUPERVISOR_SCRIPT = '''
+import gc, os, sys, json, signal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from server import prefork
+
+app, timings = prefork.preload()
+frozen = gc.get_freeze_count()
+from server.components.responseHandlers import conversation_store
+sock = prefork.bindSocket("127.0.0.1", 0)
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({"pid": os.getpid(), "value": conversation_store.get(self.path.strip("/"))}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(index):
+    conversation_store.put(f"worker-{index}", {"pid": os.getpid()})
+    server = HTTPServer(sock.getsockname(), Handler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.serve_forever()
+
+supervisor = prefork.WorkerSupervisor(serve, 2)
+signal.signal(signal.SIGTERM, supervisor.stop)
+supervisor.start()
+print(json.dumps({"port": sock.getsockname()[1], "frozen": frozen, "pids": list(supervisor.children),
+                  "state_db": os.environ["STATE_DB_PATH"]}), flush=True)
+supervisor.wait()
+'''
+
+
+def fetch(port, user_id):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/{user_id}", timeout=5) as response:
+        return json.loads(response.read())
+
+
+def waitFor(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = condition()
+        except OSError:
+            # 죽은 워커가 받아 둔 연결은 끊긴다
+            result = None
+        if result:
+            return result
+        time.sleep(0.05)
+    return None
+
+
+class TestPrefork(unittest.TestCase):
+    def test_default_state_db_path(self):
+        env = {k: v for k, v in os.environ.items() if k != 'STATE_DB_PATH'}
+        output = subprocess.run([sys.executable, '-c', 'import os, server.prefork; print(os.environ["STATE_DB_PATH"])'],
+                                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(output.stdout.strip(), os.path.join('data', 'conversation_state.db'))
+
+    def test_workers_share_state_and_respawn(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, STATE_DB_PATH=os.path.join(tmp, 'state.db'))
+            proc = subprocess.Popen([sys.executable, '-c', SUPERVISOR_SCRIPT], cwd=PROJECT_ROOT, env=env,
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            try:
+                info = json.loads(proc.stdout.readline())
+                port, pids = info['port'], info['pids']
+                # 미리 읽은 객체는 fork 전에 GC 대상에서 빠져 있다
+                self.assertGreater(info['frozen'], 0)
+                self.assertEqual(info['state_db'], os.path.join(tmp, 'state.db'))
+                self.assertEqual(len(set(pids)), 2)
+
+                # 다른 워커가 기록한 상태를 읽은 응답이 나올 때까지 (어느 워커가 연결을 받을지는 커널이 정한다)
+                def crossRead():
+                    replies = [fetch(port, f"worker-{i}") for i in range(2)]
+                    if all(r['value'] for r in replies) and any(r['pid'] != r['value']['pid'] for r in replies):
+                        return replies
+                    return None
+                replies = waitFor(crossRead)
+                self.assertIsNotNone(replies)
+                self.assertEqual({r['value']['pid'] for r in replies}, set(pids))
+
+                # 죽은 워커는 다시 뜨고, 같은 소켓으로 요청을 받는다
+                os.kill(pids[0], signal.SIGKILL)
+                respawned = waitFor(lambda: fetch(port, 'worker-0')['value']['pid'] not in pids)
+                self.assertTrue(respawned)
+                self.assertEqual(fetch(port, 'worker-1')['value']['pid'], pids[1])
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                proc.wait(timeout=10)
+                proc.stdout.close()
+            self.assertEqual(proc.returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
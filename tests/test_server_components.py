@@ -0,0 +1,560 @@
+import unittest
+import os
+import sys
+import time
+import json
+import fcntl
+import tempfile
+import threading
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server.components.workerPool import BoundedWorkerPool, PoolOverloaded
+from server.components.callbackDispatcher import CallbackDispatcher
+from server.components.stateStore import ConversationStateStore
+from server.components.cardCache import CardSnapshotCache, readLastCsvValue
+from server.components import responseHandlers
+from server.components.semanticCache import SemanticAnswerCache, nextRefreshTime, questionPolarity
+from server.components.metrics import MetricsRegistry
+from server.components.llmGateway import LLMGateway
+from server.components.speculative import parsePolicy
+from server.components.singleFlight import SingleFlight
+from server.components import newsDigest
+from server.components.newsDigest import BUILD_LOCK_FILE, DigestStore, buildDigest
+from server.components.imageVariants import VariantManifest
+from src.data_processing.image_variants import write_variants
+from server.components.retrievalService import RetrievalService
+from server.components.queryExpansion import QueryExpander
+from src.vector_store import save_store_atomic
+
+
+class TestBoundedWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = BoundedWorkerPool(max_workers=1, max_queue=1)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.pool.shutdown()
+
+    def test_rejects_when_queue_full(self):
+        started = threading.Event()
+
+        def blocking():
+            started.set()
+            return self.release.wait()
+        first = self.pool.submit(blocking)
+        # 워커 스레드가 첫 작업을 집어 들기 전에 상태를 읽지 않도록 시작할 때까지 기다린다
+        self.assertTrue(started.wait(timeout=5))
+        second = self.pool.submit(lambda: 'queued')
+
+        # 실행 1개 + 대기 1개가 찼으므로 세 번째 요청은 거절
+        with self.assertRaises(PoolOverloaded):
+            self.pool.submit(lambda: 'rejected')
+
+        stats = self.pool.stats()
+        self.assertEqual(stats['active'], 1)
+        self.assertEqual(stats['queue_depth'], 1)
+        self.assertEqual(stats['rejected'], 1)
+
+        self.release.set()
+        self.assertTrue(first.result(timeout=1))
+        self.assertEqual(second.result(timeout=1), 'queued')
+
+    def test_slots_released_after_completion(self):
+        self.release.set()
+        for _ in range(5):
+            self.pool.submit(time.sleep, 0).result(timeout=1)
+        stats = self.pool.stats()
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['queue_depth'], 0)
+
+
+class CallbackSink(BaseHTTPRequestHandler):
+    """콜백을 받아 저장하는 로컬 HTTP 서버 핸들러"""
+    received = []
+    fail_first = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if CallbackSink.fail_first > 0:
+            CallbackSink.fail_first -= 1
+            self.send_response(503)
+        else:
+            CallbackSink.received.append(json.loads(body))
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCallbackDispatcher(unittest.TestCase):
+    def setUp(self):
+        CallbackSink.received = []
+        CallbackSink.fail_first = 0
+        self.sink = ThreadingHTTPServer(('127.0.0.1', 0), CallbackSink)
+        threading.Thread(target=self.sink.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.sink.server_address[1]}/callback"
+        self.dispatcher = CallbackDispatcher(senders=2, outbox_size=10, backoff_base=0.01)
+
+    def tearDown(self):
+        self.dispatcher.stop()
+        self.sink.shutdown()
+        self.sink.server_close()
+
+    def test_delivers_payloads(self):
+        for i in range(5):
+            self.assertTrue(self.dispatcher.enqueue(self.url, {'n': i}))
+        self.dispatcher.stop()
+
+        self.assertEqual(sorted(p['n'] for p in CallbackSink.received), list(range(5)))
+        stats = self.dispatcher.stats()
+        self.assertEqual(stats['delivered'], 5)
+        self.assertEqual(stats['failed'], 0)
+        self.assertIsNotNone(stats['latency_p50_s'])
+
+    def test_retries_server_errors(self):
+        CallbackSink.fail_first = 2
+        self.dispatcher.enqueue(self.url, {'n': 1})
+        self.dispatcher.stop()
+
+        self.assertEqual(CallbackSink.received, [{'n': 1}])
+        self.assertEqual(self.dispatcher.stats()['retries'], 2)
+
+    def test_counts_failures_after_retries(self):
+        CallbackSink.fail_first = 10
+        self.dispatcher.enqueue(self.url, {'n': 1})
+        self.dispatcher.stop()
+
+        stats = self.dispatcher.stats()
+        self.assertEqual(stats['delivered'], 0)
+        self.assertEqual(stats['failed'], 1)
+
+
+class TestConversationStateStore(unittest.TestCase):
+    def test_users_do_not_overwrite_each_other(self):
+        store = ConversationStateStore(ttl=60)
+        store.put('user-a', {'text': 'A 의 답변'})
+        store.put('user-b', {'text': 'B 의 답변'})
+
+        self.assertEqual(store.pop('user-a'), {'text': 'A 의 답변'})
+        self.assertIsNone(store.get('user-a'))
+        self.assertEqual(store.get('user-b'), {'text': 'B 의 답변'})
+
+    def test_expired_entries_are_evicted(self):
+        store = ConversationStateStore(ttl=0.05)
+        store.put('user-a', {'text': 'old'})
+        time.sleep(0.1)
+        self.assertIsNone(store.get('user-a'))
+        self.assertEqual(len(store), 0)
+
+    def test_max_entries(self):
+        store = ConversationStateStore(ttl=60, max_entries=2)
+        for user_id in ('a', 'b', 'c'):
+            store.put(user_id, {'text': user_id})
+        self.assertEqual(len(store), 2)
+        self.assertIsNone(store.get('a'))
+
+    def test_sqlite_backing_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'state.sqlite')
+            ConversationStateStore(ttl=60, db_path=db_path).put('user-a', {'text': '저장됨'})
+
+            restarted = ConversationStateStore(ttl=60, db_path=db_path)
+            self.assertEqual(restarted.get('user-a'), {'text': '저장됨'})
+
+    def test_pop_hands_value_to_one_worker(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'state.sqlite')
+            # 워커마다 자기 SQLite 연결을 가진 저장소
+            workers = [ConversationStateStore(ttl=60, db_path=db_path) for _ in range(4)]
+            for round_ in range(50):
+                workers[0].put('user-a', {'text': f'답변 {round_}'})
+                barrier = threading.Barrier(len(workers))
+                results = []
+
+                def popper(store):
+                    barrier.wait()
+                    results.append(store.pop('user-a'))
+                threads = [threading.Thread(target=popper, args=(store,)) for store in workers]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                self.assertEqual([r for r in results if r is not None], [{'text': f'답변 {round_}'}])
+            self.assertIsNone(workers[1].get('user-a'))
+
+
+class TestCardSnapshotCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.tmp.name, 'fear_greed_index.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write('timestamp,value\n2024-12-07T02:18:26,41.5\n2024-12-08T02:18:26,53.0\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_read_last_csv_value(self):
+        self.assertEqual(readLastCsvValue(self.csv_path), 53.0)
+        self.assertEqual(readLastCsvValue(self.csv_path, block_size=4), 53.0)
+
+    def test_skips_merge_conflict_lines(self):
+        with open(self.csv_path, 'a') as f:
+            f.write('<<<<<<< HEAD\n=======\n>>>>>>> refs/remotes/origin/main\n')
+        # 마지막 블록에 숫자 행이 없으면 앞 블록까지 읽는다
+        for block_size in (4, 16, 1024):
+            self.assertEqual(readLastCsvValue(self.csv_path, block_size=block_size), 53.0)
+        with open(self.csv_path, 'w') as f:
+            f.write('timestamp,value\n=======\n')
+        self.assertIsNone(readLastCsvValue(self.csv_path, block_size=4))
+
+    def test_fear_greed_card_without_value(self):
+        with open(self.csv_path, 'w') as f:
+            f.write('timestamp,value\n=======\n')
+        with mock.patch.object(responseHandlers, 'FEAR_GREED_CSV', self.csv_path):
+            response = responseHandlers.buildFearandGreed('http://testserver/chat/')
+        self.assertIn('불러오지 못했어요', response["template"]["outputs"][0]["simpleText"]["text"])
+
+    def test_rebuilds_only_when_file_changes(self):
+        cache = CardSnapshotCache(check_interval=0)
+        build = lambda: {'score': readLastCsvValue(self.csv_path)}
+
+        self.assertEqual(cache.get('fg', lambda: [self.csv_path], build), {'score': 53.0})
+        cache.get('fg', lambda: [self.csv_path], build)
+        self.assertEqual(cache.rebuilds, 1)
+
+        with open(self.csv_path, 'a') as f:
+            f.write('2024-12-09T02:18:26,60.0\n')
+        self.assertEqual(cache.get('fg', lambda: [self.csv_path], build), {'score': 60.0})
+        self.assertEqual(cache.rebuilds, 2)
+
+    def test_concurrent_hits_are_counted(self):
+        cache = CardSnapshotCache(check_interval=60)
+        build = lambda: {'score': readLastCsvValue(self.csv_path)}
+        cache.get('fg', lambda: [self.csv_path], build)
+
+        def worker():
+            for _ in range(2000):
+                cache.get('fg', lambda: [self.csv_path], build)
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual((cache.hits, cache.rebuilds), (16000, 1))
+
+
+def fake_embed(text):
+    """글자 빈도로 만든 정규화 벡터 (테스트용 임베딩)"""
+    vector = [0.0] * 509
+    for ch in text:
+        vector[ord(ch) % 509] += 1.0
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    def test_similar_question_hits(self):
+        cache = SemanticAnswerCache(embed=fake_embed, threshold=0.9)
+        answer, vector = cache.lookup('오늘 시장 어때?')
+        self.assertIsNone(answer)
+        cache.store('오늘 시장 어때?', '상승장입니다', vector)
+
+        answer, _ = cache.lookup('오늘 시장  어때')
+        self.assertEqual(answer, '상승장입니다')
+        answer, _ = cache.lookup('나스닥 왜 떨어졌어?')
+        self.assertIsNone(answer)
+
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_negated_or_opposite_question_misses(self):
+        # threshold=0 이면 유사도와 상관없이 방향/부정 여부만으로 가른다
+        cache = SemanticAnswerCache(embed=fake_embed, threshold=0)
+        self.assertEqual(cache.threshold, 0)
+        cache.store('엔비디아 왜 올랐어?', '실적 호조 때문입니다')
+        self.assertIsNone(cache.lookup('엔비디아 왜 떨어졌어?')[0])
+        self.assertIsNone(cache.lookup('엔비디아 왜 안 올랐어?')[0])
+        self.assertIsNone(cache.lookup('엔비디아 오늘 어때?')[0])
+        self.assertEqual(cache.lookup('엔비디아 주가 왜 상승했어')[0], '실적 호조 때문입니다')
+        self.assertNotEqual(questionPolarity('금리 안 내렸어?'), questionPolarity('금리 내렸어?'))
+        self.assertNotEqual(questionPolarity('안정적인 종목'), questionPolarity('안 오른 종목'))
+        self.assertEqual(questionPolarity('why did NVDA fall'), questionPolarity('엔비디아 왜 떨어졌어'))
+        self.assertEqual(questionPolarity('market update'), 0)
+
+    def test_default_threshold(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('SEMANTIC_CACHE_THRESHOLD', None)
+            self.assertEqual(SemanticAnswerCache(embed=fake_embed).threshold, 0.95)
+
+    def test_lru_eviction_under_memory_cap(self):
+        cache = SemanticAnswerCache(embed=fake_embed, threshold=0.99, max_bytes=4200)
+        for question in ('가가가', '나나나', '다다다'):
+            cache.store(question, '답변')
+        self.assertLessEqual(cache.stats()['bytes'], 4200)
+        self.assertGreater(cache.stats()['evicted'], 0)
+        self.assertIsNone(cache.lookup('가가가')[0])
+        self.assertEqual(cache.lookup('다다다')[0], '답변')
+
+    def test_entries_expire_at_daily_refresh(self):
+        now = time.mktime((2024, 12, 9, 7, 30, 0, 0, 0, -1))
+        self.assertEqual(nextRefreshTime(now, 8) - now, 30 * 60)
+        self.assertEqual(nextRefreshTime(now + 3600, 8) - now, 24.5 * 3600)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        stages = registry.histogram('chat_stage_seconds', 'stage latency', ['stage'], buckets=(0.1, 1.0))
+        deadline = registry.counter('chat_deadline_total', 'deadline outcome', ['outcome'])
+        registry.callback('ai_pool_queue_depth', 'queue depth', lambda: 3)
+
+        stages.observe(0.05, stage='retrieval')
+        stages.observe(0.5, stage='retrieval')
+        deadline.inc(outcome='sync')
+        deadline.inc(outcome='sync')
+
+        text = registry.render()
+        self.assertIn('# TYPE chat_stage_seconds histogram', text)
+        self.assertIn('chat_stage_seconds_bucket{stage="retrieval",le="0.1"} 1', text)
+        self.assertIn('chat_stage_seconds_bucket{stage="retrieval",le="+Inf"} 2', text)
+        self.assertIn('chat_stage_seconds_count{stage="retrieval"} 2', text)
+        self.assertIn('chat_deadline_total{outcome="sync"} 2', text)
+        self.assertIn('ai_pool_queue_depth 3', text)
+
+
+class TestLLMGateway(unittest.TestCase):
+    def setUp(self):
+        self.gateway = LLMGateway(backend="stub", concurrency="1")
+        self.addCleanup(self.gateway.close)
+
+    def test_closed_stream_releases_slot(self):
+        from langchain_core.messages import HumanMessage
+
+        llm = self.gateway.get_llm("stub-model")
+        stream = llm._stream([HumanMessage(content="삼성전자 주가가 왜 올랐어")])
+        next(stream)
+        self.assertEqual(self.gateway.stats()['in_flight'], {'stub-model': 1})
+        # 끝까지 읽지 않고 닫아도(GeneratorExit) 슬롯이 바로 돌아와야 한다
+        stream.close()
+        self.assertEqual(self.gateway.stats()['in_flight'], {'stub-model': 0})
+        self.assertIn("stub stub-model", llm.invoke("다음 질문").content)
+
+
+class TestSpeculativePolicy(unittest.TestCase):
+    def test_parse_policy(self):
+        self.assertEqual(parsePolicy('v=160, s=0,ask=120,news=off'), {'v': 160, 'ask': 120})
+        self.assertEqual(parsePolicy(''), {})
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_identical_calls_share_one_execution(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'text': 'dashboard'}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('dashboard', compute, label='dashboard')))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('dashboard', compute, label='dashboard')))
+                     for _ in range(4)]
+        for t in followers:
+            t.start()
+        while flight.stats()['saved_total'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for t in [leader] + followers:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True, True])
+        self.assertTrue(all(result == {'text': 'dashboard'} for result, _ in results))
+        self.assertEqual(flight.stats()['saved'], {'dashboard': 4})
+
+        # 실행이 끝나면 다음 호출은 다시 계산한다
+        flight.do('dashboard', compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('k', lambda: (_ for _ in ()).throw(ValueError('boom')))
+        self.assertEqual(flight.stats()['in_flight'], 0)
+
+
+class TestDigestStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.calls = []
+
+        def summarize(question, window=None):
+            self.calls.append(question)
+            time.sleep(0.1)
+            return f'요약 {len(self.calls)}'
+
+        for patcher in (mock.patch('server.components.summerize.retrivial_from_vector_space.getResponseBasedVectorSpace',
+                                   summarize),
+                        mock.patch.object(newsDigest, 'indexVersion', lambda: 'index-1')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_build_digest_writes_versions(self):
+        first = buildDigest(self.tmp.name)
+        second = buildDigest(self.tmp.name)
+        self.assertEqual((first['version'], second['version']), (1, 2))
+        with open(os.path.join(self.tmp.name, 'latest.json'), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['text'], '요약 2')
+
+    def test_is_stale(self):
+        store = DigestStore(self.tmp.name, check_interval=0)
+        digest = buildDigest(self.tmp.name)
+        self.assertFalse(store.isStale(digest))
+        self.assertTrue(store.isStale(None))
+        self.assertTrue(store.isStale({**digest, 'date': '20000101'}))
+        self.assertTrue(store.isStale({**digest, 'index_version': 'index-0'}))
+
+    def test_cold_requests_do_not_build_in_request_thread(self):
+        store = DigestStore(self.tmp.name, check_interval=0)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(store.get())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        # 요약이 없으면 바로 None 을 돌려주고 백그라운드에서 한 번만 만든다
+        self.assertEqual(results, [None] * 5)
+        while store._refreshing:
+            time.sleep(0.01)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(store.get(), '요약 1')
+        self.assertEqual((store.served, store.refreshes), (1, 1))
+
+    def test_other_worker_building_is_not_repeated(self):
+        store = DigestStore(self.tmp.name, check_interval=0)
+        with open(os.path.join(self.tmp.name, BUILD_LOCK_FILE), 'w') as lock:
+            # 다른 워커 프로세스가 요약을 만드는 중
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            store.refreshInBackground().join(5)
+        self.assertEqual(self.calls, [])
+        # 이미 최신 요약이 있으면 잠금을 얻어도 다시 만들지 않는다
+        buildDigest(self.tmp.name)
+        store.refreshInBackground().join(5)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(store.refreshes, 0)
+
+
+class TestImageVariants(unittest.TestCase):
+    def test_variants_are_hashed_and_found_through_manifest(self):
+        from PIL import Image, ImageDraw
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'dashboard_20241209.png')
+            image = Image.new('RGB', (3000, 1500), 'white')
+            ImageDraw.Draw(image).rectangle((100, 100, 2000, 1000), fill='#34C759')
+            image.save(source)
+
+            entry = write_variants(source, widths=(1080, 720))
+            self.assertEqual(sorted(entry['variants']), ['1080', '720'])
+            for files in entry['variants'].values():
+                for v in files.values():
+                    self.assertLess(v['bytes'], entry['source_bytes'])
+                    self.assertTrue(os.path.exists(os.path.join(tmp, 'variants', v['file'])))
+
+            manifest = VariantManifest(os.path.join(tmp, 'variants', 'manifest.json'))
+            self.assertEqual(manifest.find('dashboard_20241209.png', 'jpeg', 1080), entry['variants']['1080']['jpeg']['file'])
+            self.assertEqual(manifest.find('dashboard_20241209.png', 'png', 800), entry['variants']['720']['png']['file'])
+            self.assertIsNone(manifest.find('missing.png'))
+
+
+class TestRetrievalService(unittest.TestCase):
+    def test_hot_swap_keeps_in_flight_store(self):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_community.vectorstores import FAISS
+
+        embeddings = DeterministicFakeEmbedding(size=16)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'faiss')
+            service = RetrievalService(path, reload_interval=60, embeddings=embeddings)
+            self.assertFalse(service.load())
+
+            save_store_atomic(FAISS.from_texts(['나스닥 상승', '금리 동결'], embeddings), path)
+            self.assertTrue(service.load())
+            self.assertTrue(service.stats()['ready'])
+            old_store = service.get()
+
+            save_store_atomic(FAISS.from_texts(['나스닥 상승', '금리 동결', '엔비디아 실적'], embeddings), path)
+            # 같은 초에 다시 저장해도 inode 가 바뀌므로 변경으로 인식된다
+            service.load()
+            self.assertEqual(service.stats()['vectors'], 3)
+            self.assertEqual(service.reloads, 1)
+            self.assertIsNot(service.get(), old_store)
+            # 교체 전에 받아 간 스토어는 그대로 검색할 수 있다
+            self.assertEqual(len(old_store.similarity_search('나스닥', k=2)), 2)
+            self.assertEqual(sorted(os.listdir(path)), ['chunks.sqlite3', 'index.faiss', 'index.generation'])
+
+    def test_partition_mode_filters_by_window(self):
+        from datetime import date
+        from langchain_core.documents import Document
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from src.vector_store.partitioned import PartitionedVectorStore
+
+        embeddings = DeterministicFakeEmbedding(size=16)
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PartitionedVectorStore(tmp, embeddings)
+            writer.write([Document(page_content='NVDA 120.0')], source='market', day=date(2024, 12, 20))
+            writer.write([Document(page_content='NVDA 134.2')], source='market', day=date(2024, 12, 26))
+            service = RetrievalService(tmp, reload_interval=60, embeddings=embeddings)
+            self.assertTrue(service.load())
+            self.assertEqual(service.stats()['vectors'], 2)
+            today = service.get((date(2024, 12, 26), date(2024, 12, 26)))
+            self.assertEqual(today.similarity_search('NVDA', k=4)[0].page_content, 'NVDA 134.2')
+            self.assertEqual(service.get().index.ntotal, 2)
+
+            writer.write([Document(page_content='NVDA 135.0')], source='market', day=date(2024, 12, 26))
+            service.load()
+            self.assertEqual(service.reloads, 1)
+            self.assertEqual(service.get((date(2024, 12, 26), date(2024, 12, 26))).similarity_search('NVDA', k=4)[0].page_content,
+                             'NVDA 135.0')
+
+
+class TestQueryExpander(unittest.TestCase):
+    def test_alias_queries(self):
+        expander = QueryExpander(mode="local", max_alias_queries=10)
+        queries = expander.aliasQueries("엔비디아 주가 어때?")
+        self.assertIn("NVIDIA 주가 어때", queries)
+        self.assertIn("NVDA 주가 어때", queries)
+        self.assertEqual(expander.aliasQueries("오늘 날씨"), [])
+
+    def test_local_mode_uses_cached_rewrites_without_llm(self):
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from langchain_community.vectorstores import FAISS
+
+        store = FAISS.from_texts(['나스닥 상승', '금리 동결', '엔비디아 실적', 'NVDA 주가'], DeterministicFakeEmbedding(size=16))
+        expander = QueryExpander(mode="local", neighbor_docs=2)
+        docs = expander.retrieve("엔비디아 실적", store, llm=None, k=2)
+        contents = [d.page_content for d in docs]
+        self.assertIn('엔비디아 실적', contents)
+        self.assertEqual(len(contents), len(set(contents)))
+
+        expander.rememberRewrites("엔비디아 실적", ["NVDA 주가"])
+        self.assertEqual(expander.expand("엔비디아  실적"), ["엔비디아  실적", "NVDA 주가"])
+        self.assertEqual(expander.stats()['llm_calls'], 0)
+        self.assertEqual(QueryExpander(mode="none").expand("금리"), ["금리"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,459 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date
+from unittest import mock
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+
+from src.vector_store import (CachedEmbeddings, EmbeddingCache, batched_search, describe_index, embed_queries,
+                              load_store, lookup_symbols, normalize_text, rebuild_index, save_store_atomic)
+from src.vector_store import mmap_store
+from src.vector_store.mmap_store import ChunkIdMap, SqliteDocstore, convert_pickle_store
+from src.vector_store.dedup import FingerprintIndex, deduplicate, fingerprint
+from src.vector_store.lexical import LexicalIndex, lexical_index
+from src.vector_store.partitioned import PartitionedVectorStore, load_partitions, parse_time_window
+
+
+class TestBatchedSearch(unittest.TestCase):
+    def setUp(self):
+        self.texts = ['나스닥 상승', '금리 동결', '엔비디아 실적', 'NVDA 주가', '금값 최고치', '유가 하락']
+        self.store = FAISS.from_texts(self.texts, DeterministicFakeEmbedding(size=16))
+
+    def test_same_documents_as_sequential_search(self):
+        queries = ['나스닥 상승', '금리 동결', '엔비디아 실적']
+        expected = set()
+        for query in queries:
+            expected.update(d.page_content for d in self.store.similarity_search(query, k=2))
+        docs = batched_search(self.store, queries, k=2)
+        contents = [d.page_content for d in docs]
+        self.assertEqual(set(contents), expected)
+        self.assertEqual(len(contents), len(set(contents)))
+
+    def test_rank_fusion_puts_shared_chunk_first(self):
+        # 더 많은 쿼리에서 1위로 나온 청크가 맨 앞
+        docs = batched_search(self.store, ['유가 하락'] * 2 + ['금값 최고치'], k=1)
+        self.assertEqual(docs[0].page_content, '유가 하락')
+        self.assertEqual(len(batched_search(self.store, ['유가 하락', '금값 최고치'], k=3, limit=2)), 2)
+
+    def test_precomputed_vectors_and_large_k(self):
+        vectors = embed_queries(self.store.embeddings, ['금리 동결', '금값 최고치'])
+        self.assertEqual(vectors.shape, (2, 16))
+        # 인덱스 크기보다 큰 k 도 전체 문서를 한 번씩만 돌려준다
+        docs = batched_search(self.store, k=50, vectors=vectors)
+        self.assertEqual(sorted(d.page_content for d in docs), sorted(self.texts))
+        self.assertEqual(batched_search(self.store, []), [])
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_hits_on_normalized_text(self):
+        base = CountingEmbedding(size=8)
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_bytes=1024))
+        first = embeddings.embed_query('오늘의 뉴스')
+        self.assertEqual(embeddings.embed_query('  오늘의   뉴스! '), first)
+        vectors = embeddings.embed_documents(['오늘의 뉴스', '나스닥 전망'])
+        self.assertEqual(vectors[0], first)
+        self.assertEqual(base.calls, 2)
+        stats = embeddings.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = EmbeddingCache(max_bytes=2 * 8 * 4)
+        cache.put('a', [1.0] * 8)
+        cache.put('b', [2.0] * 8)
+        cache.get('a')
+        cache.put('c', [3.0] * 8)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a')[0], 1.0)
+        self.assertEqual(cache.stats()['bytes'], 64)
+        self.assertEqual(cache.evicted, 1)
+
+    def test_persist_across_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'embedding_cache.npz')
+            cache = EmbeddingCache(max_bytes=1024, path=path)
+            cache.put('금리 동결', [0.5] * 8, cost=0.02)
+            cache.save()
+            restored = EmbeddingCache(max_bytes=1024, path=path)
+            self.assertEqual(restored.get('금리 동결').tolist(), [0.5] * 8)
+            self.assertAlmostEqual(restored.cpu_seconds_saved, 0.02)
+            # 다른 모델로 저장된 벡터는 쓰지 않는다
+            self.assertIsNone(EmbeddingCache(model_name='other', path=path).get('금리 동결'))
+
+
+class TestIndexBuilder(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.texts = [f'뉴스 {i}' for i in range(120)]
+        self.store = FAISS.from_texts(self.texts, self.embeddings)
+
+    def test_rebuild_keeps_results_and_documents(self):
+        expected = [d.page_content for d in self.store.similarity_search('뉴스 7', k=3)]
+        for index_type, params in (('hnsw', {'ef_search': 64}), ('ivf', {'nprobe': 100})):
+            store = rebuild_index(FAISS.from_texts(self.texts, self.embeddings), index_type=index_type, **params)
+            self.assertEqual(describe_index(store.index)['type'], index_type)
+            self.assertEqual(store.index.ntotal, 120)
+            self.assertEqual([d.page_content for d in store.similarity_search('뉴스 7', k=3)], expected)
+            # 다음 날 add_documents 도 그대로 동작
+            store.add_texts(['새 뉴스'])
+            self.assertEqual(store.similarity_search('새 뉴스', k=1)[0].page_content, '새 뉴스')
+
+    def test_flat_is_left_alone_and_search_params_come_from_env(self):
+        self.assertIs(rebuild_index(self.store, index_type='flat').index, self.store.index)
+        store = rebuild_index(self.store, index_type='ivf', nlist=2, nprobe=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(store, tmp)
+            os.environ['FAISS_IVF_NPROBE'] = '2'
+            try:
+                loaded = load_store(tmp, self.embeddings)
+            finally:
+                del os.environ['FAISS_IVF_NPROBE']
+        self.assertEqual(describe_index(loaded.index), {'type': 'ivf', 'vectors': 120, 'dim': 16, 'bytes_per_vector': 64, 'nlist': 2, 'nprobe': 2})
+
+
+    def test_compressed_index_reranks_with_exact_vectors(self):
+        expected = [d.page_content for d in self.store.similarity_search('뉴스 7', k=3)]
+        for index_type in ('sq8', 'pq', 'opq'):
+            store = rebuild_index(FAISS.from_texts(self.texts, self.embeddings), index_type=index_type, pq_m=4)
+            self.assertLess(describe_index(store.index)['bytes_per_vector'], 16 * 4)
+            with tempfile.TemporaryDirectory() as tmp:
+                save_store_atomic(store, tmp)
+                vectors_files = [name for name in os.listdir(tmp) if name.startswith('vectors.')]
+                self.assertEqual(len(vectors_files), 1)
+                loaded = load_store(tmp, self.embeddings)
+                self.assertEqual(len(loaded.exact_vectors), 120)
+                # 후보를 전부 재정렬하면 flat 과 같은 결과
+                docs = batched_search(loaded, ['뉴스 7'], k=3, rerank_factor=40, hybrid=False)
+                self.assertEqual([d.page_content for d in docs], expected)
+                self.assertEqual(batched_search(loaded, ['뉴스 7'], k=3)[0].page_content, '뉴스 7')
+                # 다시 flat 으로 바꾸면 원본 벡터 파일은 지운다
+                save_store_atomic(rebuild_index(loaded, index_type='flat'), tmp)
+                self.assertFalse([name for name in os.listdir(tmp) if name.startswith('vectors.')])
+
+    def test_exact_vectors_belong_to_the_same_save(self):
+        store = rebuild_index(FAISS.from_texts(self.texts, self.embeddings), index_type='sq8')
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(store, tmp)
+            chunks = os.path.join(tmp, 'chunks.sqlite3')
+            first = load_store(tmp, self.embeddings)
+            # 같은 개수로 다시 저장해도 원본 벡터 파일은 저장본마다 따로 있고, 예전 파일은 지워진다
+            rebuilt = rebuild_index(FAISS.from_texts([t + ' 수정' for t in self.texts], self.embeddings), index_type='sq8')
+            save_store_atomic(rebuilt, tmp)
+            self.assertTrue(np.array_equal(np.asarray(first.exact_vectors), np.asarray(store.exact_vectors)))
+            second = load_store(tmp, self.embeddings)
+            self.assertTrue(np.array_equal(np.asarray(second.exact_vectors), np.asarray(rebuilt.exact_vectors)))
+            self.assertEqual(len([name for name in os.listdir(tmp) if name.startswith('vectors.')]), 1)
+            # 예전 저장본을 확인한 직후 그 원본 벡터가 지워졌으면(교체 도중) 읽지 않는다
+            old = os.path.join(tmp, 'old')
+            os.makedirs(old)
+            save_store_atomic(store, old)
+            os.replace(os.path.join(old, 'chunks.sqlite3'), chunks)
+            os.replace(os.path.join(old, 'index.faiss'), os.path.join(tmp, 'index.faiss'))
+            os.replace(os.path.join(old, 'index.generation'), os.path.join(tmp, 'index.generation'))
+            self.assertIsNone(load_store(tmp, self.embeddings))
+
+
+class TestPartitionedStore(unittest.TestCase):
+    def setUp(self):
+        from langchain_core.documents import Document
+
+        self.Document = Document
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PartitionedVectorStore(self.tmp.name, self.embeddings, retention_days=30, compact_after_days=7)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def docs(self, *texts):
+        return [self.Document(page_content=text) for text in texts]
+
+    def contents(self, store):
+        return sorted(store.docstore.search(i).page_content for i in store.index_to_docstore_id.values())
+
+    def test_rewrite_replaces_only_same_source(self):
+        day = date(2024, 12, 26)
+        self.store.write(self.docs('뉴스 A', '뉴스 B'), source='news', day=day)
+        self.store.write(self.docs('NVDA 134.2'), source='market', day=day)
+        store = self.store.write(self.docs('뉴스 C'), source='news', day=day)
+        self.assertEqual(self.contents(store), ['NVDA 134.2', '뉴스 C'])
+        self.store.write(self.docs('NVDA 130.0'), source='market', day=date(2024, 12, 27))
+        self.assertEqual(self.store.partition_names(), ['2024-12-26', '2024-12-27'])
+
+    def test_nothing_new_returns_none(self):
+        day = date(2024, 12, 26)
+        self.store.write(self.docs('뉴스 A'), source='news', day=day)
+        index_path = os.path.join(self.tmp.name, 'partitions', '2024-12-26', 'index.faiss')
+        saved = os.stat(index_path).st_mtime_ns
+        # 새 문서도 교체할 예전 문서도 없으면 파티션을 다시 쓰지 않는다
+        self.assertIsNone(self.store.write([], source='market', day=day))
+        self.assertEqual(os.stat(index_path).st_mtime_ns, saved)
+        # 다른 날 이미 저장한 문서뿐이면 저장한 것이 없다
+        self.assertIsNone(self.store.write(self.docs('뉴스 A'), source='news', day=date(2024, 12, 27)))
+        self.assertEqual(self.store.partition_names(), ['2024-12-26'])
+
+    def test_time_window_selects_partitions(self):
+        self.store.write(self.docs('NVDA 120.0'), source='market', day=date(2024, 12, 20))
+        self.store.write(self.docs('NVDA 134.2'), source='market', day=date(2024, 12, 26))
+        partitions, versions = load_partitions(self.tmp.name, self.embeddings)
+        today = date(2024, 12, 26)
+        self.assertEqual(self.contents(partitions.view(parse_time_window('오늘 엔비디아 주가', today))), ['NVDA 134.2'])
+        self.assertEqual(self.contents(partitions.view()), ['NVDA 120.0', 'NVDA 134.2'])
+        # 오늘 데이터 수집 전이면 가장 최근 파티션
+        self.assertEqual(partitions.names_for(parse_time_window('오늘', date(2024, 12, 27))), ['2024-12-26'])
+
+        # 하루치만 다시 쓰면 나머지 파티션은 다시 읽지 않는다
+        self.store.write(self.docs('NVDA 135.0'), source='market', day=today)
+        reloaded, _ = load_partitions(self.tmp.name, self.embeddings, partitions, versions)
+        self.assertIs(reloaded.partitions['2024-12-20'], partitions.partitions['2024-12-20'])
+        self.assertIsNot(reloaded.partitions['2024-12-26'], partitions.partitions['2024-12-26'])
+
+    def test_view_searches_partitions_without_rebuilding(self):
+        texts = [f'12월 {day}일 뉴스 {i}번' for day in (20, 23, 26) for i in range(10)]
+        expected = [d.page_content for d in FAISS.from_texts(texts, self.embeddings).similarity_search('뉴스 7', k=5)]
+        for index_type in ('flat', 'sq8'):
+            with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {'FAISS_INDEX_TYPE': index_type}):
+                store = PartitionedVectorStore(tmp, self.embeddings, dedup=False)
+                for n, day in enumerate((20, 23, 26)):
+                    store.write(self.docs(*texts[n * 10:(n + 1) * 10]), source='news', day=date(2024, 12, day))
+                partitions, _ = load_partitions(tmp, self.embeddings)
+                # 뷰는 인덱스를 새로 만들거나 원본 벡터를 모으지 않는다
+                with mock.patch('src.vector_store.partitioned.build_index', side_effect=AssertionError), \
+                        mock.patch('src.vector_store.partitioned.store_vectors', side_effect=AssertionError):
+                    view = partitions.view()
+                    self.assertEqual(view.index.ntotal, 30)
+                    self.assertEqual([d.page_content for d in view.similarity_search('뉴스 7', k=5)], expected)
+                    # 합친 위치는 파티션 순서대로 이어 붙인 번호다
+                    text = view.docstore.search(view.index_to_docstore_id[25]).page_content
+                    self.assertEqual(text, texts[25])
+                    self.assertTrue(np.allclose(view.index.reconstruct(25), self.embeddings.embed_query(text), atol=1e-5))
+                    self.assertEqual(batched_search(view, [texts[25]], k=1)[0].page_content, texts[25])
+
+    def test_compaction_and_retention(self):
+        for day in (2, 3, 4, 20):
+            self.store.write(self.docs(f'12월 {day}일 뉴스'), source='news', day=date(2024, 12, day))
+        self.store.write(self.docs('11월 뉴스'), source='news', day=date(2024, 11, 1))
+        result = self.store.maintain(today=date(2024, 12, 20))
+        self.assertEqual(result['expired'], ['2024-W44'])
+        self.assertEqual(self.store.partition_names(), ['2024-12-20', '2024-W49'])
+        partitions, _ = load_partitions(self.tmp.name, self.embeddings)
+        self.assertEqual(self.contents(partitions.partitions['2024-W49']), ['12월 2일 뉴스', '12월 3일 뉴스', '12월 4일 뉴스'])
+
+    def test_parse_time_window(self):
+        today = date(2024, 12, 26)  # 목요일
+        self.assertEqual(parse_time_window('이번 주 나스닥 어때?', today), (date(2024, 12, 23), today))
+        self.assertEqual(parse_time_window('지난주 금리 뉴스', today), (date(2024, 12, 16), date(2024, 12, 22)))
+        self.assertEqual(parse_time_window('어제 유가', today), (date(2024, 12, 25), date(2024, 12, 25)))
+        self.assertEqual(parse_time_window('최근 3일 뉴스', today), (date(2024, 12, 24), today))
+        self.assertIsNone(parse_time_window('엔비디아 실적', today))
+
+
+ARTICLE = ('연준은 18일 기준금리를 0.25%포인트 인하했다. 파월 의장은 기자회견에서 내년 금리 인하 속도를 늦출 수 있다고 밝혔고, '
+           '이 발언 직후 나스닥 지수는 3% 넘게 하락했다. 시장은 내년 인하 횟수 전망을 두 번으로 줄였다. '
+           '10년물 국채 금리는 4.5% 위로 올랐고 달러 지수는 2년 만에 최고치를 기록했다. 비트코인도 5% 가까이 떨어졌다. '
+           '연준 위원들은 내년 말 기준금리 전망치 중간값을 3.9%로 제시해 9월 전망보다 0.5%포인트 높였다. '
+           '물가 상승률이 목표치인 2%로 돌아오는 시점도 2027년으로 늦춰졌다.')
+
+
+class TestDeduplication(unittest.TestCase):
+    def test_batch_exact_and_near_duplicates(self):
+        near = ARTICLE.replace('두 번', '2번')
+        texts = [ARTICLE, '  ' + ARTICLE.upper() + ' ', near, '12월 2일 뉴스', '12월 3일 뉴스']
+        kept, fingerprints, report = deduplicate(texts)
+        # 짧은 본문은 완전히 같을 때만 중복으로 본다
+        self.assertEqual(kept, [0, 3, 4])
+        self.assertEqual(report, {'input': 5, 'exact': 1, 'near': 1, 'kept': 3})
+        self.assertEqual(deduplicate(texts, near_duplicates=False)[0], [0, 2, 3, 4])
+
+    def test_index_ignores_scope_being_rewritten(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = FingerprintIndex(os.path.join(tmp, 'fingerprints.sqlite3'))
+            index.replace('2024-12-18', 'news', [fingerprint(ARTICLE)])
+            self.assertEqual(index.find(fingerprint(ARTICLE))[:2], ('exact', '2024-12-18'))
+            self.assertEqual(index.find(fingerprint(ARTICLE.replace('파월 의장은', '파월은')))[0], 'near')
+            self.assertIsNone(index.find(fingerprint(ARTICLE), exclude=('2024-12-18', 'news')))
+            index.drop(['2024-12-18'])
+            self.assertEqual(index.count(), 0)
+            index.close()
+
+    def test_partitioned_write_embeds_unique_chunks_once(self):
+        from langchain_core.documents import Document
+
+        embeddings = CountingEmbedding(size=16)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PartitionedVectorStore(tmp, embeddings, retention_days=30, compact_after_days=7)
+            docs = [Document(page_content=text) for text in (ARTICLE, ARTICLE, '유가 하락')]
+            store.write(docs, source='news', day=date(2024, 12, 18))
+            self.assertEqual(embeddings.calls, 2)
+            # 같은 날 다시 돌리면 저장된 벡터를 재사용하고 문서는 그대로 남는다
+            rerun = store.write(docs, source='news', day=date(2024, 12, 18))
+            self.assertEqual(embeddings.calls, 2)
+            self.assertEqual(rerun.index.ntotal, 2)
+            # 다음 날 다시 수집된 기사는 새 문서만 저장
+            next_day = store.write(docs + [Document(page_content='금값 최고치')], source='news', day=date(2024, 12, 19))
+            self.assertEqual([next_day.docstore.search(i).page_content for i in next_day.index_to_docstore_id.values()],
+                             ['금값 최고치'])
+            self.assertEqual(store.last_dedup['exact'], 3)
+            self.assertEqual(store.filter_new([ARTICLE, '새 기사', ARTICLE], source='news', day=date(2024, 12, 19)), [0, 1])
+            # 저장이 끝나기 전(번역/임베딩 실패)에는 지문을 기록하지 않으므로 다음 날 다시 처리한다
+            self.assertEqual(store.filter_new([ARTICLE], source='news', day=date(2024, 12, 20)), [0])
+            store.record_new([ARTICLE, '새 기사'], source='news', day=date(2024, 12, 19))
+            self.assertEqual(store.filter_new([ARTICLE, '새 기사'], source='news', day=date(2024, 12, 20)), [])
+            # 지문 파일을 지워도 저장된 파티션으로 다시 만든다
+            store.fingerprints.close()
+            os.remove(os.path.join(tmp, 'fingerprints.sqlite3'))
+            reopened = PartitionedVectorStore(tmp, embeddings)
+            self.assertEqual(reopened.fingerprints.count('chunk'), 3)
+            reopened.fingerprints.close()
+
+
+class TestMmapStore(unittest.TestCase):
+    def setUp(self):
+        from langchain_core.documents import Document
+
+        self.embeddings = DeterministicFakeEmbedding(size=16)
+        docs = [Document(page_content=text, metadata={'title': f'기사 {i}', 'id': i})
+                for i, text in enumerate(['나스닥 상승', '금리 동결', '엔비디아 실적', '금값 최고치', '유가 하락'])]
+        self.store = FAISS.from_documents(docs, self.embeddings)
+
+    def test_round_trip_fetches_documents_lazily(self):
+        expected = self.store.similarity_search_with_score('금리', k=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(self.store, tmp, store_format='mmap')
+            self.assertEqual(sorted(os.listdir(tmp)), ['chunks.sqlite3', 'index.faiss', 'index.generation'])
+            loaded = load_store(tmp, self.embeddings)
+            self.assertIsInstance(loaded.docstore, SqliteDocstore)
+            self.assertIsInstance(loaded.index_to_docstore_id, ChunkIdMap)
+            results = loaded.similarity_search_with_score('금리', k=3)
+            self.assertEqual([(d.page_content, d.metadata) for d, _ in results],
+                             [(d.page_content, d.metadata) for d, _ in expected])
+            self.assertEqual([s for _, s in results], [s for _, s in expected])
+            self.assertEqual([d.page_content for d in batched_search(loaded, ['유가', '나스닥'], k=2)],
+                             [d.page_content for d in batched_search(self.store, ['유가', '나스닥'], k=2)])
+            # 메모리 매핑 인덱스에서도 다른 종류로 다시 만들 수 있다
+            rebuilt = rebuild_index(loaded, index_type='sq8')
+            self.assertEqual(describe_index(rebuilt.index)['type'], 'sq8')
+
+    def test_loads_without_ifc_mmap_flag(self):
+        # faiss 1.11 미만(IO_FLAG_MMAP_IFC 없음)에서 쓰는 읽기 플래그로도 열린다
+        import faiss
+
+        fallback = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(mmap_store, 'MMAP_READ_FLAGS', fallback):
+            for index_type in ('flat', 'sq8'):
+                save_store_atomic(rebuild_index(self.store, index_type=index_type), tmp)
+                loaded = load_store(tmp, self.embeddings)
+                self.assertEqual(describe_index(loaded.index)['type'], index_type)
+                self.assertEqual(len(loaded.similarity_search('금리', k=3)), 3)
+
+    def test_convert_pickle_store(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(self.store, tmp, store_format='pickle')
+            self.assertEqual(sorted(os.listdir(tmp)), ['index.faiss', 'index.pkl'])
+            self.assertNotIsInstance(load_store(tmp, self.embeddings).docstore, SqliteDocstore)
+            self.assertEqual(convert_pickle_store(tmp, self.embeddings).index.ntotal, 5)
+            self.assertEqual(sorted(os.listdir(tmp)), ['chunks.sqlite3', 'index.faiss', 'index.generation'])
+            self.assertIsNone(convert_pickle_store(tmp, self.embeddings))
+            loaded = load_store(tmp, self.embeddings)
+            self.assertEqual(loaded.similarity_search('엔비디아 실적', k=1)[0].metadata, {'title': '기사 2', 'id': 2})
+
+    def test_mismatched_files_are_not_loaded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(self.store, tmp)
+            chunks = os.path.join(tmp, 'chunks.sqlite3')
+            os.replace(chunks, chunks + '.old')
+            save_store_atomic(FAISS.from_texts(['나스닥 상승'], self.embeddings), tmp)
+            # 새 index.faiss 와 예전 chunks.sqlite3 조합(교체 도중)은 읽지 않는다
+            os.replace(chunks + '.old', chunks)
+            self.assertIsNone(load_store(tmp, self.embeddings))
+
+    def test_same_size_rebuild_is_not_mixed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(self.store, tmp)
+            chunks = os.path.join(tmp, 'chunks.sqlite3')
+            os.replace(chunks, chunks + '.old')
+            # 개수가 같은 Flat 인덱스는 index.faiss 크기도 같다
+            rebuilt = FAISS.from_texts(['환율 급등', '코스피 하락', '테슬라 인도량', '은값 반등', '천연가스 급락'], self.embeddings)
+            save_store_atomic(rebuilt, tmp)
+            os.replace(chunks + '.old', chunks)
+            self.assertIsNone(load_store(tmp, self.embeddings))
+
+    def test_lexical_index_streams_texts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            save_store_atomic(self.store, tmp)
+            loaded = load_store(tmp, self.embeddings)
+            # 일정 개수씩 나눠 읽어도 위치 순서가 유지된다
+            texts = list(loaded.docstore.table.iter_texts(batch=2))
+            self.assertEqual(texts, ['나스닥 상승', '금리 동결', '엔비디아 실적', '금값 최고치', '유가 하락'])
+            with mock.patch.object(loaded.docstore, 'search', side_effect=AssertionError):
+                index = lexical_index(loaded)
+            self.assertEqual(index.size, 5)
+            self.assertEqual(list(index.search('유가', k=1)), [4])
+
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.texts = [
+            '다음은 주식 종목과 그에 대한 정보이다. 종목코드 : NVDA, 종목 이름 : NVIDIA, 변동폭 : -1.2, 종가 : 120',
+            '다음은 주식 종목과 그에 대한 정보이다. 종목코드 : C, 종목 이름 : Citigroup, 변동폭 : +0.5, 종가 : 70',
+            '다음은 주식 종목과 그에 대한 정보이다. 종목코드 : ^TNX, 종목 이름 : 10 Year Treasury, 변동폭 : +0.1, 종가 : 4.2',
+            '엔비디아가 데이터센터 매출 호조로 실적 전망을 올렸다.',
+            '연준이 기준금리를 동결하면서 국채 금리가 하락했다.',
+            '다음은 주식 종목과 그에 대한 정보이다. 종목코드 : NVDA, 종목 이름 : NVIDIA, 변동폭 : +2.0, 종가 : 125',
+        ]
+        self.index = LexicalIndex(self.texts)
+
+    def test_symbol_lookup(self):
+        # 같은 종목이면 나중에 추가된 행이 먼저
+        self.assertEqual(self.index.lookup('NVDA'), [5, 0])
+        self.assertEqual(self.index.lookup('엔비디아 주가는?'), [5, 0])
+        self.assertEqual(self.index.lookup('국채 수익률 알려줘'), [2])
+        self.assertEqual(self.index.lookup('10 year treasury'), [2])
+        # 짧은 티커는 대소문자를 구분한다
+        self.assertEqual(self.index.lookup('C'), [1])
+        self.assertIsNone(self.index.lookup('c'))
+        # 종목 말고 다른 내용을 묻는 질문은 임베딩 검색으로
+        self.assertIsNone(self.index.lookup('엔비디아 실적 전망'))
+        self.assertIsNone(self.index.lookup('메타버스'))
+
+    def test_bm25_ranking(self):
+        self.assertEqual(list(self.index.search('엔비디아 실적 전망', k=2))[0], 3)
+        self.assertEqual(list(self.index.search('국채 금리 동결', k=1)), [4])
+        self.assertEqual(len(self.index.search('없는단어', k=3)), 0)
+
+    def test_hybrid_search_finds_symbol_rows(self):
+        store = FAISS.from_texts(self.texts, DeterministicFakeEmbedding(size=16))
+        docs = batched_search(store, ['NVDA 변동폭'], k=2, hybrid=True)
+        self.assertIn('NVDA', docs[0].page_content)
+        vector_only = batched_search(store, ['NVDA 변동폭'], k=2, hybrid=False)
+        self.assertLessEqual(len(vector_only), 2)
+        # 스토어에 붙여 둔 색인으로 조회 (임베딩 호출 없음)
+        self.assertEqual([d.page_content for d in lookup_symbols(store, 'NVIDIA', limit=1)], [self.texts[5]])
+        self.assertIsNone(lookup_symbols(store, '금리 전망'))
+
+
+class TestNormalizeText(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize_text('  엔비디아   주가 어때?? '), '엔비디아 주가 어때')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)